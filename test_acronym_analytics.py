@@ -0,0 +1,307 @@
+import argparse
+import os
+import sys
+import time
+
+import test_acronym_appdata as appdata
+import test_acronym_progress as progress
+
+try:
+    import numpy as np
+except ImportError:
+    # Optional: only analytics needs NumPy, see require_numpy().
+    np = None
+
+'''
+    Study analytics over the answer history (test_acronym_progress), for one student or a whole class:
+
+        python3 test_acronym_analytics.py                          # the user's own history
+        python3 test_acronym_analytics.py class/*.sqlite3 logs/*.csv --top 30
+        python3 test_acronym_analytics.py --json > report.json
+        python3 test_acronym_analytics.py a.sqlite3 b.sqlite3 --export class.csv
+
+    Inputs are progress databases and exported logs: .csv with a header, or .jsonl, both with the columns of the answers table (session, deck, itemkey, ts, outcome). --export writes what was read as one such .csv, so a class's histories can be gathered into one file.
+
+    Answers are loaded once into columns: NumPy arrays of session ids, times and outcomes, with decks and acronyms as integer codes into lists of names. Everything is then whole-array work: bincount for per-acronym, per-deck and per-length counts, one lexsort to line up each student's answers to the same acronym for the forgetting curve (accuracy by time since that acronym was last answered), and unique for session-over-session accuracy. Millions of answers take about a second, most of it reading them.
+
+    The hardest acronyms are those most often missed, ranked by (misses + 1) / (answers + 2) so one unlucky answer doesn't top the list, among those answered at least min_answers times. Session.review_keys() turns them into a review: the debug window's Review Hardest button and the CLI's 'hardest' command do that.
+
+    NumPy is not needed for anything else in the app; without it, analyze() raises AnalyticsError saying so.
+'''
+
+EXPORT_COLUMNS = ('session', 'deck', 'itemkey', 'ts', 'outcome')
+
+# Forgetting curve buckets: time since the same acronym was last answered.
+HOUR_SECONDS = 60 * 60
+FORGETTING_EDGES = (0, HOUR_SECONDS, 6 * HOUR_SECONDS, progress.DAY_SECONDS, 3 * progress.DAY_SECONDS,
+                    7 * progress.DAY_SECONDS, 30 * progress.DAY_SECONDS)
+FORGETTING_LABELS = ('< 1 hour', '1-6 hours', '6-24 hours', '1-3 days', '3-7 days', '7-30 days', '30+ days')
+
+# Hardest acronyms are only ranked after this many answers.
+MIN_ANSWERS = 3
+# Sessions listed in the text report; the trend uses them all.
+REPORT_SESSIONS = 10
+
+
+class AnalyticsError(Exception):
+    pass
+
+
+def require_numpy():
+    if np is None:
+        raise AnalyticsError('Study analytics needs NumPy: pip install numpy')
+
+
+class AnswerLog:
+    '''
+        Answers as columns, one entry per answer. deck and key are codes into decks and keys; source is the index of the file each answer was read from, i.e. the student for one database per student.
+    '''
+    __slots__ = ('sources', 'source', 'session', 'deck', 'key', 'ts', 'outcome', 'decks', 'keys')
+
+    def __init__(self, sources, columns_by_source):
+        # columns_by_source: per source, (sessions, decks, keys, times, outcomes) sequences
+        require_numpy()
+        self.sources = list(sources)
+        sessions, decks, keys, times, outcomes, source_ids = [], [], [], [], [], []
+        for source_id, (source_sessions, source_decks, source_keys, source_times, source_outcomes) in enumerate(columns_by_source):
+            sessions.append(np.asarray(source_sessions, dtype=np.int64))
+            times.append(np.asarray(source_times, dtype=np.float64))
+            outcomes.append(np.asarray(source_outcomes, dtype=np.int8))
+            source_ids.append(np.full(len(source_keys), source_id, dtype=np.int32))
+            decks.extend(source_decks)
+            keys.extend(source_keys)
+        self.session = np.concatenate(sessions) if sessions else np.zeros(0, np.int64)
+        self.ts = np.concatenate(times) if times else np.zeros(0, np.float64)
+        self.outcome = np.concatenate(outcomes) if outcomes else np.zeros(0, np.int8)
+        self.source = np.concatenate(source_ids) if source_ids else np.zeros(0, np.int32)
+        self.decks, self.deck = _codes(decks)
+        self.keys, self.key = _codes(keys)
+
+    def __len__(self):
+        return len(self.outcome)
+
+    @classmethod
+    def load(cls, paths):
+        # Progress databases and exported .csv/.jsonl logs.
+        require_numpy()
+        return cls(paths, [_read_source(path) for path in paths])
+
+    def save_csv(self, path):
+        import csv
+        with open(path, 'w', newline='', encoding='utf-8') as export_file:
+            writer = csv.writer(export_file)
+            writer.writerow(EXPORT_COLUMNS)
+            writer.writerows(zip(self.session.tolist(), (self.decks[code] for code in self.deck.tolist()),
+                                 (self.keys[code] for code in self.key.tolist()), self.ts.tolist(),
+                                 self.outcome.tolist()))
+
+
+def _codes(names):
+    # (distinct names in first-seen order, int32 code of each name); the dict work is all in C.
+    distinct = list(dict.fromkeys(names))
+    index = {name: code for code, name in enumerate(distinct)}
+    return distinct, np.fromiter(map(index.__getitem__, names), dtype=np.int32, count=len(names))
+
+
+def _read_source(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        import csv
+        with open(path, newline='', encoding='utf-8') as log_file:
+            rows = [(int(row.get('session') or 0), row.get('deck') or '', row['itemkey'].lower(),
+                     float(row['ts']), int(row['outcome'])) for row in csv.DictReader(log_file)]
+    elif extension == '.jsonl':
+        import json
+        with open(path, encoding='utf-8') as log_file:
+            rows = [(int(entry.get('session') or 0), entry.get('deck') or '', entry['itemkey'].lower(),
+                     float(entry['ts']), int(entry['outcome']))
+                    for entry in map(json.loads, log_file) if entry]
+    else:
+        return _read_database(path)
+    if not rows:
+        return (), (), (), (), ()
+    return tuple(zip(*rows))
+
+
+def _read_database(path):
+    '''
+        Read the columns of a progress database. Fetching millions of rows as tuples is slow, so SQLite joins each column into one string in a single scan, and NumPy parses the numbers back out of it.
+    '''
+    import pathlib
+    import sqlite3
+    # Read-only, so a mistyped path is an error rather than a new empty database.
+    connection = sqlite3.connect(pathlib.Path(path).resolve().as_uri() + '?mode=ro', uri=True)
+    try:
+        sessions, decks, keys, times, outcomes = connection.execute(
+            "SELECT group_concat(session), group_concat(deck, char(31)), group_concat(itemkey, char(31)), "
+            "group_concat(ts), group_concat(outcome, '') FROM answers").fetchone()
+    finally:
+        connection.close()
+    if outcomes is None:
+        return (), (), (), (), ()
+    return (np.fromstring(sessions, dtype=np.int64, sep=','), decks.split('\x1f'), keys.split('\x1f'),
+            np.fromstring(times, dtype=np.float64, sep=','), np.frombuffer(outcomes.encode(), dtype=np.uint8) - ord('0'))
+
+
+class Report:
+    '''
+        The analytics of an AnswerLog. Every list is of plain tuples, ready for text() and to_dict():
+            hardest     (itemkey, answers, misses, error rate), hardest first
+            decks       (deck, answers, accuracy)
+            lengths     (acronym length, answers, accuracy)
+            forgetting  (time since last answered, answers, accuracy), per FORGETTING_LABELS bucket
+            sessions    (session id, start time, answers, accuracy), oldest first
+        trend is the least-squares change in accuracy per session, or None with fewer than two sessions.
+    '''
+
+    def __init__(self):
+        self.answer_count = 0
+        self.accuracy = 0.0
+        self.acronym_count = 0
+        self.hardest = []
+        self.decks = []
+        self.lengths = []
+        self.forgetting = []
+        self.sessions = []
+        self.trend = None
+
+    @property
+    def hardest_keys(self):
+        return [key for key, _answers, _misses, _rate in self.hardest]
+
+    def to_dict(self):
+        return {
+            'answers': self.answer_count,
+            'accuracy': self.accuracy,
+            'acronyms': self.acronym_count,
+            'hardest': [dict(zip(('itemkey', 'answers', 'misses', 'error_rate'), row)) for row in self.hardest],
+            'decks': [dict(zip(('deck', 'answers', 'accuracy'), row)) for row in self.decks],
+            'lengths': [dict(zip(('length', 'answers', 'accuracy'), row)) for row in self.lengths],
+            'forgetting': [dict(zip(('since_last', 'answers', 'accuracy'), row)) for row in self.forgetting],
+            'sessions': [dict(zip(('session', 'started', 'answers', 'accuracy'), row)) for row in self.sessions],
+            'trend': self.trend,
+        }
+
+    def text(self):
+        if not self.answer_count:
+            return 'No answers yet'
+        lines = [f"{self.answer_count} answers, {self.acronym_count} acronyms, {self.accuracy:.0%} correct"]
+        if self.trend is not None:
+            lines.append(f"Trend: {self.trend * 100:+.1f} points per session over {len(self.sessions)} sessions")
+        lines.append('')
+        lines.append(f"Hardest (at least {MIN_ANSWERS} answers):")
+        lines.extend(f"  {key:16} {misses:5}/{answers:<5} missed  {rate:.0%}"
+                     for key, answers, misses, rate in self.hardest)
+        for title, rows in (('By deck:', self.decks), ('By length:', self.lengths),
+                            ('By time since last answered:', self.forgetting)):
+            lines.append(title)
+            lines.extend(f"  {str(name)[:28]:28} {answers:7}  {accuracy:.0%}" for name, answers, accuracy in rows)
+        lines.append(f"Last {REPORT_SESSIONS} sessions:")
+        lines.extend(f"  {time.strftime('%Y-%m-%d %H:%M', time.localtime(started))} {answers:7}  {accuracy:.0%}"
+                     for _session, started, answers, accuracy in self.sessions[-REPORT_SESSIONS:])
+        return '\n'.join(lines)
+
+
+def _accuracy_rows(names, codes, outcome, code_count):
+    # (name, answers, accuracy) per code that has answers
+    answers = np.bincount(codes, minlength=code_count)
+    correct = np.bincount(codes, weights=outcome, minlength=code_count)
+    return [(names[code], int(answers[code]), float(correct[code] / answers[code]))
+            for code in np.flatnonzero(answers).tolist()]
+
+
+def analyze(log, top=20, min_answers=MIN_ANSWERS):
+    require_numpy()
+    report = Report()
+    report.answer_count = len(log)
+    if not len(log):
+        return report
+    outcome = log.outcome.astype(np.float64)
+    report.accuracy = float(outcome.mean())
+
+    # Per acronym
+    key_count = len(log.keys)
+    answers = np.bincount(log.key, minlength=key_count)
+    misses = answers - np.bincount(log.key, weights=outcome, minlength=key_count)
+    report.acronym_count = int(np.count_nonzero(answers))
+    score = np.where(answers >= min_answers, (misses + 1) / (answers + 2), -1.0)
+    hardest = np.argsort(-score, kind='stable')[:top]
+    report.hardest = [(log.keys[code], int(answers[code]), int(misses[code]), float(misses[code] / answers[code]))
+                      for code in hardest[score[hardest] >= 0].tolist()]
+
+    # Per deck and per acronym length
+    report.decks = _accuracy_rows([deck or '(unknown)' for deck in log.decks], log.deck, outcome, len(log.decks))
+    key_lengths = np.fromiter(map(len, log.keys), dtype=np.int32, count=key_count)
+    lengths = key_lengths[log.key]
+    length_count = int(lengths.max()) + 1
+    report.lengths = _accuracy_rows(range(length_count), lengths, outcome, length_count)
+
+    # Forgetting curve: each answer after the first to the same acronym by the same student, by time since that one.
+    order = np.lexsort((log.ts, log.key, log.source))
+    sorted_key = log.key[order]
+    sorted_source = log.source[order]
+    repeated = (sorted_key[1:] == sorted_key[:-1]) & (sorted_source[1:] == sorted_source[:-1])
+    gaps = np.diff(log.ts[order])[repeated]
+    buckets = np.searchsorted(FORGETTING_EDGES, gaps, side='right') - 1
+    report.forgetting = _accuracy_rows(FORGETTING_LABELS, np.maximum(buckets, 0),
+                                       outcome[order][1:][repeated], len(FORGETTING_LABELS))
+
+    # Session over session; ids are start times in nanoseconds, so sorted ids are in time order.
+    session_ids, session_codes = np.unique(log.session, return_inverse=True)
+    session_answers = np.bincount(session_codes)
+    session_accuracy = np.bincount(session_codes, weights=outcome) / session_answers
+    report.sessions = [(session_id, session_id / 1e9, int(count), float(accuracy))
+                       for session_id, count, accuracy in zip(session_ids.tolist(), session_answers.tolist(),
+                                                              session_accuracy.tolist())]
+    if len(session_ids) >= 2:
+        report.trend = float(np.polyfit(np.arange(len(session_ids)), session_accuracy, 1)[0])
+    return report
+
+
+def analyze_history(progress_store, top=20, min_answers=MIN_ANSWERS):
+    '''
+        Analyze a ProgressStore's database, including answers still on its write queue.
+    '''
+    progress_store.flush()
+    return analyze(AnswerLog.load([progress_store.path]), top, min_answers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Accuracy, hardest acronyms, forgetting curve and trends from answer histories.')
+    parser.add_argument('paths', nargs='*',
+                        help='progress databases and exported .csv/.jsonl logs (default: your own history)')
+    parser.add_argument('--top', type=int, default=20,
+                        help='how many of the hardest acronyms to list')
+    parser.add_argument('--min-answers', type=int, default=MIN_ANSWERS,
+                        help='only rank acronyms answered at least this many times')
+    parser.add_argument('--json', action='store_true',
+                        help='print the report as JSON')
+    parser.add_argument('--export', metavar='FILE',
+                        help='also write every answer read to one .csv log')
+    args = parser.parse_args(argv)
+
+    import sqlite3
+    paths = args.paths or [appdata.data_path(progress.PROGRESS_FILE)]
+    try:
+        log = AnswerLog.load(paths)
+        report = analyze(log, args.top, args.min_answers)
+    except AnalyticsError as error:
+        print(error, file=sys.stderr)
+        return 1
+    except (OSError, ValueError, KeyError, sqlite3.Error) as error:
+        print(f"could not read the answers: {error!r}", file=sys.stderr)
+        return 1
+    if args.export:
+        log.save_csv(args.export)
+    if args.json:
+        import json
+        json.dump(report.to_dict(), sys.stdout, indent=1)
+        print()
+    else:
+        print(report.text())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
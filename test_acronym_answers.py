@@ -0,0 +1,169 @@
+import re
+
+'''
+    Typed answers. In typed mode the user types the expanded text of an acronym and it is graded against every accepted itemvalue, so KB takes either 'Kilobyte' or 'Knowledge Base'.
+
+    Both sides are normalized first: lower case, punctuation read as a word break, and 'and' and '&' dropped, so 'Command & Control', 'command-and-control' and 'Command Control' are the same answer. Notes in parentheses are optional: 'Full Disk Encryption (BitLocker)' also takes 'Full Disk Encryption'. Then a few typos are allowed, one edit (insert, delete or replace a character) per EDIT_EVERY characters of the accepted answer.
+
+    The edit distance uses Myers' bit-parallel algorithm (Hyyrö's form for the distance between two whole strings). Each accepted answer becomes a bitmask per character; one pass over the typed text then updates a whole column of the distance table with a handful of integer operations. Python ints are as wide as they need to be, so long answers need no blocking. The pass stops as soon as the distance can no longer come back under the limit, and answers that differ too much in length are skipped without a pass, which keeps grading in microseconds and lets a window grade on every keystroke.
+
+    AnswerKey normalizes every itemvalue of the loaded decks once, as they are loaded (see Session.set_typed_mode). The character masks are only built for the values of acronyms actually graded, and kept.
+'''
+
+# One typo allowed for every this many characters of the accepted answer.
+EDIT_EVERY = 6
+
+_IGNORED_WORDS = frozenset(['and'])
+# Letters and digits; punctuation, '&' included, breaks words.
+_WORD = re.compile(r'[^\W_]+')
+_NOTES = re.compile(r'\([^()]*\)')
+
+
+def words(text):
+    # Lower case words without punctuation or 'and'.
+    return [word for word in _WORD.findall(text.lower())
+            if word not in _IGNORED_WORDS]
+
+
+def normalize(text):
+    return ' '.join(words(text))
+
+
+def accepted_answers(value):
+    # The normalized forms of an itemvalue: as written, and without its notes in parentheses if it has any.
+    answer = normalize(value)
+    if '(' in value:
+        short_answer = normalize(_NOTES.sub(' ', value))
+        if short_answer and short_answer != answer:
+            return (answer, short_answer)
+    return (answer,)
+
+
+def allowed_edits(answer):
+    return len(answer) // EDIT_EVERY
+
+
+def char_masks(answer):
+    # character -> bitmask of its positions in answer
+    masks = {}
+    for position, char in enumerate(answer):
+        masks[char] = masks.get(char, 0) | 1 << position
+    return masks
+
+
+def edit_distance(answer, masks, typed, max_distance):
+    '''
+        The Levenshtein distance between answer (with its char_masks) and typed, or None if it is more than max_distance.
+    '''
+    answer_length = len(answer)
+    remaining = len(typed)
+    if abs(answer_length - remaining) > max_distance:
+        return None
+    if not answer_length:
+        return remaining
+    # Bit i of the vertical deltas is D[i + 1][j] - D[i][j]: pv for +1, mv for -1. Column 0 is 0, 1, 2, ...
+    all_ones = (1 << answer_length) - 1
+    last_bit = 1 << (answer_length - 1)
+    pv = all_ones
+    mv = 0
+    distance = answer_length
+    for char in typed:
+        remaining -= 1
+        eq = masks.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & all_ones)
+        mh = pv & xh
+        if ph & last_bit:
+            distance += 1
+        elif mh & last_bit:
+            distance -= 1
+        # Row 0 is the distance from the empty answer, which goes up by one every column.
+        ph = (ph << 1 | 1) & all_ones
+        mh = (mh << 1) & all_ones
+        pv = mh | (~(xv | ph) & all_ones)
+        mv = ph & xv
+        # Each character left can take at most one off the distance.
+        if distance - remaining > max_distance:
+            return None
+    return distance if distance <= max_distance else None
+
+
+class Grade:
+    __slots__ = ('typed', 'value', 'distance')
+
+    def __init__(self, typed, value=None, distance=None):
+        self.typed = typed
+        self.value = value  # the closest accepted itemvalue, or None if none is close enough
+        self.distance = distance  # edits from it, or its short form, after normalizing
+
+    @property
+    def correct(self):
+        return self.value is not None
+
+    @property
+    def exact(self):
+        return self.distance == 0
+
+    def __repr__(self):
+        return f"Grade({self.typed!r}, {self.value!r}, {self.distance!r})"
+
+    def text(self):
+        if not self.typed.strip():
+            return ''
+        if self.exact:
+            return f"Correct: {self.value}"
+        if self.correct:
+            return f"Correct, {self.distance} typo{'s' if self.distance > 1 else ''}: {self.value}"
+        return 'Not yet'
+
+
+class AnswerKey:
+    '''
+        The accepted_answers of every itemvalue loaded, to grade typed answers against. add_values() is called with each deck's itemvalues as it is loaded; values are never removed, since the few left over by an unloaded deck cost nothing.
+    '''
+
+    def __init__(self, values=()):
+        # itemvalue -> its accepted_answers
+        self._normalized = {}
+        # normalized itemvalue -> its char_masks, built on first grade
+        self._masks = {}
+        self.add_values(values)
+
+    def __len__(self):
+        return len(self._normalized)
+
+    def add_values(self, values):
+        normalized = self._normalized
+        for value in values:
+            if value not in normalized:
+                normalized[value] = accepted_answers(value)
+
+    def answers(self, value):
+        value_answers = self._normalized.get(value)
+        if value_answers is None:
+            value_answers = self._normalized[value] = accepted_answers(value)
+        return value_answers
+
+    def grade(self, typed, values):
+        '''
+            Grade typed text against the accepted values (e.g. item['itemvalues']). The closest value within its allowed edits wins.
+        '''
+        typed_answer = normalize(typed)
+        best = Grade(typed)
+        for value in values:
+            for answer in self.answers(value):
+                if answer == typed_answer:
+                    return Grade(typed, value, 0)
+                max_distance = allowed_edits(answer)
+                if best.distance is not None:
+                    max_distance = min(max_distance, best.distance - 1)
+                if max_distance <= 0:
+                    continue
+                masks = self._masks.get(answer)
+                if masks is None:
+                    masks = self._masks[answer] = char_masks(answer)
+                distance = edit_distance(answer, masks, typed_answer, max_distance)
+                if distance is not None:
+                    best = Grade(typed, value, distance)
+        return best
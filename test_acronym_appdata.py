@@ -0,0 +1,35 @@
+import os
+
+'''
+    Where the Acronym Tester keeps what it learns about the user between runs, e.g. the spaced repetition schedule. Decks stay next to the app; this folder is per user:
+        $ACRONYM_TESTER_HOME if set, otherwise ~/.acronym_tester
+'''
+
+HOME_VARIABLE = 'ACRONYM_TESTER_HOME'
+
+
+def data_dir():
+    return os.environ.get(HOME_VARIABLE) or os.path.join(os.path.expanduser('~'), '.acronym_tester')
+
+
+def data_path(file_name):
+    # The folder is created on first use.
+    os.makedirs(data_dir(), exist_ok=True)
+    return os.path.join(data_dir(), file_name)
+
+
+def write_atomic(path, data):
+    '''
+        Replace the file at path with data (bytes) in one step, so a crash never leaves half a file.
+    '''
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,352 @@
+import argparse
+import json
+import os
+import platform
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import test_acronym_cache as deck_cache
+import test_acronym_filters as filters
+import test_acronym_ports as ports
+import test_acronym_progress as progress
+import test_acronym_session as session
+import test_acronym_snapshot as snapshot
+
+'''
+    Benchmarks for the Acronym Tester hot paths, on synthetic decks in the shipped csv schema (itemkey,itemvalue,itemlink,strict).
+
+        python3 test_acronym_bench.py --sizes 1k,100k,1m
+        python3 test_acronym_bench.py --save-baseline bench_baseline.json
+        python3 test_acronym_bench.py --baseline bench_baseline.json
+        python3 test_acronym_bench.py --startup-report
+
+    --startup-report imports the app in fresh interpreters with python -X importtime and lists the slowest imports, best of several runs, so modules that slow down cold start are easy to spot.
+
+    Each deck size gets its own generated deck in bench_decks/. Every operation is timed (wall seconds for all calls, and per call), then run once more under tracemalloc for its peak memory and the memory it still holds afterwards (retained). Results are written as JSON. When a baseline file is given, any operation slower than the baseline by more than the tolerance is reported as a regression and the exit status is 1.
+
+    bench_baseline.json is checked in: the default sizes on the reference machine named in its meta. CI runs --baseline bench_baseline.json against it; after an intended speed change, or when the CI machine changes, regenerate it there with --save-baseline bench_baseline.json and commit it with the change.
+'''
+
+DECK_FOLDER = 'bench_decks'
+DEFAULT_SIZES = '1k,100k'
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(text[-1:], 1)
+    return int(text.rstrip('km')) * multiplier
+
+
+def generate_deck(path, rows, duplicate_key_ratio=0.1, duplicate_value_ratio=0.05, strict_ratio=0.8, seed=0):
+    '''
+        Write a synthetic deck. duplicate_key_ratio of the rows reuse an earlier acronym with a new meaning (like KB), duplicate_value_ratio repeat an earlier row exactly (the same acronym in two exams), and strict_ratio of the rows are strict.
+        The format follows the extension of path: .csv, .json or .jsonl. The same seed writes the same rows in every format.
+    '''
+    extension = os.path.splitext(path)[1]
+    rng = random.Random(seed)
+    words = [''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10))).capitalize()
+             for _ in range(2000)]
+    used_keys = set()
+    written_rows = []
+    with open(path, 'w', newline='') as deck_file:
+        if extension == '.csv':
+            deck_file.write(','.join(deck_cache.RAW_FIELDS) + '\n')
+        elif extension == '.json':
+            deck_file.write('[\n')
+        for index in range(rows):
+            chance = rng.random()
+            if written_rows and chance < duplicate_value_ratio:
+                row = rng.choice(written_rows)
+            else:
+                if written_rows and chance < duplicate_value_ratio + duplicate_key_ratio:
+                    key = rng.choice(written_rows)[0]
+                else:
+                    key = None
+                    while key is None or key in used_keys:
+                        key = ''.join(rng.choice(string.ascii_uppercase)
+                                      for _ in range(rng.randint(2, 8)))
+                    used_keys.add(key)
+                value = ' '.join(rng.choice(words)
+                                 for _ in range(rng.randint(2, 5)))
+                link = 'https://en.wikipedia.org/wiki/' + value.replace(' ', '_')
+                strict = 'true' if rng.random() < strict_ratio else 'false'
+                row = (key, value, link, strict)
+            written_rows.append(row)
+            if extension == '.csv':
+                deck_file.write(','.join(row) + '\n')
+            else:
+                record = json.dumps(dict(zip(deck_cache.RAW_FIELDS, row)))
+                if extension == '.json':
+                    deck_file.write((',\n' if index else '') + record)
+                else:
+                    deck_file.write(record + '\n')
+        if extension == '.json':
+            deck_file.write('\n]\n')
+
+
+def deck_path(rows, args):
+    name = f"synthetic-{rows}-k{args.duplicate_keys}-v{args.duplicate_values}-s{args.strict}"
+    return os.path.join(DECK_FOLDER, name)
+
+
+class Bench:
+    def __init__(self, measure_memory=True):
+        self.measure_memory = measure_memory
+        self.results = {}
+
+    def measure(self, name, func, calls=1):
+        started = time.perf_counter()
+        for _ in range(calls):
+            func()
+        elapsed = time.perf_counter() - started
+        result = {'calls': calls, 'seconds': elapsed,
+                  'seconds_per_call': elapsed / calls}
+
+        if self.measure_memory:
+            tracemalloc.start()
+            func()
+            # Retained: still allocated after the call, e.g. the merged items start_test keeps.
+            result['retained_bytes'], result['peak_bytes'] = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        self.results[name] = result
+        print(f"  {name:32} {elapsed:10.4f}s  {elapsed / calls * 1e6:12.1f}us/call"
+              + (f"  {result['peak_bytes'] / 1e6:10.1f}MB peak  {result['retained_bytes'] / 1e6:10.1f}MB retained" if self.measure_memory else ''))
+
+
+def run_deck(file_name, rng, measure_memory, extensions=('.csv',), keystrokes=2000, moves=10000):
+    bench = Bench(measure_memory)
+    a_session = session.Session([file_name], rng=rng)
+
+    def load_cold():
+        try:
+            os.remove(deck_cache.cache_path(file_name + '.csv'))
+        except FileNotFoundError:
+            pass
+        a_session.load_and_sort([file_name])
+
+    bench.measure('load_and_sort (cold cache)', load_cold)
+    bench.measure('load_and_sort', lambda: a_session.load_and_sort([file_name]))
+    # Parse the same rows in each format, to pick the fastest one for large decks.
+    for extension in extensions:
+        source_path = file_name + extension
+        with open(source_path, 'rb') as source_file:
+            data = source_file.read()
+        bench.measure(f"compile_rows ({extension})",
+                      lambda: deck_cache.compile_rows(source_path, data))
+    raw_rows_by_file = a_session.load_and_sort([file_name])
+    bench.measure('process_duplicate_acronyms',
+                  lambda: a_session.process_duplicate_acronyms(raw_rows_by_file))
+    bench.measure('start_test', a_session.start_test)
+    bench.measure('strict_mode_filter',
+                  lambda: a_session.set_strict_mode(not a_session.strict_mode), calls=2)
+    bench.measure('scan_items_for_acronym_lengths',
+                  a_session.scan_items_for_acronym_lengths, calls=1000)
+
+    # Type random acronyms one keystroke at a time.
+    typed = []
+    while len(typed) < keystrokes:
+        key = rng.choice(a_session.all_items)[a_session.ITEM_KEY]
+        typed += [key[:length] for length in range(1, len(key) + 1)]
+    typed_iter = iter(typed * 2)
+    bench.measure('manual_entry', lambda: a_session.manual_entry(
+        next(typed_iter)), calls=keystrokes)
+    a_session.set_manual_entry_mode(False)
+
+    # Reverse mode: search expansions by word, typing the words of random values a keystroke at a time.
+    typed_words = []
+    while len(typed_words) < keystrokes:
+        value = rng.choice(rng.choice(a_session.all_items)[a_session.ITEM_VALUES])
+        typed_words += [value[:length] for length in range(1, len(value) + 1)]
+    typed_iter = iter(typed_words * 2)
+    bench.measure('value_index search', lambda: a_session.value_index.search(
+        next(typed_iter)), calls=keystrokes)
+    a_session.set_reverse_mode(True)
+    bench.measure('reverse_answers', a_session.reverse_answers, calls=1000)
+    a_session.set_reverse_mode(False)
+
+    # Ports: one row naming a random port for each acronym, then port queries from narrow to wide.
+    port_rows = [(item[a_session.ITEM_KEY], f"{rng.choice(ports.PROTOCOLS)}/{rng.randrange(ports.MAX_PORT + 1)}", '', '')
+                 for item in a_session.all_items]
+    port_index = ports.PortIndex(a_session.merger)
+    bench.measure('PortIndex add_rows', lambda: port_index.add_rows(port_rows))
+    for query_text in ('port 443', 'udp 100-200', 'well-known'):
+        query = ports.parse_query(query_text)
+        bench.measure(f"PortIndex items ({query_text})",
+                      lambda: port_index.items(query), calls=100)
+
+    # Item filters: the first use of a term builds its bitmap, switching between filters after that is bitwise.
+    filter_texts = ('strict length>=4', 'multi or prefix:a', 'not strict and length<4 or missed')
+    bench.measure('item filter (new bitmaps)', lambda: [
+        a_session.set_item_filter(filters.parse_filter(text)) for text in filter_texts])
+    bench.measure('item filter (switch)', lambda: [
+        a_session.set_item_filter(filters.parse_filter(text)) for text in filter_texts], calls=10)
+    a_session.set_item_filter(None)
+
+    # Typed answers: random meanings, each typed with one character missing, graded on every keystroke.
+    bench.measure('build_answer_key', a_session.build_answer_key)
+    a_session.set_typed_mode(True)
+    typed_answers = []
+    while len(typed_answers) < keystrokes:
+        values = rng.choice(a_session.all_items)[a_session.ITEM_VALUES]
+        value = rng.choice(values)
+        typo_at = rng.randrange(len(value))
+        value = value[:typo_at] + value[typo_at + 1:]
+        typed_answers += [(value[:length], values) for length in range(1, len(value) + 1)]
+    typed_iter = iter(typed_answers * 2)
+    bench.measure('grade typed answer', lambda: a_session.answer_key.grade(
+        *next(typed_iter)), calls=keystrokes)
+    a_session.set_typed_mode(False)
+
+    # Mark about one in ten items incorrect, then move around in review mode.
+    for index in rng.sample(range(len(a_session.results)), len(a_session.results) // 10 or 1):
+        a_session.results.set(index, a_session.INCORRECT)
+    a_session.set_review_mode(True)
+    bench.measure('review next_item', a_session.next_item, calls=moves)
+    bench.measure('review prev_item', a_session.prev_item, calls=moves)
+    bench.measure('show_score', a_session.score_text, calls=moves)
+
+    # Spaced repetition: every Next reschedules a card and takes the next one off the heap.
+    a_session.set_review_mode(False)
+    a_session.set_spaced_mode(True)
+    bench.measure('spaced next_item', a_session.next_item, calls=moves)
+
+    # Answer history: answers go on the writer queue, then a query waits for them to be written.
+    a_session.set_spaced_mode(False)
+    with tempfile.TemporaryDirectory() as history_folder:
+        a_session.progress = progress.ProgressStore(
+            os.path.join(history_folder, progress.PROGRESS_FILE))
+        a_session.set_answer(a_session.INCORRECT)
+        bench.measure('next_item (logging answers)', a_session.next_item, calls=moves)
+        bench.measure('progress missed_keys', a_session.progress.missed_keys)
+        a_session.progress.close()
+        a_session.progress = None
+
+        # Session snapshot: the first save ranks the item order, later ones reuse it.
+        snapshots = snapshot.SnapshotFile(os.path.join(history_folder, snapshot.SNAPSHOT_FILE))
+        bench.measure('snapshot save (new order)', lambda: snapshot.SnapshotFile(snapshots.path).save(a_session))
+        bench.measure('snapshot save', lambda: (a_session.next_item(), snapshots.save(a_session)), calls=10)
+        saved = snapshots.read()
+        bench.measure('restore_snapshot', lambda: session.Session().restore_snapshot(saved, raw_rows_by_file))
+    return bench.results
+
+
+def startup_report(module='test_acronyms', runs=5, top=15):
+    '''
+        Return (total microseconds, [(cumulative microseconds, depth, imported module), ...] slowest first) for importing module, best of runs.
+    '''
+    best = {}
+    for _ in range(runs):
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                                   capture_output=True, text=True, check=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+        for line in completed.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _self_time, cumulative_time, name = line[len('import time:'):].split('|')
+            depth = (len(name) - len(name.lstrip())) // 2
+            key = (depth, name.strip())
+            best[key] = min(best.get(key, float('inf')), int(cumulative_time))
+    total = best.pop((0, module))
+    slowest = sorted(((time_us, depth, name) for (depth, name), time_us in best.items()),
+                     reverse=True)
+    return total, slowest[:top]
+
+
+def compare(results, baseline, tolerance):
+    '''
+        Return a list of (size, operation, seconds, baseline seconds) for operations slower than the baseline by more than tolerance.
+    '''
+    regressions = []
+    for size, operations in results['results'].items():
+        for operation, result in operations.items():
+            base_result = baseline.get('results', {}).get(size, {}).get(operation)
+            if base_result and result['seconds_per_call'] > base_result['seconds_per_call'] * (1 + tolerance):
+                regressions.append(
+                    (size, operation, result['seconds_per_call'], base_result['seconds_per_call']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the Acronym Tester hot paths on synthetic decks.')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"comma separated deck sizes, e.g. 1k,100k,1m (default: {DEFAULT_SIZES})")
+    parser.add_argument('--duplicate-keys', type=float, default=0.1,
+                        help='ratio of rows that add a meaning to an earlier acronym')
+    parser.add_argument('--duplicate-values', type=float, default=0.05,
+                        help='ratio of rows that repeat an earlier row')
+    parser.add_argument('--strict', type=float, default=0.8,
+                        help='ratio of strict rows')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--formats', default='csv',
+                        help='comma separated deck formats to compare parsing, e.g. csv,json,jsonl (default: csv)')
+    parser.add_argument('--no-memory', action='store_true',
+                        help='skip the tracemalloc peak memory runs')
+    parser.add_argument('--output', default='bench_results.json',
+                        help='where to write the JSON results')
+    parser.add_argument('--baseline',
+                        help='JSON results to compare against')
+    parser.add_argument('--save-baseline', metavar='FILE',
+                        help='also write the results to this baseline file')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed slowdown against the baseline, 0.25 = 25%%')
+    parser.add_argument('--startup-report', action='store_true',
+                        help='report the import time of the app instead of running the benchmarks')
+    args = parser.parse_args(argv)
+
+    if args.startup_report:
+        total, slowest = startup_report()
+        print(f"import test_acronyms: {total / 1000:.1f}ms (best of 5)")
+        for time_us, depth, name in slowest:
+            print(f"  {time_us / 1000:8.1f}ms  {'  ' * depth}{name}")
+        return 0
+
+    os.makedirs(DECK_FOLDER, exist_ok=True)
+    results = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'duplicate_keys': args.duplicate_keys,
+            'duplicate_values': args.duplicate_values,
+            'strict': args.strict,
+            'seed': args.seed,
+        },
+        'results': {},
+    }
+    for size_text in args.sizes.split(','):
+        rows = parse_size(size_text)
+        file_name = deck_path(rows, args)
+        extensions = ['.csv'] + ['.' + name.strip().lstrip('.') for name in args.formats.split(',')
+                                 if name.strip().lstrip('.') != 'csv']
+        for extension in extensions:
+            if not os.path.exists(file_name + extension):
+                generate_deck(file_name + extension, rows, args.duplicate_keys,
+                              args.duplicate_values, args.strict, args.seed)
+        print(f"{size_text.strip()} rows ({file_name}.csv)")
+        results['results'][size_text.strip()] = run_deck(
+            file_name, random.Random(args.seed), not args.no_memory, extensions)
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        for size, operation, seconds, base_seconds in regressions:
+            print(f"REGRESSION {size} {operation}: {seconds * 1e6:.1f}us/call, baseline {base_seconds * 1e6:.1f}us/call")
+        if regressions:
+            return 1
+        print('No regressions against', args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
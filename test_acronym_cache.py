@@ -0,0 +1,143 @@
+import marshal
+import mmap
+import os
+import struct
+import threading
+
+import test_acronym_formats as formats
+import test_acronym_timing as timing
+
+'''
+    Compiled deck cache. Parsing a deck and sorting it is the slowest part of every Reload, deck toggle and strict mode toggle. Each deck source file (any format in test_acronym_formats) is compiled once into a compact binary file stored next to it, e.g. 'A+ acronyms.csv' -> 'A+ acronyms.csv.deckcache'.
+
+    A compiled file is a fixed header followed by the raw rows, marshalled in chunks of CHUNK_ROWS rows, each chunk prefixed with its byte length:
+        (itemkey, itemvalue, itemlink, strict)
+    Unmarshalling one huge tuple holds the GIL for seconds on large decks; chunks let a window keep drawing while a loader thread reads the cache.
+
+    The rows are already sorted by itemkey and itemvalue (case-insensitive, the same order load_and_sort has always produced), and exact duplicate rows are already removed. Rows without a strict column get an empty strict value.
+
+    The header records the source file's mtime and size, and a SHA-1 of its content. When the mtime and size still match, the compiled file is trusted without reading the source, and csv, json and hashlib are never imported. When they differ, the source is hashed; if the content is unchanged (e.g. the file was only touched) the compiled rows are reused and the header is refreshed, otherwise the source is compiled again.
+'''
+
+CACHE_SUFFIX = '.deckcache'
+CACHE_MAGIC = b'ATDK'
+CACHE_VERSION = 3
+# magic, version, source mtime_ns, source size, source sha1, row count
+CACHE_HEADER = struct.Struct('<4sHxxqq20sI')
+CHUNK_HEADER = struct.Struct('<I')
+CHUNK_ROWS = 4096
+
+RAW_FIELDS = formats.RAW_FIELDS
+
+
+def cache_path(source_path):
+    return source_path + CACHE_SUFFIX
+
+
+@timing.timed('load_deck')
+def load_deck(deck_name):
+    '''
+        Return the raw row tuples of a deck named without extension, from whichever format it ships in (see test_acronym_formats).
+    '''
+    source_path = formats.find_source(deck_name)
+    if source_path is None:
+        raise FileNotFoundError(f"No deck file for {deck_name!r}")
+    return load_rows(source_path)
+
+
+def load_rows(source_path):
+    '''
+        Return a tuple of raw row tuples for one deck source file, compiling or refreshing its cache file when needed.
+    '''
+    source_stat = os.stat(source_path)
+    header, rows = read_cache(cache_path(source_path))
+    if header is not None and header[2:4] == (source_stat.st_mtime_ns, source_stat.st_size):
+        return rows
+
+    import hashlib
+    with open(source_path, 'rb') as source_file:
+        data = source_file.read()
+    digest = hashlib.sha1(data).digest()
+    if header is None or header[4] != digest:
+        rows = compile_rows(source_path, data)
+    write_cache(cache_path(source_path), source_stat, digest, rows)
+    return rows
+
+
+def deck_digest(deck_name):
+    '''
+        Return the SHA-1 of a deck's source content, read from its compiled file header when that is current, otherwise by hashing the source. None if the deck has no file.
+    '''
+    source_path = formats.find_source(deck_name)
+    if source_path is None:
+        return None
+    source_stat = os.stat(source_path)
+    try:
+        with open(cache_path(source_path), 'rb') as cache_file:
+            header = CACHE_HEADER.unpack(cache_file.read(CACHE_HEADER.size))
+        if header[:4] == (CACHE_MAGIC, CACHE_VERSION, source_stat.st_mtime_ns, source_stat.st_size):
+            return header[4]
+    except (OSError, struct.error):
+        pass
+    import hashlib
+    with open(source_path, 'rb') as source_file:
+        return hashlib.sha1(source_file.read()).digest()
+
+
+def compile_rows(source_path, data):
+    '''
+        Parse raw bytes of a deck source file into sorted, de-duplicated row tuples.
+    '''
+    # utf-8-sig: spreadsheet exports often start with a byte order mark.
+    text = data.decode('utf-8-sig')
+    # Rows stream from the format reader straight into the de-duplicating dict.
+    unique_rows = dict.fromkeys(formats.read_rows(source_path, text))
+    return tuple(sorted(unique_rows, key=lambda row: (row[0].lower(), row[1].lower())))
+
+
+def read_cache(path):
+    '''
+        Return (header, rows) from a compiled file, or (None, None) if it is missing, stale in format, or unreadable.
+    '''
+    try:
+        with open(path, 'rb') as cache_file:
+            with mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                header = CACHE_HEADER.unpack_from(mapped)
+                if header[0] != CACHE_MAGIC or header[1] != CACHE_VERSION:
+                    return None, None
+                rows = []
+                offset = CACHE_HEADER.size
+                with memoryview(mapped) as view:
+                    while offset < len(view):
+                        chunk_size, = CHUNK_HEADER.unpack_from(view, offset)
+                        offset += CHUNK_HEADER.size
+                        with view[offset:offset + chunk_size] as chunk:
+                            rows.extend(marshal.loads(chunk))
+                        offset += chunk_size
+                rows = tuple(rows)
+    except (OSError, ValueError, EOFError, TypeError, struct.error):
+        return None, None
+    if len(rows) != header[5]:
+        return None, None
+    return header, rows
+
+
+def write_cache(path, source_stat, digest, rows):
+    header = CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, source_stat.st_mtime_ns,
+                               source_stat.st_size, digest, len(rows))
+    # Loads on worker threads can compile the same deck at once; each writes its own temp file.
+    temp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'wb') as cache_file:
+            cache_file.write(header)
+            for start in range(0, len(rows), CHUNK_ROWS):
+                chunk = marshal.dumps(rows[start:start + CHUNK_ROWS])
+                cache_file.write(CHUNK_HEADER.pack(len(chunk)))
+                cache_file.write(chunk)
+        os.replace(temp_path, path)
+    except OSError:
+        # A read-only deck folder just means no cache; the rows are still good.
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
@@ -0,0 +1,272 @@
+import argparse
+import random
+import sys
+import time
+
+import test_acronym_filters as filters
+import test_acronym_formats as formats
+import test_acronym_ports as ports
+import test_acronym_progress as progress
+import test_acronym_schedule as schedule
+import test_acronym_session as session
+import test_acronym_snapshot as snapshot
+
+'''
+    Terminal driver for a headless Session. It runs scripted sessions, one command per line, from a file or stdin:
+
+        python3 test_acronym_cli.py --deck 'A+ acronyms' --script commands.txt
+        echo 'next 3' | python3 test_acronym_cli.py
+
+    It can also run many simulated sessions back to back to measure throughput on machines without a display:
+
+        python3 test_acronym_cli.py --simulate 5000 --answers 50 --miss-rate 0.2
+
+    With --snapshot FILE a script picks up where the last one saved with that file left off, and saves the session there when it ends (see test_acronym_snapshot). The snapshot's decks and settings replace --deck, --strict, --length and --spaced.
+
+    Commands:
+        next [n], prev [n]        move, recording the pending answer like the Next button
+        show                      print the expanded text of the current item, or its acronym(s) in reverse mode
+        right, wrong, toggle      set the pending answer for the current item
+        type text                 type the expanded text: graded as the pending answer, typos allowed
+        review on|off             review mode
+        spaced on|off             spaced repetition mode
+        reverse on|off            show the expanded text and ask for the acronym; find then searches expansions by word
+        history [days]            acronyms missed in the last days (default 7), with --progress
+        hardest [n]               review the n (default 20) hardest acronyms in the answer history, with --progress; needs NumPy (test_acronym_analytics)
+        length n                  only acronyms of length n, 0 for all
+        ports query, ports off    only acronyms naming the ports in query ('port 443', 'udp', 'ports 20-25', 'well-known')
+        filter expr, filter off   only acronyms matching a test_acronym_filters expression, e.g. deck:network+ strict length>=4 missed
+        deck +name, deck -name    add or remove a deck
+        strict on|off             strict mode
+        find text                 manual entry lookup with completions; a port query lists the acronyms naming those ports
+        score, status             print the score or the current position
+        reload, shuffle           reload all decks, or start over in a new order
+        quit
+    Lines starting with # are ignored.
+'''
+
+
+def default_decks():
+    return [file_name for file_name in session.Session.ALL_CSV_FILES
+            if formats.find_source(file_name) is not None]
+
+
+def status_text(a_session):
+    item = a_session.current_item
+    key = item[a_session.ITEM_KEY] if item else '-'
+    if item and a_session.reverse_mode:
+        key = ' / '.join(item[a_session.ITEM_VALUES])
+    review = '  review' if a_session.review_mode else ''
+    if a_session.spaced_mode:
+        review += f"  {a_session.schedule_text()}"
+    return f"{a_session.current_item_index + 1}/{len(a_session.active_items)}  {key}{review}"
+
+
+def run_command(a_session, line, out=None):
+    '''
+        Run one script command. Returns False when the script should stop.
+    '''
+    words = line.split(maxsplit=1)
+    if not words or words[0].startswith('#'):
+        return True
+    command = words[0].lower()
+    argument = words[1].strip() if len(words) > 1 else ''
+
+    match command:
+        case 'next' | 'prev':
+            move = a_session.next_item if command == 'next' else a_session.prev_item
+            for _ in range(int(argument or 1)):
+                move()
+            print(status_text(a_session), file=out)
+        case 'show':
+            item = a_session.current_item
+            if item and a_session.reverse_mode:
+                print(' / '.join(answer[a_session.ITEM_KEY]
+                                 for answer in a_session.reverse_answers()), file=out)
+            else:
+                print(' / '.join(item[a_session.ITEM_VALUES])
+                      if item else '-', file=out)
+        case 'right':
+            a_session.set_answer(a_session.CORRECT)
+        case 'wrong':
+            a_session.set_answer(a_session.INCORRECT)
+        case 'toggle':
+            a_session.toggle_answer()
+        case 'type':
+            grade = a_session.answer_typed(argument)
+            print(grade.text() or 'No answer', file=out)
+        case 'review':
+            a_session.set_review_mode(argument != 'off')
+            print(status_text(a_session), file=out)
+        case 'spaced':
+            a_session.set_spaced_mode(argument != 'off')
+            print(status_text(a_session), file=out)
+        case 'reverse':
+            a_session.set_reverse_mode(argument != 'off')
+            print(status_text(a_session), file=out)
+        case 'length':
+            a_session.set_acronym_length(int(argument or 0))
+            print(status_text(a_session), file=out)
+        case 'ports':
+            query = ports.parse_query(argument) if argument != 'off' else None
+            if argument != 'off' and query is None:
+                print(f"not a port query: {argument}", file=sys.stderr)
+            else:
+                a_session.set_port_filter(query)
+                print(status_text(a_session), file=out)
+        case 'filter':
+            try:
+                item_filter = filters.parse_filter(argument) if argument != 'off' else None
+            except filters.FilterError as error:
+                print(f"bad filter: {error}", file=sys.stderr)
+            else:
+                a_session.set_item_filter(item_filter)
+                print(status_text(a_session), file=out)
+        case 'deck':
+            a_session.enable_csv_file(argument[1:], argument[:1] != '-')
+            print(status_text(a_session), file=out)
+        case 'strict':
+            a_session.set_strict_mode(argument != 'off')
+            print(status_text(a_session), file=out)
+        case 'find':
+            item, completions = a_session.manual_entry(argument)
+            a_session.set_manual_entry_mode(False)
+            found = ' / '.join(item[a_session.ITEM_VALUES]) if item else '-'
+            if item and a_session.reverse_mode:
+                found = f"{item[a_session.ITEM_KEY]}: {found}"
+            keys = ' '.join(completion[a_session.ITEM_KEY]
+                            for completion in completions)
+            print(f"{found}  [{keys}]", file=out)
+        case 'history':
+            if a_session.progress is None:
+                print('no answer history, run with --progress FILE', file=sys.stderr)
+            else:
+                missed_keys = a_session.progress.missed_keys(
+                    int(argument or a_session.HISTORY_DAYS))
+                print(f"{len(missed_keys)} missed: {' '.join(sorted(missed_keys))}", file=out)
+        case 'hardest':
+            import test_acronym_analytics as analytics
+            if a_session.progress is None:
+                print('no answer history, run with --progress FILE', file=sys.stderr)
+                return True
+            try:
+                report = analytics.analyze_history(a_session.progress, top=int(argument or 20))
+            except analytics.AnalyticsError as error:
+                print(error, file=sys.stderr)
+            else:
+                a_session.review_keys(report.hardest_keys)
+                print(f"{len(report.hardest)} hardest: {' '.join(report.hardest_keys)}", file=out)
+                print(status_text(a_session), file=out)
+        case 'score':
+            print(a_session.score_text(), file=out)
+        case 'status':
+            print(status_text(a_session), file=out)
+        case 'reload':
+            a_session.start_test()
+            print(status_text(a_session), file=out)
+        case 'shuffle':
+            a_session.shuffle()
+            print(status_text(a_session), file=out)
+        case 'quit' | 'exit':
+            return False
+        case _:
+            print(f"unknown command: {command}", file=sys.stderr)
+    return True
+
+
+def run_script(a_session, lines, out=None):
+    for line in lines:
+        if not run_command(a_session, line, out):
+            break
+
+
+def simulate(a_session, session_count, answers, miss_rate, rng):
+    '''
+        Run session_count simulated sessions over the already loaded decks: answer up to answers items, missing each with probability miss_rate, then review the misses until none are left. Returns the number of answers given.
+    '''
+    answer_count = 0
+    for _ in range(session_count):
+        a_session.shuffle()
+        for _ in range(min(answers, len(a_session.active_items))):
+            if rng.random() < miss_rate:
+                a_session.set_answer(a_session.INCORRECT)
+            a_session.next_item()
+            answer_count += 1
+        a_session.set_review_mode(True)
+        while a_session.review_mode:
+            a_session.set_answer(a_session.CORRECT)
+            a_session.next_item()
+            answer_count += 1
+    return answer_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run Acronym Tester sessions without a display.')
+    parser.add_argument('--deck', action='append', dest='decks',
+                        help='deck name without extension (.csv, .json or .jsonl); repeat for several decks (default: all shipped decks)')
+    parser.add_argument('--strict', action='store_true',
+                        help='strict mode: only official CompTIA acronyms')
+    parser.add_argument('--length', type=int, default=0,
+                        help='only acronyms of this length')
+    parser.add_argument('--spaced', action='store_true',
+                        help='spaced repetition mode')
+    parser.add_argument('--schedule', metavar='FILE',
+                        help='spaced repetition schedule to read and save (default: kept in memory)')
+    parser.add_argument('--progress', metavar='FILE',
+                        help='answer history database to log to; review mode also brings back its recent misses')
+    parser.add_argument('--snapshot', metavar='FILE',
+                        help='resume the session saved in this file, and save it there at the end')
+    parser.add_argument('--seed', type=int,
+                        help='random seed for a repeatable order')
+    parser.add_argument('--script', type=argparse.FileType('r'),
+                        help='file of commands to run (default: stdin)')
+    parser.add_argument('--simulate', type=int, metavar='SESSIONS',
+                        help='run this many simulated sessions and report throughput')
+    parser.add_argument('--answers', type=int, default=50,
+                        help='answers per simulated session')
+    parser.add_argument('--miss-rate', type=float, default=0.2,
+                        help='chance of a wrong answer in a simulated session')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    a_session = session.Session(
+        args.decks or default_decks(), args.strict, rng,
+        schedule.Scheduler(args.schedule) if args.schedule else None,
+        progress.ProgressStore(args.progress) if args.progress else None)
+    snapshots = snapshot.SnapshotFile(args.snapshot) if args.snapshot else None
+    saved = snapshots.read() if snapshots else None
+    if saved is not None:
+        if not a_session.restore_snapshot(saved):
+            print('decks changed since the snapshot, starting over', file=sys.stderr)
+    else:
+        a_session.start_test()
+        if args.length:
+            a_session.set_acronym_length(args.length)
+        if args.spaced:
+            a_session.set_spaced_mode(True)
+
+    if args.simulate:
+        started = time.perf_counter()
+        answer_count = simulate(a_session, args.simulate,
+                                args.answers, args.miss_rate, rng)
+        elapsed = time.perf_counter() - started
+        print(f"{args.simulate} sessions, {answer_count} answers, {len(a_session.all_items)} items in {elapsed:.3f}s: "
+              f"{args.simulate / elapsed:.0f} sessions/s, {answer_count / elapsed:.0f} answers/s")
+        if a_session.progress is not None:
+            a_session.progress.close()
+        return 0
+
+    run_script(a_session, args.script or sys.stdin)
+    if args.script:
+        args.script.close()
+    a_session.scheduler.save()
+    if snapshots is not None:
+        snapshots.save(a_session)
+    if a_session.progress is not None:
+        a_session.progress.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,15 @@
+import threading
 import tkinter as tk
 
+import test_acronym_timing as timing
+
 
 class DebugWindow(tk.Toplevel):
+    # How often to check on a lint or analytics report in progress.
+    REPORT_POLL_MS = 100
+    # How often the timings panel refreshes while recording.
+    TIMINGS_REFRESH_MS = 500
+
     def __init__(self, master, all_csv_file_names, current_cvs_file_names, enable_csv_file, current_strict_mode, set_strict_mode):
         super().__init__()
 
@@ -13,18 +21,25 @@ class DebugWindow(tk.Toplevel):
 
         # set window size and near to master window
         window_width = 500
-        window_height = 200
+        window_height = 600
         window_ul_x = master.winfo_rootx()
         window_ul_y = master.winfo_rooty() - 300
         self.geometry(f"{window_width}x{
                       window_height}+{window_ul_x}+{window_ul_y}")
 
         # Column 0
-        tk.Button(self, text='Print Duplicate Acronyms',
-                  command=self.print_duplicate_acronyms).grid(row=0, column=0)
-
-        tk.Button(self, text='Print Trailing Spaces',
-                  command=self.print_trailing_spaces).grid(row=1, column=0)
+        tk.Button(self, text='Lint Decks',
+                  command=self.lint_decks).grid(row=0, column=0)
+
+        # Study analytics over the answer history (test_acronym_analytics)
+        analytics_bar = tk.Frame(self)
+        tk.Button(analytics_bar, text='Study Analytics',
+                  command=self.study_analytics).pack(side=tk.LEFT)
+        self.review_hardest_btn = tk.Button(analytics_bar, text='Review Hardest',
+                                            command=self.review_hardest, state=tk.DISABLED)
+        self.review_hardest_btn.pack(side=tk.LEFT)
+        analytics_bar.grid(row=1, column=0)
+        self.hardest_keys = []
 
         strict_mode_cb = tk.Checkbutton(self, text='Strict Mode')
         strict_mode_cb.bind('<ButtonRelease>', self.strict_mode_checked)
@@ -42,6 +57,25 @@ class DebugWindow(tk.Toplevel):
             is_current = file_name in current_cvs_file_names
             btn.select() if is_current else btn.deselect()
 
+        # Below both columns: the lint report
+        self.report_text = tk.Text(self, width=70, height=14, wrap=tk.NONE)
+        report_row = max(3, len(all_csv_file_names))
+        self.report_text.grid(row=report_row, column=0, columnspan=2)
+
+        # Below the report: hot path timings (test_acronym_timing)
+        timings_bar = tk.Frame(self)
+        self.record_timings_var = tk.BooleanVar(value=timing.recorder.enabled)
+        tk.Checkbutton(timings_bar, text='Record Timings', variable=self.record_timings_var,
+                       command=self.toggle_timings).pack(side=tk.LEFT)
+        tk.Button(timings_bar, text='Clear', command=self.clear_timings).pack(side=tk.LEFT)
+        tk.Button(timings_bar, text='Save JSON', command=self.save_timings).pack(side=tk.LEFT)
+        tk.Button(timings_bar, text='Save Trace', command=self.save_trace).pack(side=tk.LEFT)
+        timings_bar.grid(row=report_row + 1, column=0, columnspan=2, sticky='w')
+        self.timings_text = tk.Text(self, width=70, height=12, wrap=tk.NONE)
+        self.timings_text.grid(row=report_row + 2, column=0, columnspan=2)
+        self.timings_refresh_id = None
+        self.refresh_timings()
+
         # When the user closes this window, tell our owner.
         self.protocol('WM_DELETE_WINDOW', master.toggle_debug_mode)
 
@@ -61,27 +95,95 @@ class DebugWindow(tk.Toplevel):
             event.widget.cget('variable'))
         self.set_strict_mode(use_strict_mode)
 
-    def print_duplicate_acronyms(self):
-        print('print_duplicate_acronyms')
-        all_sorted = sorted(self.master.all_items,
-                            key=lambda item: item['itemkey'])
-        for item in all_sorted:
-            if len(item['itemvalues']) > 1:
-                print(item)
-
-    def print_trailing_spaces(self):
-        print('print_trailing_spaces')
-        all_sorted = sorted(self.master.all_items,
-                            key=lambda item: item['itemkey'])
-        for item in all_sorted:
-            if item['itemkey'][-1] == ' ':
-                print(item)
-            for value in item['itemvalues']:
-                if value[-1] == ' ':
-                    print(item)
-            for link in item['itemlinks']:
-                if len(link) > 0 and link[-1] == ' ':
-                    print(item)
+    def lint_decks(self):
+        # Lint the checked decks (all decks if none are checked) on a thread, so large decks don't freeze the windows.
+        import test_acronym_lint as lint
+        deck_names = sorted(self.master.current_cvs_files) or None
+        self.run_report('Linting...', lambda: lint.lint_decks(deck_names),
+                        lambda report: self.show_report(report.text() if report else 'Lint failed, see the console'))
+
+    def study_analytics(self):
+        # Analyze the answer history on a thread; a large one takes a second or so.
+        import test_acronym_analytics as analytics
+        progress_store = self.master.session.progress
+        if progress_store is None:
+            self.show_report('No answer history')
+            return
+
+        def analyze():
+            # The report, or what went wrong as text.
+            try:
+                return analytics.analyze_history(progress_store)
+            except analytics.AnalyticsError as error:
+                return str(error)
+        self.run_report('Analyzing...', analyze, self.analytics_done)
+
+    def analytics_done(self, report):
+        if report is None or isinstance(report, str):
+            self.hardest_keys = []
+            self.show_report(report or 'Analytics failed, see the console')
+        else:
+            self.hardest_keys = report.hardest_keys
+            self.show_report(report.text())
+        self.review_hardest_btn.config(state=tk.NORMAL if self.hardest_keys else tk.DISABLED)
+
+    def review_hardest(self):
+        self.master.review_keys(self.hardest_keys)
+
+    def run_report(self, message, work, done):
+        # Run work() on a thread, then done(its result, or None if it raised) back on this one.
+        results = []
+        thread = threading.Thread(target=lambda: results.append(work()), daemon=True)
+        thread.start()
+        self.show_report(message)
+        self.poll_report(thread, results, done)
+
+    def poll_report(self, thread, results, done):
+        if thread.is_alive():
+            self.after(self.REPORT_POLL_MS, self.poll_report, thread, results, done)
+        else:
+            done(results[0] if results else None)
+
+    def show_report(self, text):
+        self.report_text.delete('1.0', tk.END)
+        self.report_text.insert(tk.END, text)
+
+    def toggle_timings(self):
+        timing.recorder.enabled = self.record_timings_var.get()
+        self.refresh_timings()
+
+    def clear_timings(self):
+        timing.recorder.clear()
+        self.refresh_timings()
+
+    def save_timings(self):
+        self.save_timings_with(timing.recorder.save_json)
+
+    def save_trace(self):
+        self.save_timings_with(timing.recorder.save_chrome_trace)
+
+    def save_timings_with(self, save):
+        try:
+            self.show_report(f"Saved {save()}")
+        except OSError as error:
+            self.show_report(f"Could not save timings: {error}")
+
+    def refresh_timings(self):
+        # Redraw the panel now, and every TIMINGS_REFRESH_MS while recording.
+        if self.timings_refresh_id is not None:
+            self.after_cancel(self.timings_refresh_id)
+            self.timings_refresh_id = None
+        self.timings_text.delete('1.0', tk.END)
+        self.timings_text.insert(tk.END, timing.recorder.report())
+        if timing.recorder.enabled:
+            self.timings_refresh_id = self.after(
+                self.TIMINGS_REFRESH_MS, self.refresh_timings)
+
+    def destroy(self):
+        if self.timings_refresh_id is not None:
+            self.after_cancel(self.timings_refresh_id)
+            self.timings_refresh_id = None
+        super().destroy()
 
     def win_evt(self, event):
         match event.keysym:
@@ -0,0 +1,463 @@
+import bisect
+import operator
+
+'''
+    Duplicate acronym merge engine. Raw rows are merged in one streaming pass into a hash index keyed by the case-folded acronym, so there is no need to sort all raw rows first.
+
+    The merged items are identical to what the old sort-then-scan produced:
+        - One item per case-folded itemkey, e.g. 'Kb' and 'KB' are the same acronym.
+        - Equal itemvalues for the same acronym are discarded; the link of the first one is kept.
+        - itemvalues (and their itemlinks) are ordered case-insensitively, ties in load order.
+        - The displayed itemkey is the key of the row with the first itemvalue in that order.
+
+    Items come out in the order their acronym was first seen. Call sorted_items() for the old itemkey order.
+
+    The merger remembers the raw rows of each source (cvs file), and which acronyms have non-strict rows. Adding or removing a source, or flipping strict mode, only rebuilds the acronyms that source or flag touches. Those calls return the items that appeared and disappeared; items whose values changed (e.g. KB losing 'Knowledge Base' when its deck is removed) are updated in place, so lists holding them stay valid.
+
+    Large merged libraries hold hundreds of thousands of items, so an item is a compact Item record rather than a dictionary. Raw rows are the (itemkey, itemvalue, itemlink, strict) tuples loaded from the deck cache, with interned strings, and are shared rather than copied.
+'''
+
+ITEM_KEY = 'itemkey'
+ITEM_VALUES = 'itemvalues'
+ITEM_LINKS = 'itemlinks'
+
+# Raw row tuple layout, as loaded from a deck file.
+ROW_KEY, ROW_VALUE, ROW_LINK, ROW_STRICT = range(4)
+
+
+def _row_order(row):
+    return row[ROW_VALUE].lower()
+
+
+_FOLDED_KEY = operator.attrgetter('folded_key')
+
+
+def _row_folded_key(row):
+    return row[ROW_KEY].lower()
+
+
+class Item:
+    '''
+        One merged acronym. It reads like the dictionaries it replaces:
+            item['itemkey'], item['itemvalues'], item['itemlinks']
+        itemvalues and itemlinks are tuples read from the item's active rows, which are worked out when the item is rebuilt. When every row is active, as for a single-row item, they share the rows tuple, so the item stores nothing but its rows.
+
+        key is None while no row is active (e.g. every row is non-strict in strict mode). position and length_slot belong to whoever holds the item in a list (Session.all_items and LengthIndex), so removing an item needs no search.
+    '''
+    __slots__ = ('key', 'folded_key', 'rows', 'active', 'strict_only',
+                 'position', 'length_slot')
+
+    _FIELDS = {
+        ITEM_KEY: operator.attrgetter('key'),
+        ITEM_VALUES: operator.attrgetter('values'),
+        ITEM_LINKS: operator.attrgetter('links'),
+    }
+
+    def __init__(self, folded_key):
+        self.key = None
+        self.folded_key = folded_key
+        self.rows = ()  # every raw row for this acronym, in value order
+        self.active = ()  # the first active row of each distinct value
+        self.strict_only = False  # only strict rows are active
+        self.position = -1
+        self.length_slot = -1
+
+    def __getitem__(self, field):
+        return self._FIELDS[field](self)
+
+    def __len__(self):
+        return len(self._FIELDS)
+
+    def __repr__(self):
+        return repr({ITEM_KEY: self.key, ITEM_VALUES: list(self.values), ITEM_LINKS: list(self.links)})
+
+    def active_rows(self):
+        return self.active
+
+    @property
+    def values(self):
+        return tuple(row[ROW_VALUE] for row in self.active)
+
+    @property
+    def links(self):
+        return tuple(row[ROW_LINK] for row in self.active)
+
+
+class DeckMerger:
+    def __init__(self, strict_mode=False):
+        self.strict_mode = strict_mode
+        self._entries = {}
+        # source name -> its raw rows
+        self._source_rows = {}
+        # items with at least one non-strict row
+        self._loose_items = set()
+
+    def __len__(self):
+        return sum(1 for item in self._entries.values() if item.key is not None)
+
+    def add_row(self, row):
+        '''
+            Merge one raw row tuple. Returns the new item if this row made a new acronym appear, otherwise None.
+        '''
+        return self._add_rows(row[ROW_KEY].lower(), [row])
+
+    def add_source(self, source, rows):
+        '''
+            Merge the raw row tuples (itemkey, itemvalue, itemlink, strict) of one source. Returns (added_items, removed_items).
+            The rows are grouped by acronym first, so each acronym is sorted and rebuilt once however many rows it gets.
+        '''
+        if source in self._source_rows:
+            self.remove_source(source)
+        self._source_rows[source] = rows
+        added_items = []
+        for folded_key, key_rows in _group_rows(rows).items():
+            item = self._add_rows(folded_key, key_rows)
+            if item is not None:
+                added_items.append(item)
+        return added_items, []
+
+    def remove_source(self, source):
+        '''
+            Forget every row of one source. Returns (added_items, removed_items).
+        '''
+        removed_items = []
+        for folded_key, key_rows in _group_rows(self._source_rows.pop(source, ())).items():
+            item = self._entries.get(folded_key)
+            if item is None:
+                continue
+            # Rows are matched by identity; an equal row from another source stays.
+            row_ids = set(map(id, key_rows))
+            item.rows = tuple(
+                other_row for other_row in item.rows if id(other_row) not in row_ids)
+            if all(other_row[ROW_STRICT] == 'true' for other_row in item.rows):
+                self._loose_items.discard(item)
+            was_active = item.key is not None
+            self._rebuild(item)
+            if was_active and item.key is None:
+                removed_items.append(item)
+            if not item.rows:
+                del self._entries[item.folded_key]
+        return [], removed_items
+
+    def set_strict_mode(self, strict_mode):
+        '''
+            Only acronyms with non-strict rows can change. Returns (added_items, removed_items).
+        '''
+        if strict_mode == self.strict_mode:
+            return [], []
+        self.strict_mode = strict_mode
+        added_items = []
+        removed_items = []
+        for item in self._loose_items:
+            was_active = item.key is not None
+            self._rebuild(item)
+            if not was_active and item.key is not None:
+                added_items.append(item)
+            elif was_active and item.key is None:
+                removed_items.append(item)
+        return added_items, removed_items
+
+    def sources(self):
+        return list(self._source_rows)
+
+    def source_rows(self, source):
+        return self._source_rows.get(source, ())
+
+    def items(self):
+        return [item for item in self._entries.values() if item.key is not None]
+
+    def sorted_items(self):
+        return [self._entries[folded_key] for folded_key in sorted(self._entries)
+                if self._entries[folded_key].key is not None]
+
+    def find(self, key):
+        item = self._entries.get(key.lower())
+        return item if item is not None and item.key is not None else None
+
+    def source_of(self, item):
+        '''
+            The first source, in load order, with a row for this acronym, or None. Each source's rows must be sorted by case-folded key, as test_acronym_cache loads them, so this is one bisect per source.
+        '''
+        for source, rows in self._source_rows.items():
+            index = bisect.bisect_left(
+                rows, item.folded_key, key=_row_folded_key)
+            if index < len(rows) and _row_folded_key(rows[index]) == item.folded_key:
+                return source
+        return None
+
+    def _add_rows(self, folded_key, rows):
+        # Merge the rows of one acronym. Returns the item if it just appeared, otherwise None.
+        item = self._entries.get(folded_key)
+        if item is None:
+            item = self._entries[folded_key] = Item(folded_key)
+        # A stable sort: equal values keep their load order, earlier rows first.
+        item.rows = tuple(sorted(item.rows + tuple(rows), key=_row_order))
+        if item not in self._loose_items and any(row[ROW_STRICT] != 'true' for row in rows):
+            self._loose_items.add(item)
+        was_active = item.key is not None
+        self._rebuild(item)
+        return item if not was_active and item.key is not None else None
+
+    def _rebuild(self, item):
+        # The first active row of each distinct value; duplicate value/link are discarded. The displayed itemkey comes from the first one.
+        item.strict_only = self.strict_mode
+        active = []
+        values = set()
+        for row in item.rows:
+            if self.strict_mode and row[ROW_STRICT] != 'true':
+                continue
+            if row[ROW_VALUE] not in values:
+                values.add(row[ROW_VALUE])
+                active.append(row)
+        item.active = item.rows if len(active) == len(item.rows) else tuple(active)
+        item.key = active[0][ROW_KEY] if active else None
+
+
+def _group_rows(rows):
+    # folded key -> that acronym's rows, in load order
+    groups = {}
+    for row in rows:
+        groups.setdefault(row[ROW_KEY].lower(), []).append(row)
+    return groups
+
+
+class LengthIndex:
+    '''
+        Items bucketed by acronym length. Built once with the item list, then kept in step as items are added and removed, so the length menu and length filter never rescan the list. Each item remembers its slot in its bucket.
+    '''
+
+    def __init__(self, items=()):
+        self._buckets = {}
+        self._count = 0
+        for item in items:
+            self.add(item)
+
+    def __len__(self):
+        return self._count
+
+    def add(self, item):
+        bucket = self._buckets.setdefault(len(item.folded_key), [])
+        item.length_slot = len(bucket)
+        bucket.append(item)
+        self._count += 1
+
+    def remove(self, item):
+        length = len(item.folded_key)
+        bucket = self._buckets[length]
+        last_item = bucket.pop()
+        if last_item is not item:
+            bucket[item.length_slot] = last_item
+            last_item.length_slot = item.length_slot
+        if not bucket:
+            del self._buckets[length]
+        self._count -= 1
+
+    def counts(self):
+        '''
+            Return [(length, item count), ...] sorted by length. Length 0 means all lengths.
+        '''
+        return [(0, self._count)] + sorted((length, len(bucket)) for length, bucket in self._buckets.items())
+
+    def items(self, length):
+        return self._buckets.get(length, ())
+
+
+class KeyIndex:
+    '''
+        Case-insensitive lookup of items by acronym. The items of each acronym length are kept in a list sorted by case-folded acronym, so an exact match is one bisect, and all acronyms with a given prefix sit next to each other: completions are one bisect per length, shortest acronyms first. A lookup limited to one length (the length menu) only searches that list. Kept in step as items are added and removed.
+    '''
+
+    def __init__(self, items=()):
+        self._sorted_items = {}  # key length -> items sorted by case-folded key
+        self._count = 0
+        for item in items:
+            self._sorted_items.setdefault(
+                len(item.folded_key), []).append(item)
+            self._count += 1
+        for length_items in self._sorted_items.values():
+            length_items.sort(key=_FOLDED_KEY)
+
+    def __len__(self):
+        return self._count
+
+    def add(self, item):
+        bisect.insort(self._sorted_items.setdefault(
+            len(item.folded_key), []), item, key=_FOLDED_KEY)
+        self._count += 1
+
+    def remove(self, item):
+        length_items = self._sorted_items.get(len(item.folded_key), [])
+        index = bisect.bisect_left(
+            length_items, item.folded_key, key=_FOLDED_KEY)
+        if index < len(length_items) and length_items[index] is item:
+            del length_items[index]
+            self._count -= 1
+            if not length_items:
+                del self._sorted_items[len(item.folded_key)]
+
+    def find(self, key, length=0):
+        '''
+            Return the item with this acronym, ignoring case, or None. A non-zero length only matches acronyms of that length.
+        '''
+        if length and len(key) != length:
+            return None
+        folded_key = key.lower()
+        length_items = self._sorted_items.get(len(folded_key), ())
+        index = bisect.bisect_left(length_items, folded_key, key=_FOLDED_KEY)
+        if index < len(length_items) and length_items[index].folded_key == folded_key:
+            return length_items[index]
+        return None
+
+    def complete(self, prefix, length=0, limit=8):
+        '''
+            Return up to limit items whose acronym starts with prefix, ignoring case. Shorter acronyms rank first, then alphabetical.
+        '''
+        folded_prefix = prefix.lower()
+        completions = []
+        lengths = [length] if length else sorted(self._sorted_items)
+        for key_length in lengths:
+            if key_length < len(folded_prefix):
+                continue
+            length_items = self._sorted_items.get(key_length, ())
+            index = bisect.bisect_left(
+                length_items, folded_prefix, key=_FOLDED_KEY)
+            while index < len(length_items) and len(completions) < limit and length_items[index].folded_key.startswith(folded_prefix):
+                completions.append(length_items[index])
+                index += 1
+            if len(completions) == limit:
+                break
+        return completions
+
+
+class ValueIndex:
+    '''
+        Inverted index from the words of itemvalues to acronyms, to search expansions by word: 'authentication' finds AAA, EAP, MFA and the rest. Words are those of test_acronym_answers.words, so case, punctuation and 'and' don't count.
+
+        It indexes raw rows, not merged items, so add_rows() and remove_rows() follow decks as the merger adds and removes them, and items whose values change in place need nothing. Each word maps to the case-folded acronyms with a row using it, with a count of those rows. A search intersects the postings of its words, smallest first. The last word may be cut short: the words starting with it are a range of the sorted words, which are only sorted again after words come or go. On its own it is searched word by word until limit items are found; after other words its range is only intersected too when that is cheaper than checking the items they found. Acronyms with more than one row are then checked against their active values, as strict mode may hide a row and the words may come from different values.
+    '''
+
+    def __init__(self, merger):
+        self.merger = merger
+        self._postings = {}  # word -> {case-folded itemkey: row count}
+        self._sorted_words = []
+        self._words_changed = False
+
+    def __len__(self):
+        return len(self._postings)
+
+    def add_rows(self, rows):
+        import test_acronym_answers as answers
+        postings = self._postings
+        for row in rows:
+            folded_key = row[ROW_KEY].lower()
+            for word in set(answers.words(row[ROW_VALUE])):
+                keys = postings.get(word)
+                if keys is None:
+                    keys = postings[word] = {}
+                    self._words_changed = True
+                keys[folded_key] = keys.get(folded_key, 0) + 1
+
+    def remove_rows(self, rows):
+        import test_acronym_answers as answers
+        postings = self._postings
+        for row in rows:
+            folded_key = row[ROW_KEY].lower()
+            for word in set(answers.words(row[ROW_VALUE])):
+                keys = postings[word]
+                if keys[folded_key] > 1:
+                    keys[folded_key] -= 1
+                    continue
+                del keys[folded_key]
+                if not keys:
+                    del postings[word]
+                    self._words_changed = True
+
+    def search(self, text, length=0, limit=8):
+        '''
+            Return up to limit active items with every word of text in one of their itemvalues, sorted by acronym. The last word can be cut short, unless text ends with a space. A non-zero length only matches acronyms of that length.
+        '''
+        import test_acronym_answers as answers
+        words = answers.words(text)
+        prefix = words.pop() if words and not text[-1:].isspace() else None
+        if not words and prefix is not None:
+            return self._search_prefix(prefix, length, limit)
+        candidates = self._candidates(words, length)
+        # The postings say all there is about an acronym with one row, once they have the prefix too.
+        postings_checked = prefix is None
+        if prefix is not None:
+            start, end = self._prefix_range(prefix)
+            if end - start <= len(candidates):
+                prefix_keys = set()
+                for word in self._sorted_words[start:end]:
+                    prefix_keys.update(self._postings[word])
+                candidates = [item for item in candidates if item.folded_key in prefix_keys]
+                postings_checked = True
+        matches = [item for item in candidates
+                   if len(item.rows) == 1 and postings_checked or self._has_words(item, words, prefix)]
+        matches.sort(key=_FOLDED_KEY)
+        return matches[:limit]
+
+    def items_with_value(self, value):
+        '''
+            Return the active items with an itemvalue equal to value once normalized, e.g. both AP '(Wireless) Access Point' and WAP 'Wireless Access Point'.
+        '''
+        import test_acronym_answers as answers
+        value_words = answers.words(value)
+        answer = ' '.join(value_words)
+        return [item for item in self._candidates(value_words)
+                if any(answers.normalize(other_value) == answer for other_value in item.values)]
+
+    def _has_words(self, item, words, prefix=None):
+        # Whether one active value of item has all of words, and a word starting with prefix.
+        import test_acronym_answers as answers
+        for value in item.values:
+            value_words = answers.words(value)
+            if all(word in value_words for word in words) and (
+                    prefix is None or any(word.startswith(prefix) for word in value_words)):
+                return True
+        return False
+
+    def _candidates(self, words, length=0):
+        # Active items with rows using all of words.
+        if not words:
+            return []
+        key_sets = sorted((self._postings.get(word, {}) for word in words), key=len)
+        folded_keys = key_sets[0].keys()
+        for keys in key_sets[1:]:
+            folded_keys = folded_keys & keys.keys()
+        items = []
+        for folded_key in folded_keys:
+            if length and len(folded_key) != length:
+                continue
+            item = self.merger.find(folded_key)
+            if item is not None:
+                items.append(item)
+        return items
+
+    def _search_prefix(self, prefix, length, limit):
+        # Up to limit items with a word starting with prefix, taken word by word in order.
+        start, end = self._prefix_range(prefix)
+        matches = []
+        seen_keys = set()
+        for word in self._sorted_words[start:end]:
+            for folded_key in sorted(self._postings[word]):
+                if folded_key in seen_keys or length and len(folded_key) != length:
+                    continue
+                seen_keys.add(folded_key)
+                item = self.merger.find(folded_key)
+                if item is not None and (len(item.rows) == 1 or self._has_words(item, (), prefix)):
+                    matches.append(item)
+                    if len(matches) == limit:
+                        break
+            if len(matches) == limit:
+                break
+        matches.sort(key=_FOLDED_KEY)
+        return matches
+
+    def _prefix_range(self, prefix):
+        # (start, end) of the sorted words starting with prefix
+        if self._words_changed:
+            self._sorted_words = sorted(self._postings)
+            self._words_changed = False
+        start = bisect.bisect_left(self._sorted_words, prefix)
+        return start, bisect.bisect_left(self._sorted_words, prefix + '\U0010ffff', start)
@@ -0,0 +1,400 @@
+import itertools
+import operator
+import re
+
+import test_acronym_deck as deck
+import test_acronym_ports as ports
+
+'''
+    Composable item filters. A filter is an expression over terms, joined with and, or, not and parentheses; terms side by side mean and:
+
+        deck:network+ strict length>=4 missed
+        (multi or prefix:net) and not deck:"A+ acronyms"
+
+    Terms:
+        deck:text           acronyms with an active row from a deck whose name contains text
+        strict              acronyms in the exam objectives (with a strict row)
+        length>=4           acronym length; also =, !=, <, <=, > and length:4
+        multi               acronyms with more than one meaning
+        prefix:text         acronyms starting with text
+        port:query          acronyms naming a port the query matches (test_acronym_ports), e.g. port:"well-known"
+        missed, correct     answered incorrectly or correctly in this run, as of when the filter was applied; missed also takes in the answer history
+
+    Every term is a bitmap over Session.all_items positions: bit p is set when all_items[p] matches. Python ints are bitsets of any size, so and, or and not are one integer operation over the whole deck, and active_items is read off the set bits in all_items order with itertools.compress. A term's bitmap is built once and kept until the items change order (Session.order_version).
+
+    missed and correct depend on the score, which every re-filter starts over, so they are resolved once, when the filter is applied (Filter.resolve(), from Session.set_item_filter): the acronyms they match then are kept in the filter as keys. Changing the length, the decks or strict mode afterwards filters the same acronyms again instead of the fresh, empty score's.
+
+    A new term is one function registered with @term, returning the items it matches.
+'''
+
+
+class FilterError(ValueError):
+    pass
+
+
+# Term arguments
+NO_ARGUMENT, TEXT_ARGUMENT, NUMBER_ARGUMENT = range(3)
+
+_COMPARISONS = {
+    ':': operator.eq,
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+_TOKEN = re.compile(r'''\s*(?:
+    (?P<open>\() | (?P<close>\)) | (?P<and>&) | (?P<or>\|) | (?P<not>!(?!=))
+    | (?P<comparison>>=|<=|!=|≥|≤|[:=<>])
+    | "(?P<quoted>[^"]*)" | '(?P<single_quoted>[^']*)'
+    | (?P<word>[^\s()&|!:=<>≥≤"']+)
+    )''', re.VERBOSE)
+_UNICODE_COMPARISONS = {'≥': '>=', '≤': '<='}
+
+# name -> (argument, matcher, cached)
+TERMS = {}
+
+
+def term(name, *aliases, argument=NO_ARGUMENT, cached=True):
+    '''
+        Register a filter term. The decorated function is called with (session, comparison, value) and returns the matching items; comparison and value are None for a term without an argument, comparison is ':' for text. Uncached terms are resolved to the keys they match when a filter is applied, see Filter.resolve().
+    '''
+    def register(matcher):
+        for term_name in (name,) + aliases:
+            TERMS[term_name] = (argument, matcher, cached)
+        return matcher
+    return register
+
+
+@term('deck', argument=TEXT_ARGUMENT)
+def _deck_items(a_session, comparison, text):
+    merger = a_session.merger
+    for source in merger.sources():
+        if text.lower() not in source.lower():
+            continue
+        for row in merger.source_rows(source):
+            item = merger.find(row[deck.ROW_KEY])
+            # A non-strict row hidden by strict mode doesn't count.
+            if item is not None and (not item.strict_only or row[deck.ROW_STRICT] == 'true'):
+                yield item
+
+
+@term('strict')
+def _strict_items(a_session, comparison, value):
+    return (item for item in a_session.all_items
+            if any(row[deck.ROW_STRICT] == 'true' for row in item.rows))
+
+
+@term('length', 'len', argument=NUMBER_ARGUMENT)
+def _length_items(a_session, comparison, length):
+    compare = _COMPARISONS[comparison]
+    for key_length, _count in a_session.length_index.counts():
+        if key_length and compare(key_length, length):
+            yield from a_session.length_index.items(key_length)
+
+
+@term('multi')
+def _multi_items(a_session, comparison, value):
+    return (item for item in a_session.all_items
+            if len(item.rows) > 1 and len(item.active_rows()) > 1)
+
+
+@term('prefix', argument=TEXT_ARGUMENT)
+def _prefix_items(a_session, comparison, prefix):
+    return a_session.key_index.complete(prefix, limit=len(a_session.key_index))
+
+
+@term('port', argument=TEXT_ARGUMENT)
+def _port_items(a_session, comparison, text):
+    query = ports.parse_query(text)
+    return a_session.port_index.items(query) if query is not None else ()
+
+
+@term('missed', cached=False)
+def _missed_items(a_session, comparison, value):
+    active_items = a_session.active_items
+    if len(a_session.results) == len(active_items):
+        for index in a_session.results.incorrect_indices:
+            yield active_items[index]
+    if a_session.progress is not None:
+        for key in a_session.progress.missed_keys(a_session.HISTORY_DAYS):
+            item = a_session.merger.find(key)
+            if item is not None:
+                yield item
+
+
+@term('correct', cached=False)
+def _correct_items(a_session, comparison, value):
+    active_items = a_session.active_items
+    if len(a_session.results) == len(active_items):
+        for index, result in enumerate(a_session.results.results):
+            if result == a_session.CORRECT:
+                yield active_items[index]
+
+
+def bitmap(positions, size):
+    # An int with the given bits set, built a byte at a time.
+    bits = bytearray((size + 7) >> 3)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+
+# '0' -> 0, '1' -> 1
+_BIT_DIGITS = bytes.maketrans(b'01', b'\x00\x01')
+
+
+def bit_flags(mask):
+    # One byte per bit of mask, lowest first: 1 where it is set, 0 where not. Done in C, without a loop over the bits.
+    return bin(mask)[:1:-1].encode().translate(_BIT_DIGITS)
+
+
+class Filter:
+    '''
+        A parsed filter expression. mask(bitmaps) evaluates it to a bitmap over all_items positions.
+    '''
+    __slots__ = ('text', '_node')
+
+    def __init__(self, text, node):
+        self.text = text
+        # ('term', name, comparison, value), ('keys', term node, frozenset of folded keys), ('not', node),
+        # ('and', left, right) or ('or', left, right)
+        self._node = node
+
+    def __eq__(self, other):
+        return isinstance(other, Filter) and self._node == other._node
+
+    def __repr__(self):
+        return f"Filter({self.text!r})"
+
+    def __str__(self):
+        # Reads back with parse_filter.
+        return self.text
+
+    @property
+    def resolved(self):
+        # Whether no term is left that depends on the score.
+        return not self._unresolved_terms(self._node)
+
+    def resolve(self, bitmaps):
+        '''
+            This filter with each uncached term (missed, correct) replaced by the keys it matches now. A resolved filter is returned as is.
+        '''
+        if self.resolved:
+            return self
+        return self.pin([bitmaps.term_keys(*term_node[1:]) for term_node in self._unresolved_terms(self._node)])
+
+    def pinned_keys(self):
+        # The key sets of the resolved terms, in expression order; pin() takes them back, e.g. from a snapshot.
+        return [node[2] for node in self._walk(self._node) if node[0] == 'keys']
+
+    def pin(self, key_sets):
+        # This filter with its uncached terms, in expression order, replaced by key_sets.
+        key_sets = list(key_sets)
+        if len(key_sets) != len(self._unresolved_terms(self._node)):
+            raise FilterError(f"{self.text!r} has {len(self._unresolved_terms(self._node))} terms to pin, not {len(key_sets)}")
+        key_sets = iter(key_sets)
+
+        def replace(node):
+            match node[0]:
+                case 'term':
+                    return ('keys', node, frozenset(next(key_sets))) if not TERMS[node[1]][2] else node
+                case 'not':
+                    return ('not', replace(node[1]))
+                case 'and' | 'or':
+                    return (node[0], replace(node[1]), replace(node[2]))
+            return node
+        return Filter(self.text, replace(self._node))
+
+    def _unresolved_terms(self, node):
+        return [child for child in self._walk(node)
+                if child[0] == 'term' and not TERMS[child[1]][2]]
+
+    def _walk(self, node):
+        # Every node, depth first, left to right.
+        yield node
+        match node[0]:
+            case 'not':
+                yield from self._walk(node[1])
+            case 'and' | 'or':
+                yield from self._walk(node[1])
+                yield from self._walk(node[2])
+
+    def mask(self, bitmaps):
+        return self._evaluate(self._node, bitmaps)
+
+    def _evaluate(self, node, bitmaps):
+        match node[0]:
+            case 'term':
+                return bitmaps.term(*node[1:])
+            case 'keys':
+                return bitmaps.keys(node[2])
+            case 'not':
+                return bitmaps.all() & ~self._evaluate(node[1], bitmaps)
+            case 'and':
+                return self._evaluate(node[1], bitmaps) & self._evaluate(node[2], bitmaps)
+            case 'or':
+                return self._evaluate(node[1], bitmaps) | self._evaluate(node[2], bitmaps)
+
+
+def parse_filter(text):
+    '''
+        Parse a filter expression. Raises FilterError, with what is wrong, if text is not one.
+    '''
+    tokens = _tokenize(text)
+    if not tokens:
+        raise FilterError('empty filter')
+    parser = _Parser(tokens)
+    node = parser.parse_or()
+    if parser.index < len(tokens):
+        raise FilterError(f"unexpected {tokens[parser.index][1]!r}")
+    return Filter(' '.join(text.split()), node)
+
+
+def _tokenize(text):
+    # [(kind, text), ...]; and, or and not are words too.
+    tokens = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None or match.end() == position:
+            raise FilterError(f"unexpected {text[position:position + 10]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        value = match[kind]
+        if kind in ('quoted', 'single_quoted'):
+            kind = 'text'
+        elif kind == 'comparison':
+            value = _UNICODE_COMPARISONS.get(value, value)
+        elif kind == 'word' and value.lower() in ('and', 'or', 'not'):
+            kind = value = value.lower()
+        tokens.append((kind, value))
+    return tokens
+
+
+class _Parser:
+    # Recursive descent: or binds loosest, then and (or nothing), then not.
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.index = 0
+
+    def peek(self):
+        return self.tokens[self.index][0] if self.index < len(self.tokens) else None
+
+    def take(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.peek() == 'or':
+            self.take()
+            node = ('or', node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.peek() in ('and', 'not', 'open', 'word'):
+            if self.peek() == 'and':
+                self.take()
+            node = ('and', node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        kind = self.peek()
+        if kind == 'not':
+            self.take()
+            return ('not', self.parse_not())
+        if kind == 'open':
+            self.take()
+            node = self.parse_or()
+            if self.peek() != 'close':
+                raise FilterError('missing )')
+            self.take()
+            return node
+        if kind == 'word':
+            return self.parse_term()
+        raise FilterError('filter ends too soon' if kind is None else f"unexpected {self.take()[1]!r}")
+
+    def parse_term(self):
+        name = self.take()[1].lower()
+        if name not in TERMS:
+            raise FilterError(f"unknown filter {name!r}, try one of: {', '.join(sorted(TERMS))}")
+        argument = TERMS[name][0]
+        if argument == NO_ARGUMENT:
+            return ('term', name, None, None)
+        if self.peek() != 'comparison':
+            raise FilterError(f"{name} needs a value, e.g. {name}{':4' if argument == NUMBER_ARGUMENT else ':text'}")
+        comparison = self.take()[1]
+        if self.peek() not in ('word', 'text'):
+            raise FilterError(f"{name}{comparison} needs a value")
+        value = self.take()[1]
+        if argument == TEXT_ARGUMENT:
+            if comparison != ':':
+                raise FilterError(f"{name} takes {name}:text")
+            return ('term', name, comparison, value)
+        if not value.isdigit():
+            raise FilterError(f"{name} needs a number, not {value!r}")
+        return ('term', name, comparison, int(value))
+
+
+class Bitmaps:
+    '''
+        The term bitmaps of a Session, built on first use and kept until its items change order.
+    '''
+
+    def __init__(self, a_session):
+        self.session = a_session
+        self._order_version = None
+        # (name, comparison, value) -> bitmap
+        self._cache = {}
+
+    def all(self):
+        return (1 << len(self.session.all_items)) - 1
+
+    def term(self, name, comparison=None, value=None):
+        if self._order_version != self.session.order_version:
+            self._order_version = self.session.order_version
+            self._cache = {}
+        key = (name, comparison, value)
+        mask = self._cache.get(key)
+        if mask is None:
+            _argument, matcher, cached = TERMS[name]
+            mask = bitmap((item.position for item in matcher(self.session, comparison, value)),
+                          len(self.session.all_items))
+            if cached:
+                self._cache[key] = mask
+        return mask
+
+    def term_keys(self, name, comparison=None, value=None):
+        # The folded keys of the items a term matches now.
+        _argument, matcher, _cached = TERMS[name]
+        return frozenset(item.folded_key for item in matcher(self.session, comparison, value))
+
+    def keys(self, keys):
+        # The bitmap of the items with these folded keys, cached like a term's.
+        if self._order_version != self.session.order_version:
+            self._order_version = self.session.order_version
+            self._cache = {}
+        mask = self._cache.get(keys)
+        if mask is None:
+            items = (self.session.key_index.find(key) for key in keys)
+            mask = self._cache[keys] = bitmap((item.position for item in items if item is not None),
+                                              len(self.session.all_items))
+        return mask
+
+    def items(self, mask, length=0):
+        # The items of mask, in all_items order. A non-zero length only keeps acronyms of that length.
+        if length:
+            mask &= self.term('length', '=', length)
+        return list(itertools.compress(self.session.all_items, bit_flags(mask)))
+
+    def select(self, mask, items):
+        # The items of mask among items, in their order.
+        flags = bit_flags(mask)
+        return [item for item in items
+                if item.position < len(flags) and flags[item.position]]
@@ -0,0 +1,167 @@
+import io
+import os
+import re
+import sys
+
+'''
+    Deck file formats. A reader turns the text of one deck file into raw row tuples, one at a time, so rows stream from the parser into the compile stage without an intermediate list:
+        (itemkey, itemvalue, itemlink, strict)
+
+    Readers are registered by file extension:
+        .csv     a header line, then one row per line (the shipped format)
+        .json    an array of objects, decoded one object at a time
+        .jsonl   one object per line (JSON Lines)
+    register_reader() adds a format. A reader takes (source_path, text) and yields (line number, (itemkey, itemvalue, itemlink, strict)) with None for missing fields.
+
+    Every row is checked as it streams past:
+        itemkey, itemvalue   required, non-empty strings
+        itemlink             optional string
+        strict               optional; 'true' or 'false' in any case, or a JSON boolean. Stored lower case.
+    Other fields are ignored. The first bad row raises DeckFormatError with the file and line.
+
+    A deck is named without an extension, e.g. 'A+ acronyms'. find_source() picks its file in SOURCE_EXTENSIONS order, so the .csv wins when a deck ships in several formats.
+'''
+
+RAW_FIELDS = ('itemkey', 'itemvalue', 'itemlink', 'strict')
+
+# Preferred source format first.
+SOURCE_EXTENSIONS = ['.csv', '.json', '.jsonl']
+
+READERS = {}
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class DeckFormatError(ValueError):
+    def __init__(self, source_path, line, message):
+        super().__init__(f"{source_path}, line {line}: {message}")
+        self.source_path = source_path
+        self.line = line
+
+
+def register_reader(extension, reader):
+    READERS[extension.lower()] = reader
+
+
+def find_source(deck_name):
+    '''
+        Return the file to load for a deck, or None. A name that already ends in a registered extension is used as is.
+    '''
+    if os.path.splitext(deck_name)[1].lower() in READERS:
+        return deck_name if os.path.exists(deck_name) else None
+    for extension in SOURCE_EXTENSIONS:
+        if extension in READERS and os.path.exists(deck_name + extension):
+            return deck_name + extension
+    return None
+
+
+def read_rows(source_path, text):
+    '''
+        Yield the validated raw row tuples of a deck file's text, with interned strings.
+    '''
+    extension = os.path.splitext(source_path)[1].lower()
+    if extension not in READERS:
+        raise DeckFormatError(source_path, 0, f"no reader for {extension or 'extensionless'} files")
+    for line, fields in READERS[extension](source_path, text):
+        yield _validated_row(source_path, line, fields)
+
+
+def _validated_row(source_path, line, fields):
+    itemkey, itemvalue, itemlink, strict = fields
+    for field_name, field in (('itemkey', itemkey), ('itemvalue', itemvalue)):
+        if not isinstance(field, str) or not field:
+            raise DeckFormatError(source_path, line,
+                                  f"{field_name} must be a non-empty string, not {field!r}")
+    if itemlink is None:
+        itemlink = ''
+    elif not isinstance(itemlink, str):
+        raise DeckFormatError(source_path, line,
+                              f"itemlink must be a string, not {itemlink!r}")
+    if isinstance(strict, bool):
+        strict = 'true' if strict else 'false'
+    elif strict is None:
+        strict = ''
+    elif isinstance(strict, str) and strict.lower() in ('true', 'false', ''):
+        strict = strict.lower()
+    else:
+        raise DeckFormatError(source_path, line,
+                              f"strict must be true or false, not {strict!r}")
+    # Interning shares the repeated strict flags and links across rows.
+    return (sys.intern(itemkey), sys.intern(itemvalue), sys.intern(itemlink), sys.intern(strict))
+
+
+def _record_fields(source_path, line, record):
+    if not isinstance(record, dict):
+        raise DeckFormatError(source_path, line,
+                              f"expected an object, not {type(record).__name__}")
+    return tuple(record.get(field) for field in RAW_FIELDS)
+
+
+def read_csv(source_path, text):
+    import csv
+    reader = csv.reader(io.StringIO(text, newline=''))
+    header = next(reader, None)
+    if header is None:
+        return
+    for field in ('itemkey', 'itemvalue'):
+        if field not in header:
+            raise DeckFormatError(source_path, 1, f"no {field} column")
+    columns = [header.index(field) if field in header else None
+               for field in RAW_FIELDS]
+    for row in reader:
+        if not row:
+            # Blank lines are skipped, like csv.DictReader does.
+            continue
+        yield reader.line_num, tuple(row[column] if column is not None and column < len(row) else None
+                                     for column in columns)
+
+
+def read_json(source_path, text):
+    # The array is decoded one object at a time with raw_decode.
+    import json
+    decode = json.JSONDecoder().raw_decode
+    index = _WHITESPACE.match(text).end()
+    line = 1 + text.count('\n', 0, index)
+    if not text.startswith('[', index):
+        raise DeckFormatError(source_path, line, 'expected an array of objects')
+    # line is the line of text[counted_to]; the newlines before the [ are counted already.
+    counted_to = index
+    index = _WHITESPACE.match(text, index + 1).end()
+    while not text.startswith(']', index):
+        line += text.count('\n', counted_to, index)
+        counted_to = index
+        try:
+            record, index = decode(text, index)
+        except json.JSONDecodeError as error:
+            raise DeckFormatError(source_path, error.lineno, error.msg) from None
+        yield line, _record_fields(source_path, line, record)
+        index = _WHITESPACE.match(text, index).end()
+        if text.startswith(',', index):
+            index = _WHITESPACE.match(text, index + 1).end()
+            if text.startswith(']', index) or index == len(text):
+                # JSON has no trailing commas.
+                raise DeckFormatError(source_path, line + text.count('\n', counted_to, index),
+                                      "expected an object after ','")
+        elif not text.startswith(']', index):
+            raise DeckFormatError(source_path, line + text.count('\n', counted_to, index),
+                                  "expected ',' or ']'")
+    if _WHITESPACE.match(text, index + 1).end() != len(text):
+        raise DeckFormatError(source_path, line + text.count('\n', counted_to, index),
+                              'unexpected text after the array')
+
+
+def read_jsonl(source_path, text):
+    import json
+    for line, record_text in enumerate(io.StringIO(text), 1):
+        if not record_text.strip():
+            continue
+        try:
+            record = json.loads(record_text)
+        except json.JSONDecodeError as error:
+            raise DeckFormatError(source_path, line, error.msg) from None
+        yield line, _record_fields(source_path, line, record)
+
+
+register_reader('.csv', read_csv)
+register_reader('.json', read_json)
+register_reader('.jsonl', read_jsonl)
@@ -0,0 +1,309 @@
+import argparse
+import os
+import re
+import sys
+
+import test_acronym_formats as formats
+import test_acronym_session as session
+
+'''
+    Deck lint. Checks the rows of deck files as written, before they are compiled and merged, and reports every problem with the file and line it came from:
+
+        python3 test_acronym_lint.py                       # all shipped decks
+        python3 test_acronym_lint.py bench_decks/*.csv --json
+        python3 test_acronym_lint.py --fail-on warning
+
+    Checks, by code:
+        unreadable        error: a file that can't be read or parsed any further, e.g. broken JSON
+        empty-field       error: no itemkey or itemvalue; info: no itemlink
+        bad-type          error: a JSON field that is not a string
+        bad-strict        error: strict is not true or false
+        whitespace        warning: fields with leading or trailing whitespace, one finding per row
+        bad-link          error: itemlink is not an http(s) URL
+        duplicate-link    warning: one acronym with different values sharing a link (different acronyms sharing one, like WAP and AP, is fine)
+        duplicate-row     warning: the same acronym and value twice in one file; info: across files (decks overlap by design)
+        duplicate-key     info: an acronym in two files with different values, e.g. RFB as 'Remote Frame Buffer' in one and 'Remote Frame Buffer (VNC)' in another; listed with both sets of values
+        strict-conflict   error: the same acronym and value marked both strict and not strict in one file; warning: across files
+        case-variant      info: the same acronym spelled in different cases, e.g. Kb and KB, which merge into one
+
+    Each file is read and checked in one pass. Row checks happen during that pass, and each row leaves a small record behind. Checks that compare rows, across files too, then run over those records. The CLI lints its files in parallel worker processes. It exits with status 1 when a finding reaches --fail-on (default error), so it can gate CI.
+'''
+
+ERROR = 'error'
+WARNING = 'warning'
+INFO = 'info'
+SEVERITIES = [INFO, WARNING, ERROR]
+
+_STRICT_VALUES = {'true': True, 'false': False, '': None}
+
+# An http(s) URL with a host and no whitespace.
+_LINK = re.compile(r'https?://[^\s/?#]+[^\s]*', re.IGNORECASE)
+
+
+class Finding:
+    __slots__ = ('severity', 'code', 'path', 'line', 'message', 'related')
+
+    def __init__(self, severity, code, path, line, message, related=None):
+        self.severity = severity
+        self.code = code
+        self.path = path
+        self.line = line
+        self.message = message
+        # (path, line) of the other row, for checks comparing two rows
+        self.related = related
+
+    def __str__(self):
+        text = f"{self.path}:{self.line}: {self.severity} {self.code}: {self.message}"
+        if self.related is not None:
+            text += f" (see {self.related[0]}:{self.related[1]})"
+        return text
+
+    def to_dict(self):
+        return {'severity': self.severity, 'code': self.code, 'path': self.path, 'line': self.line,
+                'message': self.message, 'related': list(self.related) if self.related else None}
+
+
+class LintReport:
+    def __init__(self, paths=(), findings=()):
+        self.paths = list(paths)
+        self.findings = sorted(findings, key=lambda finding: (
+            finding.path, finding.line, finding.code))
+
+    def __len__(self):
+        return len(self.findings)
+
+    def counts(self):
+        counts = dict.fromkeys(SEVERITIES, 0)
+        for finding in self.findings:
+            counts[finding.severity] += 1
+        return counts
+
+    def fails(self, fail_on=ERROR):
+        return any(SEVERITIES.index(finding.severity) >= SEVERITIES.index(fail_on)
+                   for finding in self.findings)
+
+    def summary(self):
+        counts = self.counts()
+        return (f"{len(self.paths)} file(s): {counts[ERROR]} error(s), "
+                f"{counts[WARNING]} warning(s), {counts[INFO]} info")
+
+    def text(self, min_severity=INFO):
+        lines = [str(finding) for finding in self.findings
+                 if SEVERITIES.index(finding.severity) >= SEVERITIES.index(min_severity)]
+        return '\n'.join(lines + [self.summary()])
+
+    def to_dict(self):
+        return {'files': self.paths, 'counts': self.counts(),
+                'findings': [finding.to_dict() for finding in self.findings]}
+
+
+def scan_file(path):
+    '''
+        Read one deck file and run the row checks. Returns (findings, records), a record per row with a usable itemkey and itemvalue:
+            (line, itemkey, itemvalue, itemlink, strict)
+        with strict as True, False or None (not given). Runs in worker processes, so it takes and returns plain data.
+    '''
+    findings = []
+    records = []
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in formats.READERS:
+        return [Finding(ERROR, 'unreadable', path, 0, f"no reader for {extension or 'extensionless'} files")], records
+    try:
+        with open(path, 'rb') as deck_file:
+            text = deck_file.read().decode('utf-8-sig')
+        for line, fields in formats.READERS[extension](path, text):
+            record = _check_row(path, line, fields, findings)
+            if record is not None:
+                records.append(record)
+    except (OSError, UnicodeDecodeError) as error:
+        findings.append(Finding(ERROR, 'unreadable', path, 0, str(error)))
+    except formats.DeckFormatError as error:
+        findings.append(Finding(ERROR, 'unreadable', path, error.line, str(error).split(': ', 1)[-1]))
+    return findings, records
+
+
+def _check_row(path, line, fields, findings):
+    # Row-local checks. Returns the row's record, or None if it has no usable key and value.
+    itemkey, itemvalue, itemlink, strict = fields
+    if (type(itemkey) is str and type(itemvalue) is str and itemkey and itemvalue
+            and itemkey == itemkey.strip() and itemvalue == itemvalue.strip()
+            and type(itemlink) is str and itemlink == itemlink.strip() and (not itemlink or _LINK.fullmatch(itemlink))
+            and (strict is None or type(strict) is str and strict in _STRICT_VALUES)):
+        # Most rows are clean; only the rest go through the checks one field at a time.
+        if not itemlink:
+            findings.append(Finding(INFO, 'empty-field', path, line, 'itemlink is empty'))
+        return (line, itemkey, itemvalue, itemlink, _STRICT_VALUES.get(strict))
+    return _check_fields(path, line, fields, findings)
+
+
+def _check_fields(path, line, fields, findings):
+    usable = True
+    padded_fields = []
+    for field_name, field in zip(formats.RAW_FIELDS, fields):
+        if field is None or field == '':
+            if field_name in ('itemkey', 'itemvalue'):
+                findings.append(Finding(ERROR, 'empty-field', path, line, f"{field_name} is empty"))
+                usable = False
+            elif field_name == 'itemlink':
+                findings.append(Finding(INFO, 'empty-field', path, line, 'itemlink is empty'))
+        elif field_name == 'strict' and isinstance(field, bool):
+            pass
+        elif not isinstance(field, str):
+            findings.append(Finding(ERROR, 'bad-type', path, line,
+                                    f"{field_name} must be a string, not {field!r}"))
+            usable = usable and field_name not in ('itemkey', 'itemvalue')
+        elif field != field.strip():
+            padded_fields.append(field_name)
+    if padded_fields:
+        findings.append(Finding(WARNING, 'whitespace', path, line,
+                                f"leading or trailing whitespace in {', '.join(padded_fields)}"))
+
+    itemkey, itemvalue, itemlink, strict = fields
+    if isinstance(strict, str):
+        if strict.strip().lower() not in ('true', 'false', ''):
+            findings.append(Finding(ERROR, 'bad-strict', path, line,
+                                    f"strict must be true or false, not {strict!r}"))
+            strict = None
+        else:
+            strict = {'true': True, 'false': False}.get(strict.strip().lower())
+    elif not isinstance(strict, bool):
+        strict = None
+
+    if isinstance(itemlink, str) and itemlink.strip():
+        itemlink = itemlink.strip()
+        if not _LINK.fullmatch(itemlink):
+            findings.append(Finding(ERROR, 'bad-link', path, line,
+                                    f"itemlink is not an http(s) URL: {itemlink!r}"))
+    else:
+        itemlink = ''
+    if not usable:
+        return None
+    return (line, itemkey.strip(), itemvalue.strip(), itemlink, strict)
+
+
+class DeckLinter:
+    '''
+        Compares the records of every file added, in the order added. Dictionaries keyed by case-folded acronym hold the first row of each spelling, value and link, so each record is checked against all the rows before it in O(1).
+    '''
+
+    def __init__(self):
+        self.paths = []
+        self.findings = []
+        # case-folded itemkey -> (first itemkey, path, line)
+        self._spellings = {}
+        self._case_variants = set()  # (case-folded itemkey, itemkey) already reported
+        # (case-folded itemkey, itemvalue) -> (path, line, strict)
+        self._values = {}
+        # (case-folded itemkey, itemlink) -> (path, line, itemvalue)
+        self._links = {}
+        # case-folded itemkey -> (path, line, itemvalues) of the first file with it
+        self._key_values = {}
+
+    def add(self, path, findings, records):
+        self.paths.append(path)
+        self.findings.extend(findings)
+        # case-folded itemkey -> (itemkey, line, itemvalues) in this file
+        file_values = {}
+        for line, itemkey, itemvalue, itemlink, strict in records:
+            folded_key = itemkey.lower()
+            file_values.setdefault(folded_key, (itemkey, line, {}))[2][itemvalue] = None
+            first_key, first_path, first_line = self._spellings.setdefault(
+                folded_key, (itemkey, path, line))
+            if first_key != itemkey and (folded_key, itemkey) not in self._case_variants:
+                self._case_variants.add((folded_key, itemkey))
+                self.findings.append(Finding(INFO, 'case-variant', path, line,
+                                             f"{itemkey} and {first_key} differ only in case and merge into one acronym", (first_path, first_line)))
+
+            seen = self._values.setdefault(
+                (folded_key, itemvalue), (path, line, strict))
+            if seen[:2] != (path, line):
+                seen_path, seen_line, seen_strict = seen
+                same_file = seen_path == path
+                self.findings.append(Finding(WARNING if same_file else INFO, 'duplicate-row', path, line,
+                                             f"{itemkey}: {itemvalue!r} is listed again", (seen_path, seen_line)))
+                if strict is not None and seen_strict is not None and strict != seen_strict:
+                    self.findings.append(Finding(ERROR if same_file else WARNING, 'strict-conflict', path, line,
+                                                 f"{itemkey}: {itemvalue!r} is strict {str(strict).lower()} here but {str(seen_strict).lower()} before",
+                                                 (seen_path, seen_line)))
+
+            if itemlink:
+                seen_link = self._links.setdefault(
+                    (folded_key, itemlink), (path, line, itemvalue))
+                if seen_link[2] != itemvalue:
+                    self.findings.append(Finding(WARNING, 'duplicate-link', path, line,
+                                                 f"{itemkey}: {itemvalue!r} shares its link with {seen_link[2]!r}", seen_link[:2]))
+
+        # Each acronym against the first file with it, once per file.
+        for folded_key, (itemkey, line, values) in file_values.items():
+            seen_path, seen_line, seen_values = self._key_values.setdefault(
+                folded_key, (path, line, values))
+            if seen_path != path and values.keys() != seen_values.keys():
+                self.findings.append(Finding(INFO, 'duplicate-key', path, line,
+                                             f"{itemkey} is {_value_list(values)} here but {_value_list(seen_values)} in {seen_path}",
+                                             (seen_path, seen_line)))
+
+    def report(self):
+        return LintReport(self.paths, self.findings)
+
+
+def _value_list(values):
+    return ' / '.join(repr(value) for value in values)
+
+
+def deck_paths(deck_names=None):
+    # The source file of each deck that has one.
+    deck_names = deck_names or session.Session.ALL_CSV_FILES
+    return [formats.find_source(deck_name) for deck_name in deck_names
+            if formats.find_source(deck_name) is not None]
+
+
+def lint_files(paths, workers=None):
+    '''
+        Lint deck files and return a LintReport. workers > 1 scans the files in that many processes; cross-file checks run here, in the order the paths were given.
+    '''
+    paths = list(paths)
+    if workers is not None and workers > 1 and len(paths) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(min(workers, len(paths))) as pool:
+            scans = list(pool.map(scan_file, paths))
+    else:
+        scans = [scan_file(path) for path in paths]
+    linter = DeckLinter()
+    for path, (findings, records) in zip(paths, scans):
+        linter.add(path, findings, records)
+    return linter.report()
+
+
+def lint_decks(deck_names=None, workers=None):
+    return lint_files(deck_paths(deck_names), workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Check deck files for problems, with file and line for each one.')
+    parser.add_argument('paths', nargs='*',
+                        help='deck files or deck names (default: all shipped decks)')
+    parser.add_argument('--json', action='store_true',
+                        help='print the report as JSON')
+    parser.add_argument('--fail-on', choices=SEVERITIES, default=ERROR,
+                        help='exit with status 1 if there is a finding this severe or worse (default: error)')
+    parser.add_argument('--show', choices=SEVERITIES, default=INFO,
+                        help='only print findings this severe or worse')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='files to lint at once, in separate processes')
+    args = parser.parse_args(argv)
+
+    paths = [path if os.path.exists(path) else formats.find_source(path) or path
+             for path in args.paths] or deck_paths()
+    report = lint_files(paths, args.workers)
+    if args.json:
+        import json
+        json.dump(report.to_dict(), sys.stdout, indent=1)
+        print()
+    else:
+        print(report.text(args.show))
+    return 1 if report.fails(args.fail_on) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import test_acronym_cache as deck_cache
+import test_acronym_session as session
+
+'''
+    Loads decks on worker threads, so a window can draw and stay responsive while large decks are parsed and merged. Nothing here knows about tkinter: the window starts a load, then polls (e.g. from tk.after) until the result is handed back on its own thread.
+
+    Each deck file is read by its own task on a thread pool. A session task then builds a new, ready to use Session from them (merged, indexed and shuffled, in the order the decks were listed), so the polling thread only has to swap it in.
+
+    Only the latest load counts. Starting a new one cancels the previous one: its pending tasks are cancelled, a merge already running stops at the next deck, and a result that arrives anyway is dropped.
+
+        loader = DeckLoader()
+        loader.load_decks(['A+ acronyms'], strict_mode, on_done)
+        ...
+        loader.poll()   # True once on_done was called with the new session
+
+    load_snapshot() does the same for a session saved with test_acronym_snapshot, so the decks of the last run load off the window's thread too.
+'''
+
+
+class LoadCancelled(Exception):
+    pass
+
+
+class DeckLoader:
+    def __init__(self, max_workers=None):
+        self._max_workers = max_workers
+        # Started with the first load; concurrent.futures is slow to import.
+        self._pool = None
+        self._generation = 0
+        # (future, on_done) of the latest load, until poll() hands it back
+        self._pending = None
+        self._file_futures = []
+
+    @property
+    def loading(self):
+        return self._pending is not None
+
+    def load_decks(self, csv_file_names, strict_mode, on_done, typed_mode=False):
+        '''
+            Load the decks into a new Session. on_done(new_session) is called by poll() on the polling thread. In typed_mode the answer key is built here too.
+        '''
+        generation = self._start()
+        csv_file_names = list(csv_file_names)
+        self._file_futures = [self._executor().submit(deck_cache.load_deck, file_name)
+                              for file_name in csv_file_names]
+        future = self._executor().submit(self._build_session, generation, csv_file_names,
+                                   list(self._file_futures), strict_mode, typed_mode=typed_mode)
+        self._pending = (future, on_done)
+
+    def load_snapshot(self, saved, on_done, scheduler=None):
+        '''
+            Load the decks of a snapshot into a new Session restored from it (see Session.restore_snapshot). on_done(new_session) is called by poll() on the polling thread.
+        '''
+        generation = self._start()
+        self._file_futures = [self._executor().submit(deck_cache.load_deck, file_name)
+                              for file_name in saved.deck_names]
+        future = self._executor().submit(self._build_session, generation, saved.deck_names,
+                                   list(self._file_futures), saved.strict_mode, saved, scheduler)
+        self._pending = (future, on_done)
+
+    def load_deck(self, csv_file_name, on_done):
+        '''
+            Load the raw rows of one deck. on_done(raw_rows) is called by poll() on the polling thread.
+        '''
+        self._start()
+        future = self._executor().submit(deck_cache.load_deck, csv_file_name)
+        self._file_futures = [future]
+        self._pending = (future, on_done)
+
+    def cancel(self):
+        self._start()
+
+    def poll(self):
+        '''
+            Call from the thread that owns the session. When the latest load has finished, pass its result to on_done and return True. Returns False while still loading. An exception raised by the load is raised here.
+        '''
+        if self._pending is None:
+            return True
+        future, on_done = self._pending
+        if not future.done():
+            return False
+        self._pending = None
+        self._file_futures = []
+        on_done(future.result())
+        return True
+
+    def shutdown(self):
+        self.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _executor(self):
+        if self._pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._pool = ThreadPoolExecutor(
+                self._max_workers, thread_name_prefix='deck-loader')
+        return self._pool
+
+    def _start(self):
+        # Cancel whatever is in flight and return the new generation.
+        self._generation += 1
+        for future in self._file_futures:
+            future.cancel()
+        if self._pending is not None:
+            self._pending[0].cancel()
+        self._pending = None
+        self._file_futures = []
+        return self._generation
+
+    def _build_session(self, generation, csv_file_names, file_futures, strict_mode, saved=None, scheduler=None, typed_mode=False):
+        # Runs on a pool thread. The file tasks were submitted first, so they never wait behind this one.
+        from concurrent.futures import CancelledError
+        raw_rows_by_file = {}
+        for file_name, future in zip(csv_file_names, file_futures):
+            if generation != self._generation:
+                raise LoadCancelled()
+            try:
+                raw_rows_by_file[file_name] = future.result()
+            except CancelledError:
+                raise LoadCancelled()
+        new_session = session.Session(
+            csv_file_names, strict_mode, scheduler=scheduler, typed_mode=typed_mode)
+        if saved is None:
+            new_session.start_test(raw_rows_by_file)
+        else:
+            new_session.restore_snapshot(saved, raw_rows_by_file)
+        return new_session
@@ -0,0 +1,166 @@
+import bisect
+import collections
+import heapq
+import re
+
+'''
+    Ports decks. 'Network ports' pairs services with ports both ways: 'tcp/22' -> 'SSH' and 'SSH' -> 'tcp/22'. Every row naming a port as protocol/number, in its itemkey or its itemvalue, is parsed once into a (port, case-folded itemkey) record, kept in a list sorted by port for each protocol. A port query is then a bisect into one or both lists:
+
+        port 443, 443, tcp/443      one port
+        ports 20-25, 20 to 25       a range of ports
+        all udp, udp, udp 100-200   one protocol, optionally a range
+        well-known range            0-1023; also registered (1024-49151) and dynamic (49152-65535)
+
+    parse_query() reads one of these from the text of the acronym box or a quiz filter, and PortIndex.items() returns the acronyms it matches in port order. Like test_acronym_deck.ValueIndex, the index holds raw rows, so it follows decks through add_rows() and remove_rows(), and only returns items the merger has active.
+'''
+
+PROTOCOLS = ('tcp', 'udp')
+MAX_PORT = 65535
+
+# IANA port ranges
+NAMED_RANGES = {
+    'well-known': (0, 1023),
+    'registered': (1024, 49151),
+    'dynamic': (49152, MAX_PORT),
+}
+_RANGE_NAMES = {'wellknown': 'well-known', 'well-known': 'well-known', 'registered': 'registered',
+                'dynamic': 'dynamic', 'ephemeral': 'dynamic', 'private': 'dynamic'}
+
+_PORT = re.compile(r'(tcp|udp)/(\d{1,5})', re.IGNORECASE)
+_QUERY = re.compile(r'''
+    (?:(?:all|ports?)\s+)*
+    (?P<protocol>tcp|udp)?(?:\s*/\s*|\s+|$)?
+    (?:ports?\s+)?
+    (?:(?P<low>\d{1,5})(?:\s*(?:-|to)\s*(?P<high>\d{1,5}))?
+      |(?P<range>well\s?-?\s?known|registered|dynamic|ephemeral|private)(?:\s+(?:range|ports))?)?
+    ''', re.VERBOSE)
+
+
+def parse_port(text):
+    # (protocol, port) for text like 'tcp/22', otherwise None.
+    if '/' not in text:
+        return None
+    match = _PORT.fullmatch(text.strip())
+    if match is None or int(match[2]) > MAX_PORT:
+        return None
+    return match[1].lower(), int(match[2])
+
+
+class PortQuery:
+    __slots__ = ('protocol', 'low', 'high')
+
+    def __init__(self, protocol=None, low=0, high=MAX_PORT):
+        self.protocol = protocol  # 'tcp', 'udp' or None for both
+        self.low = low
+        self.high = high
+
+    def __eq__(self, other):
+        return isinstance(other, PortQuery) and (self.protocol, self.low, self.high) == (other.protocol, other.low, other.high)
+
+    def matches(self, port):
+        protocol, number = port
+        return (self.protocol is None or protocol == self.protocol) and self.low <= number <= self.high
+
+    def __repr__(self):
+        return f"PortQuery({self.protocol!r}, {self.low}, {self.high})"
+
+    def __str__(self):
+        # Reads back with parse_query.
+        words = [self.protocol] if self.protocol else []
+        if (self.low, self.high) != (0, MAX_PORT):
+            words.append(str(self.low) if self.low == self.high else f"{self.low}-{self.high}")
+        return ' '.join(words) or 'all ports'
+
+
+def parse_query(text):
+    '''
+        The PortQuery in text, or None if text is not a port query. A bare protocol ('udp') is a query, so callers that also look up acronyms should try those first.
+    '''
+    text = text.strip().lower().replace('–', '-').replace('—', '-')
+    if text in ('all ports', 'ports'):
+        return PortQuery()
+    match = _QUERY.fullmatch(text)
+    if match is None or not (match['protocol'] or match['low'] or match['range']):
+        return None
+    if match['range']:
+        low, high = NAMED_RANGES[_RANGE_NAMES[re.sub(r'\s', '', match['range'])]]
+    elif match['low']:
+        low = int(match['low'])
+        high = int(match['high'] or low)
+        if low > high:
+            low, high = high, low
+        if high > MAX_PORT:
+            return None
+    else:
+        low, high = 0, MAX_PORT
+    return PortQuery(match['protocol'], low, high)
+
+
+def row_port(row):
+    # The (protocol, port) a raw row (itemkey, itemvalue, itemlink, strict) names, in its itemkey or else its itemvalue, or None.
+    return parse_port(row[0]) or parse_port(row[1])
+
+
+class PortIndex:
+    def __init__(self, merger):
+        self.merger = merger
+        # protocol -> [(port, case-folded itemkey), ...] sorted, one per row naming a port
+        self._records = {protocol: [] for protocol in PROTOCOLS}
+
+    def __len__(self):
+        return sum(len(records) for records in self._records.values())
+
+    def add_rows(self, rows):
+        new_records = self._row_records(rows)
+        for protocol, records in new_records.items():
+            if records:
+                # Two sorted runs: one linear merge.
+                records.sort()
+                self._records[protocol] = list(heapq.merge(self._records[protocol], records))
+
+    def remove_rows(self, rows):
+        for protocol, records in self._row_records(rows).items():
+            if records:
+                # One pass, however many rows go.
+                removed = collections.Counter(records)
+                kept_records = []
+                for record in self._records[protocol]:
+                    if removed[record]:
+                        removed[record] -= 1
+                    else:
+                        kept_records.append(record)
+                self._records[protocol] = kept_records
+
+    def items(self, query, length=0, limit=None):
+        '''
+            Return the active items with a row naming a port the query matches, in port order, each item once. A non-zero length only matches acronyms of that length.
+        '''
+        protocols = [query.protocol] if query.protocol else PROTOCOLS
+        ranges = []
+        for protocol in protocols:
+            records = self._records[protocol]
+            start = bisect.bisect_left(records, (query.low,))
+            end = bisect.bisect_left(records, (query.high + 1,), start)
+            ranges.append(records[start:end])
+        items = []
+        seen_keys = set()
+        for _port, folded_key in heapq.merge(*ranges):
+            if folded_key in seen_keys or length and len(folded_key) != length:
+                continue
+            seen_keys.add(folded_key)
+            item = self.merger.find(folded_key)
+            # An acronym with other rows may have its port row hidden by strict mode.
+            if item is not None and (len(item.rows) == 1 or any(
+                    (port := row_port(row)) and query.matches(port) for row in item.active_rows())):
+                items.append(item)
+                if len(items) == limit:
+                    break
+        return items
+
+    def _row_records(self, rows):
+        records = {protocol: [] for protocol in PROTOCOLS}
+        for row in rows:
+            port = row_port(row)
+            if port is not None:
+                records[port[0]].append((port[1], row[0].lower()))
+        return records
@@ -0,0 +1,150 @@
+import queue
+import threading
+import time
+
+import test_acronym_appdata as appdata
+
+'''
+    Answer history, kept in a SQLite database (WAL mode) in the user's data folder. Every answer recorded by a Session becomes a row:
+        answers(session, deck, itemkey, ts, outcome)
+    session is the start time of the run in nanoseconds, itemkey the case-folded acronym, ts epoch seconds and outcome 1 for correct, 0 for incorrect.
+
+    record() only puts the answer on a queue, so moving through cards never waits for the disk. A writer thread takes answers off the queue for up to FLUSH_SECONDS (or BATCH_SIZE answers) and inserts each batch with one executemany in one transaction. Queries run on a reader connection of the calling thread, one per thread, which WAL mode lets read while the writer writes. They flush() first, so they see every answer recorded so far.
+
+    The (outcome, ts, itemkey) index answers "every acronym I got wrong in the last 7 days" from the index alone.
+'''
+
+PROGRESS_FILE = 'progress.sqlite3'
+DAY_SECONDS = 24 * 60 * 60
+
+CORRECT_OUTCOME = 1
+INCORRECT_OUTCOME = 0
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS answers (
+        session INTEGER NOT NULL,
+        deck TEXT NOT NULL,
+        itemkey TEXT NOT NULL,
+        ts REAL NOT NULL,
+        outcome INTEGER NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS answers_by_outcome ON answers (outcome, ts, itemkey);
+    CREATE INDEX IF NOT EXISTS answers_by_key ON answers (itemkey, ts);
+'''
+
+
+class ProgressStore:
+    FLUSH_SECONDS = 0.5
+    BATCH_SIZE = 1000
+
+    def __init__(self, path, session_id=None):
+        self.path = path
+        self.session_id = time.time_ns() if session_id is None else session_id
+        self._queue = queue.SimpleQueue()
+        self._ready = threading.Event()
+        # Each thread that queries gets its own reader: sqlite3 connections belong to the thread that opened them, and queries come from the window, loader threads and the debug window's report threads.
+        self._readers = threading.local()
+        self.error = None  # set if the writer thread failed
+        self._writer = threading.Thread(
+            target=self._write_behind, name='progress-writer', daemon=True)
+        self._writer.start()
+
+    @classmethod
+    def for_user(cls):
+        # The history kept in the user's data folder, see test_acronym_appdata.
+        return cls(appdata.data_path(PROGRESS_FILE))
+
+    def record(self, deck, key, correct, ts=None):
+        self._queue.put((self.session_id, deck, key, time.time() if ts is None else ts,
+                         CORRECT_OUTCOME if correct else INCORRECT_OUTCOME))
+
+    def flush(self):
+        '''
+            Wait until every answer recorded so far is in the database.
+        '''
+        written = threading.Event()
+        self._queue.put(written)
+        while not written.wait(0.1):
+            if not self._writer.is_alive():
+                break
+
+    def close(self):
+        self._queue.put(None)
+        self._writer.join()
+        # Other threads' readers close when those threads end.
+        reader = getattr(self._readers, 'connection', None)
+        if reader is not None:
+            reader.close()
+            self._readers.connection = None
+
+    def missed_keys(self, days=7, now=None):
+        '''
+            Return the set of acronyms (case-folded) answered incorrectly in the last days.
+        '''
+        since = (time.time() if now is None else now) - days * DAY_SECONDS
+        rows = self._query('SELECT DISTINCT itemkey FROM answers WHERE outcome = ? AND ts >= ?',
+                           (INCORRECT_OUTCOME, since))
+        return {key for key, in rows}
+
+    def answer_count(self):
+        return self._query('SELECT count(*) FROM answers')[0][0]
+
+    def _query(self, sql, parameters=()):
+        self.flush()
+        self._ready.wait()
+        if self.error is not None:
+            raise self.error
+        reader = getattr(self._readers, 'connection', None)
+        if reader is None:
+            import sqlite3
+            reader = self._readers.connection = sqlite3.connect(self.path)
+        return reader.execute(sql, parameters).fetchall()
+
+    def _write_behind(self):
+        # Runs on the writer thread, which owns its connection.
+        try:
+            import sqlite3
+            connection = sqlite3.connect(self.path)
+            connection.execute('PRAGMA journal_mode=WAL')
+            # In WAL mode a crash can lose the last commits, never corrupt the file.
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(SCHEMA)
+        except Exception as error:
+            self.error = error
+            self._ready.set()
+            return
+        self._ready.set()
+
+        closing = False
+        while not closing:
+            batch = []
+            flushed = []
+            entry = self._queue.get()
+            deadline = time.monotonic() + self.FLUSH_SECONDS
+            while True:
+                if entry is None:
+                    closing = True
+                    break
+                if isinstance(entry, threading.Event):
+                    # Someone is waiting; write what we have now.
+                    flushed.append(entry)
+                    break
+                batch.append(entry)
+                timeout = deadline - time.monotonic()
+                if len(batch) >= self.BATCH_SIZE or timeout <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    with connection:
+                        connection.executemany(
+                            'INSERT INTO answers (session, deck, itemkey, ts, outcome) VALUES (?, ?, ?, ?, ?)', batch)
+                except sqlite3.Error as error:
+                    # e.g. disk full: this batch is lost, but the app carries on.
+                    self.error = error
+            for written in flushed:
+                written.set()
+        connection.close()
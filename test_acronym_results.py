@@ -0,0 +1,214 @@
+import bisect
+
+'''
+    Score keeping for one test run, independent of tkinter so any quiz window can use it.
+
+    The tracker owns the list of results, one per item: UNTESTED, CORRECT or INCORRECT. Every change goes through set(), which keeps these in step in O(1) (O(log n) for the incorrect positions):
+        - correct, incorrect and untested counters, so the score never recounts the list
+        - a sorted list of INCORRECT positions, for review mode navigation
+
+    The current and best streak count committed answers instead: commit() is called once per answer, when Next moves on, so flipping the pending answer back and forth doesn't add to the streak.
+
+    ResultsBitmap keeps the same score in two bits per item, for a server holding hundreds of sessions at once.
+'''
+
+
+class ResultsTracker:
+    CORRECT = True
+    INCORRECT = False
+    UNTESTED = None
+
+    def __init__(self, size=0):
+        self.reset(size)
+
+    def reset(self, size):
+        self.results = [self.UNTESTED] * size
+        self.incorrect_indices = []
+        self.correct_count = 0
+        self.incorrect_count = 0
+        self.untested_count = size
+        self.streak = 0
+        self.best_streak = 0
+
+    def restore(self, results, streak=0, best_streak=0):
+        # Start from saved results, e.g. a session snapshot.
+        self.results = list(results)
+        self.incorrect_indices = [index for index, result in enumerate(self.results)
+                                  if result == self.INCORRECT]
+        self.correct_count = self.results.count(self.CORRECT)
+        self.incorrect_count = len(self.incorrect_indices)
+        self.untested_count = len(self.results) - \
+            self.correct_count - self.incorrect_count
+        self.streak = streak
+        self.best_streak = best_streak
+
+    def __len__(self):
+        return len(self.results)
+
+    def __getitem__(self, index):
+        return self.results[index]
+
+    def set(self, index, result):
+        old_result = self.results[index]
+        if result == old_result:
+            return
+        self.results[index] = result
+        self._changed(old_result, result)
+
+        if old_result == self.INCORRECT:
+            del self.incorrect_indices[bisect.bisect_left(
+                self.incorrect_indices, index)]
+        if result == self.INCORRECT:
+            bisect.insort(self.incorrect_indices, index)
+
+    def _changed(self, old_result, result):
+        # Counters for one result changing.
+        self._count(old_result, -1)
+        self._count(result, 1)
+
+    def commit(self, result):
+        # Streaks for one answer moved on from.
+        if result == self.CORRECT:
+            self.streak += 1
+            self.best_streak = max(self.best_streak, self.streak)
+        else:
+            self.streak = 0
+
+    def _count(self, result, change):
+        if result == self.CORRECT:
+            self.correct_count += change
+        elif result == self.INCORRECT:
+            self.incorrect_count += change
+        else:
+            self.untested_count += change
+
+    @property
+    def tested_count(self):
+        return self.correct_count + self.incorrect_count
+
+    def percent_correct(self):
+        # Of the tested items
+        return 100 * self.correct_count / self.tested_count if self.tested_count else 0
+
+    def percent_tested(self):
+        return 100 * self.tested_count / len(self.results) if self.results else 0
+
+    def has_incorrect(self):
+        return len(self.incorrect_indices) > 0
+
+    def next_incorrect(self, index):
+        # First incorrect index after index, wrapping around to the first one.
+        if not self.incorrect_indices:
+            return None
+        found = bisect.bisect_right(self.incorrect_indices, index)
+        return self.incorrect_indices[found if found < len(self.incorrect_indices) else 0]
+
+    def prev_incorrect(self, index):
+        # Last incorrect index before index, wrapping around to the last one.
+        if not self.incorrect_indices:
+            return None
+        found = bisect.bisect_left(self.incorrect_indices, index)
+        return self.incorrect_indices[found - 1]
+
+    def score_text(self):
+        text = f"Correct: {self.correct_count}   Incorrect: {self.incorrect_count}"
+        if self.tested_count:
+            text += f"   {self.percent_correct():.0f}%"
+        if self.best_streak:
+            text += f"   Streak: {self.streak} (best {self.best_streak})"
+        return text
+
+
+class ResultsBitmap(ResultsTracker):
+    '''
+        The same score as ResultsTracker in two bitmaps, tested and correct, so results cost two bits an item. There is no list of INCORRECT positions: review navigation scans the bitmaps a byte at a time, skipping whole bytes without a miss.
+    '''
+
+    def reset(self, size):
+        self.size = size
+        self.tested = bytearray((size + 7) // 8)
+        self.correct = bytearray((size + 7) // 8)
+        self.correct_count = 0
+        self.incorrect_count = 0
+        self.untested_count = size
+        self.streak = 0
+        self.best_streak = 0
+
+    def restore(self, results, streak=0, best_streak=0):
+        results = list(results)
+        self.reset(len(results))
+        for index, result in enumerate(results):
+            if result is not self.UNTESTED:
+                self.set(index, result)
+        self.streak = streak
+        self.best_streak = best_streak
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        byte, mask = index >> 3, 1 << (index & 7)
+        if not self.tested[byte] & mask:
+            return self.UNTESTED
+        return self.CORRECT if self.correct[byte] & mask else self.INCORRECT
+
+    def set(self, index, result):
+        old_result = self[index]
+        if result == old_result:
+            return
+        byte, mask = index >> 3, 1 << (index & 7)
+        if result is self.UNTESTED:
+            self.tested[byte] &= ~mask
+        else:
+            self.tested[byte] |= mask
+        if result == self.CORRECT:
+            self.correct[byte] |= mask
+        else:
+            self.correct[byte] &= ~mask
+        self._changed(old_result, result)
+
+    def has_incorrect(self):
+        return self.incorrect_count > 0
+
+    def next_incorrect(self, index):
+        if not self.incorrect_count:
+            return None
+        found = self._incorrect_from(index + 1)
+        return found if found is not None else self._incorrect_from(0)
+
+    def prev_incorrect(self, index):
+        if not self.incorrect_count:
+            return None
+        found = self._incorrect_before(index - 1)
+        return found if found is not None else self._incorrect_before(self.size - 1)
+
+    def _incorrect_bits(self, byte):
+        return self.tested[byte] & ~self.correct[byte]
+
+    def _incorrect_from(self, index):
+        # First INCORRECT position >= index, or None.
+        if index >= self.size:
+            return None
+        byte = index >> 3
+        bits = self._incorrect_bits(byte) >> (index & 7) << (index & 7)
+        while not bits:
+            byte += 1
+            if byte >= len(self.tested):
+                return None
+            bits = self._incorrect_bits(byte)
+        return (byte << 3) + (bits & -bits).bit_length() - 1
+
+    def _incorrect_before(self, index):
+        # Last INCORRECT position <= index, or None.
+        if index < 0:
+            return None
+        byte = index >> 3
+        bits = self._incorrect_bits(byte) & ((2 << (index & 7)) - 1)
+        while not bits:
+            byte -= 1
+            if byte < 0:
+                return None
+            bits = self._incorrect_bits(byte)
+        return (byte << 3) + bits.bit_length() - 1
@@ -0,0 +1,157 @@
+import heapq
+import time
+
+import test_acronym_appdata as appdata
+
+'''
+    Spaced repetition scheduling (SM-2 with two grades). Every card, i.e. every case-folded acronym, keeps a review interval, an ease factor and a due time, remembered between runs. A card answered correctly comes back after 1 day, then 6 days, then the previous interval times its ease. A missed card loses ease and comes back after RELEARN_SECONDS, so it is seen again in the same sitting.
+
+    Answered cards being studied sit in a heap ordered by (due time, sequence number), so picking the next card and rescheduling one are O(log n) however many cards there are. Cards that are due come first, including missed cards once their RELEARN_SECONDS are up. Then new cards, in the order they were handed to set_cards (the shuffled order). When neither is left, cards are reviewed ahead of time. A rescheduled card gets a new sequence number; its old heap entry is skipped when it surfaces, instead of being searched for and removed.
+
+    The heap holds positions in the list given to set_cards, so a Session can map them straight back to its active items.
+'''
+
+SCHEDULE_FILE = 'schedule.json'
+
+DAY_SECONDS = 24 * 60 * 60
+RELEARN_SECONDS = 60
+FIRST_INTERVALS = [1, 6]  # days
+START_EASE = 2.5
+MIN_EASE = 1.3
+LAPSE_EASE_PENALTY = 0.2
+
+
+class Card:
+    __slots__ = ('interval', 'ease', 'repetitions', 'lapses', 'due', 'seq')
+
+    def __init__(self, interval=0, ease=START_EASE, repetitions=0, lapses=0, due=None):
+        self.interval = interval  # days
+        self.ease = ease
+        self.repetitions = repetitions  # correct answers in a row
+        self.lapses = lapses
+        self.due = due  # epoch seconds, None for a card never answered
+        self.seq = -1  # sequence number of its live heap entry
+
+
+class Scheduler:
+    def __init__(self, path=None, clock=time.time):
+        '''
+            path is a JSON file to keep the cards in between runs, None to keep them in memory only.
+        '''
+        self.path = path
+        self.clock = clock
+        self.cards = {}  # case-folded acronym -> Card
+        self.dirty = False
+        self._keys = []
+        self._heap = []
+        self._new = []  # positions of new cards, next one last
+        self._seq = 0
+        if path is not None:
+            self.load()
+
+    @classmethod
+    def for_user(cls):
+        # The schedule kept in the user's data folder, see test_acronym_appdata.
+        return cls(appdata.data_path(SCHEDULE_FILE))
+
+    def load(self):
+        # A schedule that can't be read, e.g. cut short or edited by hand, is set aside with a warning: studying starts over rather than failing.
+        import json
+        try:
+            with open(self.path) as schedule_file:
+                saved_cards = json.load(schedule_file)
+            self.cards = {key: Card(*fields) for key, fields in saved_cards.items()}
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, TypeError, AttributeError) as error:
+            import warnings
+            warnings.warn(f"could not read the schedule in {self.path}, starting a new one: {error}", stacklevel=2)
+            self.cards = {}
+
+    def save(self):
+        if self.path is None or not self.dirty:
+            return
+        import json
+        # Cards never answered are not worth saving.
+        saved_cards = {key: [card.interval, card.ease, card.repetitions, card.lapses, card.due]
+                       for key, card in self.cards.items() if card.due is not None}
+        appdata.write_atomic(self.path, json.dumps(
+            saved_cards, separators=(',', ':')).encode())
+        self.dirty = False
+
+    def card(self, key):
+        card = self.cards.get(key)
+        if card is None:
+            card = self.cards[key] = Card()
+        return card
+
+    def set_cards(self, keys):
+        '''
+            Study these case-folded acronyms, in this order among equals. Cards of other acronyms are kept but not scheduled.
+        '''
+        self._keys = list(keys)
+        self._heap = []
+        self._new = []
+        for index, key in enumerate(self._keys):
+            card = self.card(key)
+            if card.due is None:
+                self._new.append(index)
+            else:
+                self._heap.append(self._entry(index, card))
+        heapq.heapify(self._heap)
+        self._new.reverse()
+
+    def next_index(self):
+        '''
+            Take the card due first off the heap and return its position in the set_cards list, None when there are no cards. It stays off the heap until it is answered.
+        '''
+        while self._new and self.cards[self._keys[self._new[-1]]].due is not None:
+            # Answered while waiting, e.g. in review mode.
+            self._new.pop()
+        while self._heap and self.cards[self._keys[self._heap[0][2]]].seq != self._heap[0][1]:
+            # Rescheduled since this entry was pushed.
+            heapq.heappop(self._heap)
+
+        if self._heap and (self._heap[0][0] <= self.clock() or not self._new):
+            _due, _seq, index = heapq.heappop(self._heap)
+            self.cards[self._keys[index]].seq = -1
+            return index
+        if self._new:
+            return self._new.pop()
+        return None
+
+    def answer(self, index, correct):
+        '''
+            Reschedule the card at this position of the set_cards list.
+        '''
+        now = self.clock()
+        card = self.card(self._keys[index])
+        if correct:
+            card.repetitions += 1
+            if card.repetitions <= len(FIRST_INTERVALS):
+                card.interval = FIRST_INTERVALS[card.repetitions - 1]
+            else:
+                card.interval = round(card.interval * card.ease)
+            card.due = now + card.interval * DAY_SECONDS
+        else:
+            card.repetitions = 0
+            card.interval = 0
+            card.lapses += 1
+            card.ease = max(MIN_EASE, card.ease - LAPSE_EASE_PENALTY)
+            card.due = now + RELEARN_SECONDS
+        self.dirty = True
+        heapq.heappush(self._heap, self._entry(index, card))
+
+    def state_text(self, index):
+        # Short description of a card for the window: new, due or ahead (not due yet).
+        card = self.card(self._keys[index])
+        if card.due is None:
+            return 'new'
+        if card.due <= self.clock():
+            return 'due'
+        return 'ahead'
+
+    def _entry(self, index, card):
+        self._seq += 1
+        card.seq = self._seq
+        return (card.due, self._seq, index)
@@ -0,0 +1,494 @@
+import argparse
+import array
+import asyncio
+import http
+import json
+import random
+import sys
+import time
+import urllib.parse
+
+import test_acronym_formats as formats
+import test_acronym_results as scoring
+import test_acronym_session as session
+
+'''
+    Server mode: many students study over a small HTTP/JSON API from one process, instead of one tkinter process each.
+
+        python3 test_acronym_server.py --port 8080
+        python3 test_acronym_server.py --selftest 300      # 300 simulated students against a local server
+
+    Each deck combination (deck names and strict mode) is loaded and merged once, with the same loading and merge code as a Session, into a SharedDeck: read-only tuples that every student studying that combination shares. A student's StudentSession holds only what is theirs: a shuffled permutation of the deck's item numbers (2 or 4 bytes an item) and their results in a ResultsBitmap (2 bits an item), so hundreds of sessions fit in a little memory. At most MAX_SESSIONS are kept; idle ones are dropped after SESSION_IDLE_SECONDS to make room.
+
+    API (request and response bodies are JSON objects):
+        GET    /decks                      the decks that can be studied
+        POST   /sessions                   start a session: {"decks": [...], "strict": false, "seed": null}
+        GET    /sessions/ID                the session's state
+        DELETE /sessions/ID
+        POST   /sessions/ID/next           record the pending answer and move on, like the Next button
+        POST   /sessions/ID/prev
+        POST   /sessions/ID/toggle         flip the pending answer
+        POST   /sessions/ID/answer         {"correct": true|false}
+        POST   /sessions/ID/review         {"enabled": true|false}
+        POST   /sessions/ID/shuffle        start over in a new order
+        GET    /sessions/ID/score
+    Every session call answers with the session's state: the current acronym, its values and links, the pending answer, review mode and the score. Errors answer {"error": message} with a 4xx status.
+
+    Client is a small keep-alive client for tests and load runs.
+'''
+
+DEFAULT_PORT = 8080
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class SharedDeck:
+    '''
+        The merged items of one deck combination, read-only and shared by every session studying it. Item n is (keys[n], values[n], links[n]).
+    '''
+    __slots__ = ('deck_names', 'strict_mode', 'keys', 'values', 'links')
+
+    def __init__(self, deck_names, strict_mode):
+        self.deck_names = tuple(deck_names)
+        self.strict_mode = strict_mode
+        # The same load and merge as a Session; the builder is dropped once its items are copied out.
+        builder = session.Session(deck_names, strict_mode)
+        items = builder.process_duplicate_acronyms(
+            builder.load_and_sort(deck_names))
+        self.keys = tuple(item.key for item in items)
+        self.values = tuple(item.values for item in items)
+        self.links = tuple(item.links for item in items)
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class DeckLibrary:
+    '''
+        SharedDecks by (deck names, strict mode), each loaded once on a worker thread. Students asking for a combination while it loads wait for the same load.
+    '''
+
+    def __init__(self):
+        self._decks = {}  # (deck names, strict mode) -> future SharedDeck
+
+    def __len__(self):
+        return len(self._decks)
+
+    @staticmethod
+    def available_decks():
+        return [deck_name for deck_name in session.Session.ALL_CSV_FILES
+                if formats.find_source(deck_name) is not None]
+
+    async def get(self, deck_names, strict_mode):
+        # Only the shipped decks can be named, never arbitrary files.
+        unknown = set(deck_names) - set(self.available_decks())
+        if unknown:
+            raise HttpError(400, f"unknown decks: {', '.join(sorted(unknown))}")
+        key = (tuple(sorted(set(deck_names))), bool(strict_mode))
+        future = self._decks.get(key)
+        if future is None:
+            future = self._decks[key] = asyncio.ensure_future(
+                asyncio.to_thread(SharedDeck, *key))
+        try:
+            return await asyncio.shield(future)
+        except Exception:
+            # Let a later request try again, e.g. after a deck file is fixed.
+            if self._decks.get(key) is future:
+                del self._decks[key]
+            raise
+
+
+class StudentSession:
+    '''
+        One student's pass through a SharedDeck, with the same moves as a Session: next, prev, the pending answer, review mode and the score. Results are by position in this session's order.
+    '''
+    __slots__ = ('deck', 'order', 'results', 'index',
+                 'answer', 'review_mode', 'last_used')
+
+    CORRECT = scoring.ResultsTracker.CORRECT
+    INCORRECT = scoring.ResultsTracker.INCORRECT
+
+    def __init__(self, deck, rng):
+        self.deck = deck
+        self.last_used = time.monotonic()
+        self.shuffle(rng)
+
+    def shuffle(self, rng):
+        # Item numbers fit in 2 bytes for all but huge decks.
+        self.order = array.array('H' if len(self.deck) <= 0xFFFF else 'I',
+                                 range(len(self.deck)))
+        rng.shuffle(self.order)
+        self.results = scoring.ResultsBitmap(len(self.deck))
+        self.index = 0
+        self.review_mode = False
+        self.update_answer()
+
+    def memory_size(self):
+        # Bytes held by this session alone, not counting the shared deck.
+        return (sys.getsizeof(self) + sys.getsizeof(self.order) + sys.getsizeof(self.results)
+                + sys.getsizeof(self.results.tested) + sys.getsizeof(self.results.correct))
+
+    def move_to(self, index):
+        # Wraps around, like Session.set_current_item_index.
+        self.index = index % len(self.order) if self.order else 0
+
+    def next_item(self):
+        self.record_answer()
+        if self.order:
+            self.results.commit(self.answer)
+        if self.review_mode:
+            index = self.results.next_incorrect(self.index)
+            if index is not None:
+                self.move_to(index)
+        else:
+            self.move_to(self.index + 1)
+        self.update_answer()
+
+    def prev_item(self):
+        if self.review_mode:
+            index = self.results.prev_incorrect(self.index)
+            if index is not None:
+                self.move_to(index)
+        else:
+            self.move_to(self.index - 1)
+            self.update_answer()
+
+    def set_answer(self, answer):
+        self.answer = answer
+        self.record_answer()
+
+    def record_answer(self):
+        if not self.order:
+            return
+        self.results.set(self.index, self.answer)
+        if not self.results.has_incorrect():
+            self.review_mode = False
+
+    def update_answer(self):
+        # CORRECT unless the item was already missed.
+        current_result = self.results[self.index] if self.order else None
+        self.answer = self.INCORRECT if current_result == self.INCORRECT else self.CORRECT
+
+    def set_review_mode(self, enabled):
+        self.review_mode = enabled and self.results.has_incorrect()
+        first_incorrect_index = self.results.next_incorrect(-1)
+        if first_incorrect_index is not None:
+            self.move_to(first_incorrect_index)
+            self.answer = self.INCORRECT
+
+    def score(self):
+        return {
+            'correct': self.results.correct_count,
+            'incorrect': self.results.incorrect_count,
+            'untested': self.results.untested_count,
+            'streak': self.results.streak,
+            'best_streak': self.results.best_streak,
+            'text': self.results.score_text(),
+        }
+
+    def state(self):
+        state = {'index': self.index, 'count': len(self.order), 'answer': self.answer,
+                 'review': self.review_mode, 'score': self.score()}
+        if self.order:
+            item = self.order[self.index]
+            state.update(itemkey=self.deck.keys[item], itemvalues=self.deck.values[item],
+                         itemlinks=self.deck.links[item])
+        return state
+
+
+class AcronymServer:
+    MAX_SESSIONS = 1000
+    SESSION_IDLE_SECONDS = 2 * 60 * 60
+    MAX_BODY_BYTES = 64 * 1024
+    MAX_HEAD_BYTES = 16 * 1024
+
+    def __init__(self, library=None, rng=None):
+        self.library = library or DeckLibrary()
+        self.random = rng or random.Random()
+        # session id -> StudentSession, least recently used first
+        self.sessions = {}
+        self.request_count = 0
+
+    async def start(self, host='127.0.0.1', port=DEFAULT_PORT):
+        return await asyncio.start_server(self.handle_connection, host, port, limit=self.MAX_HEAD_BYTES)
+
+    async def handle_connection(self, reader, writer):
+        # One connection can carry many requests (HTTP/1.1 keep-alive).
+        try:
+            keep_alive = True
+            while keep_alive:
+                request = None
+                try:
+                    request = await self.read_request(reader)
+                    if request is None:
+                        break
+                    method, path, body, keep_alive = request
+                    status, payload = 200, await self.dispatch(method, path, body)
+                except HttpError as error:
+                    status, payload = error.status, {'error': str(error)}
+                    # After a request that could not be read, the stream is out of step.
+                    keep_alive = keep_alive and request is not None
+                except Exception as error:
+                    # e.g. a deck file that can't be parsed
+                    status, payload, keep_alive = 500, {'error': str(error)}, False
+                self.request_count += 1
+                data = json.dumps(payload, separators=(',', ':')).encode()
+                writer.write(f"HTTP/1.1 {status} {http.HTTPStatus(status).phrase}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        '''
+            Return (method, path, body bytes, keep alive), or None when the client has closed the connection.
+        '''
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise HttpError(431, 'request head too large')
+        request_line, *header_lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = request_line.split(' ')
+        except ValueError:
+            raise HttpError(400, 'bad request line')
+        headers = {}
+        for header_line in header_lines:
+            name, _, value = header_line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        try:
+            body_size = int(headers.get('content-length', 0))
+        except ValueError:
+            raise HttpError(400, 'bad Content-Length')
+        if body_size < 0:
+            raise HttpError(400, 'bad Content-Length')
+        if body_size > self.MAX_BODY_BYTES:
+            raise HttpError(413, 'request body too large')
+        body = await reader.readexactly(body_size) if body_size else b''
+        connection = headers.get('connection', '').lower()
+        keep_alive = connection == 'keep-alive' if version == 'HTTP/1.0' else connection != 'close'
+        return method.upper(), urllib.parse.urlsplit(target).path, body, keep_alive
+
+    async def dispatch(self, method, path, body):
+        try:
+            arguments = json.loads(body) if body else {}
+        except ValueError:
+            raise HttpError(400, 'body is not JSON')
+        if not isinstance(arguments, dict):
+            raise HttpError(400, 'body must be a JSON object')
+
+        match method, path.strip('/').split('/'):
+            case 'GET', ['decks']:
+                return {'decks': self.library.available_decks()}
+            case 'POST', ['sessions']:
+                return await self.create_session(arguments)
+            case 'GET', ['sessions', session_id]:
+                return self.state(session_id)
+            case 'DELETE', ['sessions', session_id]:
+                self.find_session(session_id)
+                del self.sessions[session_id]
+                return {'deleted': session_id}
+            case 'GET', ['sessions', session_id, 'score']:
+                return self.find_session(session_id).score()
+            case 'POST', ['sessions', session_id, action]:
+                self.session_action(self.find_session(session_id), action, arguments)
+                return self.state(session_id)
+            case _, ['decks'] | ['sessions', *_]:
+                raise HttpError(405, f"{method} not allowed on {path}")
+        raise HttpError(404, f"no such resource: {path}")
+
+    async def create_session(self, arguments):
+        deck_names = arguments.get('decks') or self.library.available_decks()
+        if not isinstance(deck_names, list) or not all(isinstance(deck_name, str) for deck_name in deck_names):
+            raise HttpError(400, 'decks must be a list of deck names')
+        seed = arguments.get('seed')
+        if seed is not None and not isinstance(seed, int):
+            raise HttpError(400, 'seed must be an integer')
+        deck = await self.library.get(deck_names, bool(arguments.get('strict')))
+        self.make_room()
+        session_id = f"{self.random.getrandbits(64):016x}"
+        self.sessions[session_id] = StudentSession(
+            deck, random.Random(seed) if seed is not None else self.random)
+        return self.state(session_id)
+
+    def make_room(self):
+        # Drop sessions idle too long, least recently used first; refuse a new one if all are in use.
+        idle_before = time.monotonic() - self.SESSION_IDLE_SECONDS
+        for session_id, student in list(self.sessions.items()):
+            if student.last_used >= idle_before:
+                break
+            del self.sessions[session_id]
+        if len(self.sessions) >= self.MAX_SESSIONS:
+            raise HttpError(503, 'too many sessions, try again later')
+
+    def find_session(self, session_id):
+        student = self.sessions.pop(session_id, None)
+        if student is None:
+            raise HttpError(404, f"no such session: {session_id}")
+        # Re-inserting keeps the dictionary in least recently used order.
+        self.sessions[session_id] = student
+        student.last_used = time.monotonic()
+        return student
+
+    def state(self, session_id):
+        return {'session': session_id} | self.find_session(session_id).state()
+
+    def session_action(self, student, action, arguments):
+        match action:
+            case 'next':
+                student.next_item()
+            case 'prev':
+                student.prev_item()
+            case 'toggle':
+                student.set_answer(student.INCORRECT if student.answer ==
+                                   student.CORRECT else student.CORRECT)
+            case 'answer':
+                if not isinstance(arguments.get('correct'), bool):
+                    raise HttpError(400, 'correct must be true or false')
+                student.set_answer(arguments['correct'])
+            case 'review':
+                student.set_review_mode(bool(arguments.get('enabled', True)))
+            case 'shuffle':
+                student.shuffle(self.random)
+            case _:
+                raise HttpError(404, f"no such action: {action}")
+
+
+class Client:
+    '''
+        A small HTTP/JSON client for the server, keeping one connection open.
+
+            client = Client('127.0.0.1', 8080)
+            state = await client.request('POST', '/sessions', {'decks': ['A+ acronyms']})
+            state = await client.request('POST', f"/sessions/{state['session']}/next")
+            await client.close()
+    '''
+
+    def __init__(self, host='127.0.0.1', port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method, path, payload=None):
+        '''
+            Return the decoded JSON answer. A 4xx or 5xx status raises HttpError.
+        '''
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode() if payload is not None else b''
+        self._writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                           f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self._writer.drain()
+        head = (await self._reader.readuntil(b'\r\n\r\n')).decode('latin-1')
+        status_line, *header_lines = head.split('\r\n')
+        status = int(status_line.split(' ', 2)[1])
+        headers = {}
+        for header_line in header_lines:
+            name, _, value = header_line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+        answer = json.loads(await self._reader.readexactly(int(headers['content-length'])))
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        if status >= 400:
+            raise HttpError(status, answer.get('error', ''))
+        return answer
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._reader = self._writer = None
+
+
+async def simulate_student(client, deck_names, answers, miss_rate, rng):
+    '''
+        Study like CLI --simulate does: answer up to answers items, missing each with probability miss_rate, then review the misses until none are left. Returns the number of requests made.
+    '''
+    state = await client.request('POST', '/sessions', {'decks': deck_names})
+    path = f"/sessions/{state['session']}"
+    request_count = 1
+    for _ in range(min(answers, state['count'])):
+        if rng.random() < miss_rate:
+            await client.request('POST', f"{path}/answer", {'correct': False})
+            request_count += 1
+        state = await client.request('POST', f"{path}/next")
+        request_count += 1
+    state = await client.request('POST', f"{path}/review", {'enabled': True})
+    request_count += 1
+    while state['review']:
+        await client.request('POST', f"{path}/answer", {'correct': True})
+        state = await client.request('POST', f"{path}/next")
+        request_count += 2
+    await client.request('GET', f"{path}/score")
+    return request_count + 1
+
+
+async def selftest(student_count, deck_names, answers, miss_rate, seed):
+    server = AcronymServer(rng=random.Random(seed))
+    listener = await server.start('127.0.0.1', 0)
+    port = listener.sockets[0].getsockname()[1]
+    rng = random.Random(seed)
+    clients = [Client('127.0.0.1', port) for _ in range(student_count)]
+    started = time.perf_counter()
+    request_counts = await asyncio.gather(*(
+        simulate_student(client, deck_names, answers, miss_rate, random.Random(rng.random()))
+        for client in clients))
+    elapsed = time.perf_counter() - started
+    session_bytes = [student.memory_size() for student in server.sessions.values()]
+    for client in clients:
+        await client.close()
+    listener.close()
+    await listener.wait_closed()
+    print(f"{student_count} students, {sum(request_counts)} requests in {elapsed:.3f}s: "
+          f"{sum(request_counts) / elapsed:.0f} requests/s")
+    print(f"{len(server.library)} shared deck(s), {max(session_bytes, default=0)} bytes per session at most")
+
+
+async def serve(host, port):
+    listener = await AcronymServer().start(host, port)
+    print(f"Serving on http://{host}:{port}", file=sys.stderr)
+    async with listener:
+        await listener.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Serve Acronym Tester sessions over HTTP/JSON.')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='address to listen on')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--selftest', type=int, metavar='STUDENTS',
+                        help='run this many simulated students against a local server and report throughput')
+    parser.add_argument('--deck', action='append', dest='decks',
+                        help='deck for --selftest students; repeat for several decks (default: all shipped decks)')
+    parser.add_argument('--answers', type=int, default=50,
+                        help='answers per simulated student')
+    parser.add_argument('--miss-rate', type=float, default=0.2,
+                        help='chance of a wrong answer for a simulated student')
+    parser.add_argument('--seed', type=int,
+                        help='random seed for a repeatable --selftest')
+    args = parser.parse_args(argv)
+
+    try:
+        if args.selftest:
+            asyncio.run(selftest(args.selftest, args.decks or DeckLibrary.available_decks(),
+                                 args.answers, args.miss_rate, args.seed))
+        else:
+            asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
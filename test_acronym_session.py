@@ -0,0 +1,664 @@
+import itertools
+import random
+
+import test_acronym_cache as deck_cache
+import test_acronym_deck as deck
+import test_acronym_results as scoring
+import test_acronym_snapshot as snapshot
+import test_acronym_timing as timing
+
+'''
+    Headless test session. Everything the Acronym Tester does apart from drawing widgets lives here: loading decks, strict mode, merging duplicate acronyms, the length filter, shuffling, next/previous, review mode, manual entry lookups and scoring. The tkinter window (test_acronyms.AcronymTester) and the terminal driver (test_acronym_cli) are both thin views over a Session, and a Session can be run and timed without a display.
+
+    A Session never calls back into its view. After calling a method, the view reads the public state it needs:
+        current_item, current_item_index, active_items   what to show
+        answer                                           the pending CORRECT/INCORRECT for the current item
+        review_mode, results                             review mode and the score
+        spaced_mode                                      spaced repetition, see test_acronym_schedule
+        typed_mode                                       typed answers, graded by answer_typed(), see test_acronym_answers
+        reverse_mode                                     the current item's itemvalues are the question, reverse_answers() the answer
+        port_filter                                      a test_acronym_ports.PortQuery limiting active_items, or None
+        item_filter                                      a test_acronym_filters.Filter limiting active_items, or None
+
+    With a progress store (test_acronym_progress), every answer is also logged to the answer history, once, when Next commits it, and review mode starts from the acronyms missed in the last HISTORY_DAYS days as well as this run's misses.
+
+    A session can be saved and picked up again with test_acronym_snapshot; restore_snapshot() rebuilds one from a snapshot.
+
+    In spaced repetition mode Next asks the scheduler for the card due first instead of stepping through the shuffled list, and every recorded answer reschedules the current card.
+
+    What only one mode needs is imported and built on first use: the value index (reverse mode), the port index (port queries), the filter bitmaps, the scheduler and the answer key. A session that never uses them, e.g. a server's, never pays for them.
+'''
+
+
+class Session:
+    CORRECT = scoring.ResultsTracker.CORRECT
+    INCORRECT = scoring.ResultsTracker.INCORRECT
+    UNTESTED = scoring.ResultsTracker.UNTESTED
+
+    ITEM_KEY = deck.ITEM_KEY
+    ITEM_VALUES = deck.ITEM_VALUES
+    ITEM_LINKS = deck.ITEM_LINKS
+
+    # Constant containing all possible csv file names.
+    ALL_CSV_FILES = [
+        'A+ acronyms',
+        'Network+ N10-009 acronyms',
+        'Network ports',
+    ]
+
+    # How far back review mode looks in the answer history.
+    HISTORY_DAYS = 7
+
+    # Shared by all sessions, so an order_version is never reused.
+    _order_versions = itertools.count()
+
+    def __init__(self, csv_file_names=(), strict_mode=False, rng=None, scheduler=None, progress=None, typed_mode=False):
+        # Runtime subset of all csv files.
+        self.current_cvs_files = set(csv_file_names)
+        self.strict_mode = strict_mode
+        self.random = rng or random.Random()
+
+        self.merger = deck.DeckMerger(strict_mode)
+        # deck name -> SHA-1 of the content loaded, to tell when a snapshot is out of date
+        self.deck_digests = {}
+        # Each item remembers its position in all_items, for removing items when a deck is unchecked
+        self.all_items = []
+        # acronym length -> items
+        self.length_index = deck.LengthIndex()
+        # case-insensitive acronym lookup and completions for manual entry
+        self.key_index = deck.KeyIndex()
+        # itemvalue words -> acronyms, for manual entry in reverse mode; see value_index
+        self._value_index = None
+        # (protocol, port) -> acronyms, for ports decks; see port_index
+        self._port_index = None
+        # Changes whenever all_items changes order.
+        self.order_version = next(self._order_versions)
+        # Filter term bitmaps over all_items positions, rebuilt when order_version changes; see bitmaps
+        self._bitmaps = None
+
+        self.acronym_length = 0
+        self.port_filter = None
+        self.item_filter = None
+        self.active_items = []
+        self.current_item_index = -1
+        self.current_item = None
+        self.manual_entry_mode_enabled = False
+
+        # Keep a list of None/0/1 to note untried/incorrect/correct for each item.
+        # The results list is the same length as the active items list.
+        # The tracker also keeps the score counters and the incorrect positions.
+        self.results = scoring.ResultsTracker()
+        # The user's judgment of the current item, recorded when they move on.
+        self.answer = self.CORRECT
+        self.review_mode = False
+
+        # Spaced repetition. The scheduler's cards are in memory only unless one with a file is passed in.
+        self._scheduler = scheduler
+        self.spaced_mode = False
+        # Answer history, or None to keep no history.
+        self.progress = progress
+        # Typed answers. The answer key is built with the decks in typed mode, otherwise on the first typed answer.
+        self.typed_mode = typed_mode
+        self.answer_key = None
+        # Show the expansion, ask for the acronym.
+        self.reverse_mode = False
+
+    @property
+    def value_index(self):
+        # Built from the merged decks on first use, then kept in step with deck changes.
+        if self._value_index is None:
+            self._value_index = deck.ValueIndex(self.merger)
+            for source in self.merger.sources():
+                self._value_index.add_rows(self.merger.source_rows(source))
+        return self._value_index
+
+    @property
+    def port_index(self):
+        # Built from the merged decks on first use, then kept in step with deck changes.
+        if self._port_index is None:
+            import test_acronym_ports as ports
+            self._port_index = ports.PortIndex(self.merger)
+            for source in self.merger.sources():
+                self._port_index.add_rows(self.merger.source_rows(source))
+        return self._port_index
+
+    @property
+    def bitmaps(self):
+        if self._bitmaps is None:
+            import test_acronym_filters as filters
+            self._bitmaps = filters.Bitmaps(self)
+        return self._bitmaps
+
+    @property
+    def scheduler(self):
+        if self._scheduler is None:
+            import test_acronym_schedule as schedule
+            self._scheduler = schedule.Scheduler()
+        return self._scheduler
+
+    @scheduler.setter
+    def scheduler(self, scheduler):
+        self._scheduler = scheduler
+
+    # Loading and merging
+
+    @timing.timed('load_and_sort')
+    def load_and_sort(self, csv_file_names=[]):
+        '''
+            Return a dictionary of raw rows from each cvs file: {file_name: ((itemkey, itemvalue, itemlink, strict), ...)}. It might contain duplicate acronyms.
+            Each file comes pre-sorted from its compiled deck cache; process_duplicate_acronyms does not need the rows sorted across files.
+        '''
+        return {file_name: deck_cache.load_deck(file_name)
+                for file_name in csv_file_names}
+
+    @timing.timed('strict_mode_filter')
+    def strict_mode_filter(self):
+        '''
+            Apply the current strict mode to the merged items. Only acronyms that have non-strict rows are rebuilt.
+        '''
+        added_items, removed_items = self.merger.set_strict_mode(
+            self.strict_mode)
+        self.apply_item_changes(added_items, removed_items)
+
+    @timing.timed('process_duplicate_acronyms')
+    def process_duplicate_acronyms(self, raw_rows_by_file):
+        '''
+            Returns a list of converted dictionaries:
+                All acronyms are unique.
+                Value(s) and link(s) for each acronym are in lists with one or more elements.
+            The raw rows are merged in a single pass, in any order. The merger is kept so decks can be added and removed later. See test_acronym_deck.
+        '''
+        self.merger = deck.DeckMerger(self.strict_mode)
+        self._value_index = self._port_index = None
+        for file_name, raw_rows in raw_rows_by_file.items():
+            self.merger.add_source(file_name, raw_rows)
+        return self.merger.items()
+
+    @timing.timed('start_test')
+    def start_test(self, raw_rows_by_file=None):
+        # raw_rows_by_file can be passed in when the decks were already loaded, e.g. on loader threads.
+        if raw_rows_by_file is None:
+            raw_rows_by_file = self.load_and_sort(self.current_cvs_files)
+        self.merge_decks(raw_rows_by_file)
+        self.shuffle()
+
+    def merge_decks(self, raw_rows_by_file):
+        self.all_items = self.process_duplicate_acronyms(raw_rows_by_file)
+        self.key_index = deck.KeyIndex(self.all_items)
+        self.answer_key = self.build_answer_key() if self.typed_mode else None
+        self.deck_digests = {file_name: deck_cache.deck_digest(file_name)
+                             for file_name in raw_rows_by_file}
+
+    @timing.timed('restore_snapshot')
+    def restore_snapshot(self, saved, raw_rows_by_file=None):
+        '''
+            Pick up a session saved with test_acronym_snapshot: its decks, item order, settings, score and current item. raw_rows_by_file can be passed in when the decks were already loaded, e.g. on loader threads.
+            Returns True if restored. If a deck changed since the snapshot was taken, the test starts over in a new order with the snapshot's decks and settings, and False is returned.
+        '''
+        self.current_cvs_files = set(saved.deck_names)
+        self.strict_mode = saved.strict_mode
+        self.typed_mode = saved.typed_mode
+        self.reverse_mode = saved.reverse_mode
+        if raw_rows_by_file is None:
+            raw_rows_by_file = self.load_and_sort(saved.deck_names)
+        self.merge_decks(raw_rows_by_file)
+        self.acronym_length = saved.acronym_length
+        self.port_filter = None
+        if saved.port_filter:
+            import test_acronym_ports as ports
+            self.port_filter = ports.parse_query(saved.port_filter)
+        self.item_filter = None
+        if saved.item_filter:
+            import test_acronym_filters as filters
+            try:
+                self.item_filter = filters.parse_filter(saved.item_filter).pin(saved.item_filter_keys)
+            except filters.FilterError:
+                pass
+        self.spaced_mode = saved.spaced_mode
+
+        if not self._restore_order(saved):
+            self.shuffle()
+            return False
+        self.results.restore([snapshot.RESULTS[code] for code in saved.results],
+                             saved.streak, saved.best_streak)
+        self.set_current_item_index(saved.current_index)
+        if self.spaced_mode:
+            # Schedule again without taking a card off the heap: the current card is the one being answered.
+            self.scheduler.set_cards(
+                item.folded_key for item in self.active_items)
+        self.answer = saved.answer
+        self.review_mode = saved.review_mode and self.results.has_incorrect()
+        return True
+
+    def _restore_order(self, saved):
+        # Put all_items, and the active length bucket, back in the saved order. False if the snapshot does not fit these decks.
+        order = saved.order
+        item_count = len(self.all_items)
+        if ([self.deck_digests[deck_name] for deck_name in saved.deck_names] != saved.deck_digests
+                or len(order) != item_count or (item_count and max(order) >= item_count)
+                or len(set(order)) != item_count):
+            return False
+        sorted_items = self.merger.sorted_items()
+        self.all_items = [sorted_items[rank] for rank in order]
+        for position, item in enumerate(self.all_items):
+            item.position = position
+
+        active_items = [self.all_items[position]
+                        for position in saved.active_positions if position < item_count]
+        if self.acronym_length and self.port_filter is None and self.item_filter is None:
+            # The active bucket is filled in its saved order, the other buckets in all_items order.
+            active_set = set(active_items)
+            if len(active_set) != len(saved.active_positions):
+                return False
+            self.length_index = deck.LengthIndex(itertools.chain(
+                active_items, (item for item in self.all_items if item not in active_set)))
+            if list(self.length_index.items(self.acronym_length)) != active_items:
+                return False
+        else:
+            self.length_index = deck.LengthIndex(self.all_items)
+        self.items_changed()
+        if self.item_filter is not None:
+            # missed and correct depend on the score, which is not back yet; the saved items are the ones filtered.
+            if len(set(active_items)) != len(saved.active_positions):
+                return False
+            self.active_items = active_items
+        elif self.port_filter is not None and self.active_items != active_items:
+            # Port filters list items in port order, which only changes with the decks.
+            return False
+        return len(self.active_items) == len(saved.results)
+
+    def keep_settings(self, old_session):
+        '''
+            Carry over the user's strict mode, length, port and item filters, spaced repetition schedule, answer history, typed and reverse modes from the session this one replaces, e.g. one built on a test_acronym_loader thread while the user kept clicking.
+        '''
+        if old_session.strict_mode != self.strict_mode:
+            self.set_strict_mode(old_session.strict_mode)
+        if old_session.acronym_length and self.length_index.items(old_session.acronym_length):
+            self.set_acronym_length(old_session.acronym_length)
+        if old_session.port_filter is not None and self.port_index.items(old_session.port_filter, limit=1):
+            self.set_port_filter(old_session.port_filter)
+        if old_session.item_filter is not None:
+            self.set_item_filter(old_session.item_filter)
+        self._scheduler = old_session._scheduler
+        self.progress = old_session.progress
+        if old_session.spaced_mode:
+            self.set_spaced_mode(True)
+        if old_session.typed_mode and not self.typed_mode:
+            self.set_typed_mode(True)
+        self.reverse_mode = old_session.reverse_mode
+
+    @timing.timed('shuffle')
+    def shuffle(self):
+        # Start over with the same decks in a new random order.
+        self.random.shuffle(self.all_items)
+        for position, item in enumerate(self.all_items):
+            item.position = position
+        self.length_index = deck.LengthIndex(self.all_items)
+        self.items_changed()
+
+    def apply_item_changes(self, added_items, removed_items):
+        '''
+            Update all_items with the items a deck change added or removed, without touching the rest. Added items land at random positions, so all_items stays shuffled.
+        '''
+        for item in removed_items:
+            self.length_index.remove(item)
+            self.key_index.remove(item)
+            last_item = self.all_items.pop()
+            if last_item is not item:
+                self.all_items[item.position] = last_item
+                last_item.position = item.position
+        for item in added_items:
+            position = self.random.randrange(len(self.all_items) + 1)
+            self.all_items.append(item)
+            moved_item = self.all_items[position]
+            self.all_items[position], self.all_items[-1] = item, moved_item
+            moved_item.position = len(self.all_items) - 1
+            item.position = position
+            self.length_index.add(item)
+            self.key_index.add(item)
+        self.items_changed()
+
+    def items_changed(self):
+        self.order_version = next(self._order_versions)
+        # Try to keep the same length choice and port filter
+        if not self.length_index.items(self.acronym_length):
+            self.acronym_length = 0
+        if self.port_filter is not None and not self.port_index.items(self.port_filter, limit=1):
+            self.port_filter = None
+        self.filter_items_and_show_first()
+
+    def enable_csv_file(self, file_name, enable, raw_rows=None):
+        # Only the checked or unchecked deck is loaded and merged.
+        # raw_rows can be passed in when they were already loaded, e.g. on a loader thread.
+        if enable:
+            self.current_cvs_files.add(file_name)
+            if raw_rows is None:
+                raw_rows = self.load_and_sort([file_name])[file_name]
+            self.deck_digests[file_name] = deck_cache.deck_digest(file_name)
+            if self.answer_key is not None:
+                self.answer_key.add_values(row[deck.ROW_VALUE] for row in raw_rows)
+            # The merger replaces a deck loaded again; so do the value and port indexes.
+            self.reindex_rows(self.merger.source_rows(file_name), raw_rows)
+            added_items, removed_items = self.merger.add_source(
+                file_name, raw_rows)
+        elif file_name in self.current_cvs_files:
+            self.current_cvs_files.remove(file_name)
+            self.reindex_rows(self.merger.source_rows(file_name), ())
+            added_items, removed_items = self.merger.remove_source(file_name)
+            self.deck_digests.pop(file_name, None)
+        else:
+            return
+        self.apply_item_changes(added_items, removed_items)
+
+    def reindex_rows(self, old_rows, new_rows):
+        # Keep the value and port indexes in step with a deck change, once they are built.
+        for index in (self._value_index, self._port_index):
+            if index is not None:
+                index.remove_rows(old_rows)
+                index.add_rows(new_rows)
+
+    def set_strict_mode(self, use_strict_mode):
+        self.strict_mode = use_strict_mode
+        self.strict_mode_filter()
+
+    # Length filter
+
+    def scan_items_for_acronym_lengths(self):
+        # Read the acronym lengths and item counts from the length index.
+        # [(0, all items count), (length, count), ...]
+        return self.length_index.counts()
+
+    def set_acronym_length(self, length):
+        self.acronym_length = length
+        self.filter_items_and_show_first()
+
+    def filter_items_and_show_first(self):
+        # build the filtered list of items and make the first one current
+        if self.port_filter is not None:
+            self.active_items = self.port_index.items(
+                self.port_filter, self.acronym_length)
+            if self.item_filter is not None:
+                self.active_items = self.bitmaps.select(
+                    self.item_filter.mask(self.bitmaps), self.active_items)
+        elif self.item_filter is not None:
+            self.active_items = self.bitmaps.items(
+                self.item_filter.mask(self.bitmaps), self.acronym_length)
+        elif self.acronym_length == 0:
+            self.active_items = list(self.all_items)
+        else:
+            self.active_items = list(
+                self.length_index.items(self.acronym_length))
+        self.manual_entry_mode_enabled = False
+        if self.spaced_mode:
+            self.scheduler.set_cards(
+                item.folded_key for item in self.active_items)
+            self.set_current_item_index(self.scheduler.next_index() or 0)
+        else:
+            self.set_current_item_index(0)
+        self.reset_score()
+
+    def set_port_filter(self, query):
+        # Only acronyms naming a port the test_acronym_ports.PortQuery matches, in port order; None for all.
+        self.port_filter = query
+        self.filter_items_and_show_first()
+
+    def set_item_filter(self, item_filter):
+        '''
+            Only acronyms the test_acronym_filters.Filter matches, in all_items order; None for all. Returns how many match, which can be none.
+        '''
+        # missed and correct are resolved against the score now, before filtering starts it over.
+        self.item_filter = item_filter.resolve(self.bitmaps) if item_filter is not None else None
+        self.filter_items_and_show_first()
+        return len(self.active_items)
+
+    # Navigation
+
+    def set_current_item_index(self, value):
+        self.current_item_index = value
+        if self.current_item_index >= len(self.active_items):
+            self.current_item_index = 0
+        elif self.current_item_index < 0:
+            self.current_item_index = len(self.active_items) - 1
+
+        try:
+            self.current_item = self.active_items[self.current_item_index]
+        except IndexError:
+            self.current_item = None
+
+    def next_item(self):
+        self.set_manual_entry_mode(False)
+        self.update_current_item_result()
+        if len(self.results):
+            self.results.commit(self.answer)
+        self.log_answer()
+
+        if self.spaced_mode and self.active_items:
+            self.scheduler.answer(self.current_item_index,
+                                  self.answer == self.CORRECT)
+
+        if self.review_mode:
+            index = self.get_next_incorrect_index(self.current_item_index)
+            if index is not None:
+                self.set_current_item_index(index)
+        elif self.spaced_mode:
+            index = self.scheduler.next_index()
+            if index is not None:
+                self.set_current_item_index(index)
+        else:
+            self.set_current_item_index(self.current_item_index + 1)
+
+        self.update_answer()
+
+    def prev_item(self):
+        self.set_manual_entry_mode(False)
+        if self.spaced_mode and not self.review_mode:
+            # Cards already answered have been rescheduled; there is no going back.
+            return
+        if self.review_mode:
+            index = self.get_prev_incorrect_index(self.current_item_index)
+            if index is not None:
+                self.set_current_item_index(index)
+        else:
+            self.set_current_item_index(self.current_item_index - 1)
+            self.update_answer()
+
+    def get_next_incorrect_index(self, cur_index):
+        return self.results.next_incorrect(cur_index)
+
+    def get_prev_incorrect_index(self, cur_index):
+        return self.results.prev_incorrect(cur_index)
+
+    # Manual entry
+
+    def manual_entry(self, key, limit=8):
+        '''
+            Look up an acronym typed by the user, ignoring case, within the current length filter. It does not affect the current index. Prev/Next will continue as if the manual entry did not occur.
+            Text that is no acronym but a port query (see test_acronym_ports) finds the acronyms naming those ports, in port order.
+            In reverse mode the text is words of an expansion instead, and the item is the first acronym with them all.
+            Returns (item or None, [completion items]).
+        '''
+        self.set_manual_entry_mode(True)
+        if self.reverse_mode:
+            matches = self.value_index.search(key, self.acronym_length, limit + 1)
+            if not matches:
+                return None, []
+            self.current_item = matches[0]
+            return matches[0], matches[1:]
+        item = self.key_index.find(key, self.acronym_length)
+        port_query = None
+        if item is None:
+            import test_acronym_ports as ports
+            port_query = ports.parse_query(key)
+        if port_query is not None:
+            matches = self.port_index.items(port_query, self.acronym_length, limit + 1)
+            if matches:
+                self.current_item = matches[0]
+                return matches[0], matches[1:]
+        if item is not None:
+            self.current_item = item
+        completions = self.key_index.complete(
+            key, self.acronym_length, limit) if key else []
+        return item, [completion for completion in completions if completion is not item]
+
+    def set_manual_entry_mode(self, enabled):
+        self.manual_entry_mode_enabled = enabled
+        if not enabled:
+            self.set_current_item_index(self.current_item_index)
+
+    # Scoring and review mode
+
+    def set_answer(self, answer):
+        self.answer = answer
+        self.update_current_item_result()
+
+    def toggle_answer(self):
+        self.set_answer(self.INCORRECT if self.answer ==
+                        self.CORRECT else self.CORRECT)
+
+    def update_current_item_result(self):
+        if len(self.results) == 0:
+            return
+        self.results.set(self.current_item_index, self.answer)
+        if not self.results.has_incorrect():
+            self.review_mode = False
+
+    def log_answer(self):
+        # One history event per answer: Next commits the pending answer, however often it was flipped, and answering an item again logs it again.
+        if self.progress is None or len(self.results) == 0:
+            return
+        item = self.active_items[self.current_item_index]
+        self.progress.record(self.merger.source_of(item) or '', item.folded_key,
+                             self.answer == self.CORRECT)
+
+    def update_answer(self):
+        # Item result defaults to CORRECT unless it is already INCORRECT
+        current_result = self.results[self.current_item_index] if len(
+            self.results) > 0 else self.UNTESTED
+        self.answer = self.INCORRECT if current_result == self.INCORRECT else self.CORRECT
+
+    def set_review_mode(self, enabled):
+        if enabled:
+            self.seed_review_from_history()
+        self.review_mode = enabled and self.results.has_incorrect()
+        first_incorrect_index = self.get_next_incorrect_index(-1)
+        if first_incorrect_index is not None:
+            self.set_current_item_index(first_incorrect_index)
+            self.answer = self.INCORRECT
+
+    def seed_review_from_history(self, days=None):
+        '''
+            Mark active items missed in the last days (default HISTORY_DAYS) as INCORRECT, unless already tested in this run, so review mode includes them. Returns how many were marked.
+        '''
+        if self.progress is None:
+            return 0
+        return self.seed_review(self.progress.missed_keys(days or self.HISTORY_DAYS))
+
+    def seed_review(self, keys):
+        '''
+            Mark the active items with these acronyms (case-folded) as INCORRECT, unless already tested in this run, so review mode includes them. Returns how many were marked.
+        '''
+        marked_count = 0
+        # Port and item filters' items have no slot to look up.
+        filter_slots = ({item: index for index, item in enumerate(self.active_items)}
+                        if self.port_filter is not None or self.item_filter is not None else None)
+        for key in keys:
+            item = self.key_index.find(key, self.acronym_length)
+            if item is None:
+                continue
+            # active_items is all_items, or one length bucket, as of the last filter.
+            if filter_slots is not None:
+                index = filter_slots.get(item)
+                if index is None:
+                    continue
+            else:
+                index = item.length_slot if self.acronym_length else item.position
+            if self.active_items[index] is item and self.results[index] == self.UNTESTED:
+                self.results.set(index, self.INCORRECT)
+                marked_count += 1
+        return marked_count
+
+    def review_keys(self, keys):
+        # Review mode over these acronyms, e.g. the hardest ones found by test_acronym_analytics, as well as the usual misses.
+        self.seed_review(keys)
+        self.set_review_mode(True)
+
+    def set_spaced_mode(self, enabled):
+        # Only the order changes: the same active items keep their results. On, the card due first becomes current; off, Next steps on through the shuffled list from the current card.
+        self.spaced_mode = enabled
+        self.set_manual_entry_mode(False)
+        if enabled:
+            self.scheduler.set_cards(
+                item.folded_key for item in self.active_items)
+            if not self.review_mode:
+                self.set_current_item_index(self.scheduler.next_index() or 0)
+        self.update_answer()
+
+    # Typed answers
+
+    def set_typed_mode(self, enabled):
+        self.typed_mode = enabled
+        if enabled and self.answer_key is None:
+            self.answer_key = self.build_answer_key()
+
+    def build_answer_key(self):
+        # Every itemvalue of the loaded decks, normalized once.
+        import test_acronym_answers as answers
+        return answers.AnswerKey(row[deck.ROW_VALUE] for source in self.merger.sources()
+                                 for row in self.merger.source_rows(source))
+
+    def grade_typed_answer(self, typed):
+        '''
+            Grade typed text against the values of the current item, without recording it, e.g. on every keystroke. In reverse mode typed text is an acronym, and must be one of reverse_answers(), ignoring case. Returns a test_acronym_answers.Grade.
+        '''
+        import test_acronym_answers as answers
+        if self.current_item is None:
+            return answers.Grade(typed)
+        if self.reverse_mode:
+            folded_key = typed.strip().lower()
+            for item in self.reverse_answers():
+                if item.folded_key == folded_key:
+                    return answers.Grade(typed, item.key, 0)
+            return answers.Grade(typed)
+        if self.answer_key is None:
+            self.answer_key = self.build_answer_key()
+        return self.answer_key.grade(typed, self.current_item[self.ITEM_VALUES])
+
+    def answer_typed(self, typed):
+        # Grade typed text and make it the pending answer for the current item.
+        grade = self.grade_typed_answer(typed)
+        if self.current_item is not None:
+            self.set_answer(self.CORRECT if grade.correct else self.INCORRECT)
+        return grade
+
+    # Reverse mode
+
+    def set_reverse_mode(self, enabled):
+        self.reverse_mode = enabled
+
+    def reverse_answers(self):
+        '''
+            The acronyms that answer the current item's itemvalues in reverse mode: the current item first, then any other with all of the same values, e.g. AP and WAP for 'Wireless Access Point'.
+        '''
+        item = self.current_item
+        if item is None:
+            return []
+        others = None
+        for value in item.values:
+            matches = set(self.value_index.items_with_value(value))
+            others = matches if others is None else others & matches
+        others.discard(item)
+        return [item] + sorted(others, key=lambda other: other.folded_key)
+
+    def schedule_text(self):
+        # new, due or ahead for the current card in spaced mode, otherwise ''
+        if not self.spaced_mode or not self.active_items:
+            return ''
+        return self.scheduler.state_text(self.current_item_index)
+
+    def reset_score(self):
+        self.results.reset(len(self.active_items))
+        self.review_mode = False
+        self.update_answer()
+
+    def score_text(self):
+        return self.results.score_text()
@@ -0,0 +1,270 @@
+import array
+import struct
+import sys
+
+import test_acronym_appdata as appdata
+
+'''
+    Session snapshots, so a restart picks up where the user left off: the same decks in the same shuffled order, the strict, length, port, item filter, review, spaced, typed and reverse settings, the score and the current card. Nothing is re-shuffled; the decks come from their compiled caches and are merged once.
+
+    A snapshot is one small binary file in the user's data folder:
+        header    SNAPSHOT_HEADER: magic, version, flags, length filter, current index, item count, active item count, streaks, deck count
+        decks     per deck, in merge order: its name (utf-8, length prefixed) and the SHA-1 of its content (test_acronym_cache.deck_digest)
+        ports     the port filter as text (utf-8, length prefixed, empty for none)
+        filter    the item filter as text (test_acronym_filters, utf-8, length prefixed, empty for none)
+        pinned    the keys the filter's missed and correct terms matched when it was applied: a count, then per term its folded keys joined by KEY_SEPARATOR (utf-8, length prefixed)
+        order     one unsigned 32-bit int per item: for each position in Session.all_items, the item's rank by case-folded acronym
+        active    with a length, port or item filter, one unsigned 32-bit int per active item: its position in all_items, in active_items order
+        results   one byte per active item: 0 untested, 1 correct, 2 incorrect
+
+    The order is a permutation of the merged items sorted by acronym, 4 bytes an item whatever the acronyms, and restoring it is one sort plus one pass. It only means something for the deck content it was saved with, so each deck's content hash is kept with it. Session.restore_snapshot() starts over in a new order, keeping the decks and settings, when a deck has changed since.
+
+    Snapshots are written with appdata.write_atomic, so a crash mid-save leaves the previous one in place.
+'''
+
+SNAPSHOT_FILE = 'session.snapshot'
+SNAPSHOT_MAGIC = b'ATSS'
+SNAPSHOT_VERSION = 1
+# magic, version, flags, length filter, current index, item count, active item count, streak, best streak, deck count
+SNAPSHOT_HEADER = struct.Struct('<4sHHIiIIIIH')
+DECK_HEADER = struct.Struct('<H20s')
+PORT_FILTER_HEADER = struct.Struct('<H')
+ITEM_FILTER_HEADER = struct.Struct('<H')
+PINNED_COUNT_HEADER = struct.Struct('<H')
+PINNED_KEYS_HEADER = struct.Struct('<I')
+# Between the keys of a pinned term; no acronym has one.
+KEY_SEPARATOR = '\x1f'
+
+STRICT_FLAG = 1
+REVIEW_FLAG = 2
+SPACED_FLAG = 4
+ANSWER_CORRECT_FLAG = 8
+TYPED_FLAG = 16
+REVERSE_FLAG = 32
+
+# Result <-> byte
+RESULT_CODES = {None: 0, True: 1, False: 2}
+RESULTS = (None, True, False)
+
+
+class Snapshot:
+    __slots__ = ('deck_names', 'deck_digests', 'strict_mode', 'acronym_length', 'port_filter', 'item_filter', 'item_filter_keys', 'review_mode', 'spaced_mode',
+                 'typed_mode', 'reverse_mode', 'answer', 'current_index', 'streak', 'best_streak', 'order', 'active_positions', 'results')
+
+    def __init__(self):
+        self.deck_names = []
+        self.deck_digests = []
+        self.strict_mode = False
+        self.acronym_length = 0
+        self.port_filter = ''  # str() of the session's PortQuery
+        self.item_filter = ''  # str() of the session's Filter
+        self.item_filter_keys = []  # its pinned_keys(), each sorted
+        self.review_mode = False
+        self.spaced_mode = False
+        self.typed_mode = False
+        self.reverse_mode = False
+        self.answer = True
+        self.current_index = -1  # in active_items
+        self.streak = 0
+        self.best_streak = 0
+        self.order = array.array('I')  # all_items position -> rank by case-folded acronym
+        # The all_items positions of active_items, with a length, port or item filter. Its order is the length index's, which is not all_items order once decks have been toggled.
+        self.active_positions = array.array('I')
+        self.results = b''  # active_items index -> result code
+
+    @property
+    def item_count(self):
+        return len(self.order)
+
+    @property
+    def filtered(self):
+        # Whether active_items is not simply all_items.
+        return bool(self.acronym_length or self.port_filter or self.item_filter)
+
+    @classmethod
+    def from_session(cls, a_session, order=None):
+        '''
+            Take a snapshot of a session. order can be passed in when the session's item order is known not to have changed since the last snapshot.
+        '''
+        saved = cls()
+        saved.deck_names = a_session.merger.sources()
+        saved.deck_digests = [a_session.deck_digests.get(deck_name) or bytes(20)
+                              for deck_name in saved.deck_names]
+        saved.strict_mode = a_session.strict_mode
+        saved.acronym_length = a_session.acronym_length
+        if a_session.port_filter is not None:
+            saved.port_filter = str(a_session.port_filter)
+        if a_session.item_filter is not None:
+            saved.item_filter = str(a_session.item_filter)
+            saved.item_filter_keys = [sorted(keys) for keys in a_session.item_filter.pinned_keys()]
+        saved.review_mode = a_session.review_mode
+        saved.spaced_mode = a_session.spaced_mode
+        saved.typed_mode = a_session.typed_mode
+        saved.reverse_mode = a_session.reverse_mode
+        saved.answer = a_session.answer
+        saved.current_index = a_session.current_item_index
+        saved.streak = a_session.results.streak
+        saved.best_streak = a_session.results.best_streak
+        saved.order = order if order is not None else item_order(a_session.all_items)
+        if saved.filtered:
+            saved.active_positions = array.array(
+                'I', [item.position for item in a_session.active_items])
+        saved.results = bytes(RESULT_CODES[result]
+                              for result in a_session.results.results)
+        return saved
+
+    def to_bytes(self):
+        flags = ((STRICT_FLAG if self.strict_mode else 0) | (REVIEW_FLAG if self.review_mode else 0)
+                 | (SPACED_FLAG if self.spaced_mode else 0) | (ANSWER_CORRECT_FLAG if self.answer else 0)
+                 | (TYPED_FLAG if self.typed_mode else 0) | (REVERSE_FLAG if self.reverse_mode else 0))
+        parts = [SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, flags, self.acronym_length,
+                                      self.current_index, self.item_count, len(self.results),
+                                      self.streak, self.best_streak, len(self.deck_names))]
+        for deck_name, digest in zip(self.deck_names, self.deck_digests):
+            encoded_name = deck_name.encode()
+            parts.append(DECK_HEADER.pack(len(encoded_name), digest))
+            parts.append(encoded_name)
+        encoded_filter = self.port_filter.encode()
+        parts.append(PORT_FILTER_HEADER.pack(len(encoded_filter)))
+        parts.append(encoded_filter)
+        encoded_filter = self.item_filter.encode()
+        parts.append(ITEM_FILTER_HEADER.pack(len(encoded_filter)))
+        parts.append(encoded_filter)
+        pinned_keys = self.item_filter_keys or []
+        parts.append(PINNED_COUNT_HEADER.pack(len(pinned_keys)))
+        for keys in pinned_keys:
+            encoded_keys = KEY_SEPARATOR.join(keys).encode()
+            parts.append(PINNED_KEYS_HEADER.pack(len(encoded_keys)))
+            parts.append(encoded_keys)
+        for positions in (self.order, self.active_positions):
+            if sys.byteorder == 'big':
+                positions = array.array('I', positions)
+                positions.byteswap()
+            parts.append(positions.tobytes())
+        parts.append(self.results)
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        '''
+            Return the snapshot in data, or None if it is not a SNAPSHOT_VERSION snapshot or is cut short.
+        '''
+        try:
+            (magic, version, flags, acronym_length, current_index, item_count, active_count,
+             streak, best_streak, deck_count) = SNAPSHOT_HEADER.unpack_from(data)
+            if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+                return None
+            saved = cls()
+            offset = SNAPSHOT_HEADER.size
+            for _ in range(deck_count):
+                name_size, digest = DECK_HEADER.unpack_from(data, offset)
+                offset += DECK_HEADER.size
+                saved.deck_names.append(
+                    bytes(data[offset:offset + name_size]).decode())
+                saved.deck_digests.append(digest)
+                offset += name_size
+            (filter_size,) = PORT_FILTER_HEADER.unpack_from(data, offset)
+            offset += PORT_FILTER_HEADER.size
+            saved.port_filter = bytes(data[offset:offset + filter_size]).decode()
+            offset += filter_size
+            (filter_size,) = ITEM_FILTER_HEADER.unpack_from(data, offset)
+            offset += ITEM_FILTER_HEADER.size
+            saved.item_filter = bytes(data[offset:offset + filter_size]).decode()
+            offset += filter_size
+            (pinned_count,) = PINNED_COUNT_HEADER.unpack_from(data, offset)
+            offset += PINNED_COUNT_HEADER.size
+            for _ in range(pinned_count):
+                (keys_size,) = PINNED_KEYS_HEADER.unpack_from(data, offset)
+                offset += PINNED_KEYS_HEADER.size
+                encoded_keys = bytes(data[offset:offset + keys_size]).decode()
+                saved.item_filter_keys.append(encoded_keys.split(KEY_SEPARATOR) if encoded_keys else [])
+                offset += keys_size
+        except (struct.error, UnicodeDecodeError):
+            return None
+        saved.acronym_length = acronym_length
+        itemsize = saved.order.itemsize
+        position_count = item_count + (active_count if saved.filtered else 0)
+        if len(data) != offset + position_count * itemsize + active_count:
+            return None
+        saved.order.frombytes(data[offset:offset + item_count * itemsize])
+        offset += item_count * itemsize
+        if saved.filtered:
+            saved.active_positions.frombytes(
+                data[offset:offset + active_count * itemsize])
+            offset += active_count * itemsize
+        if sys.byteorder == 'big':
+            saved.order.byteswap()
+            saved.active_positions.byteswap()
+        saved.results = bytes(data[offset:])
+        if max(saved.results, default=0) >= len(RESULTS):
+            return None
+        saved.strict_mode = bool(flags & STRICT_FLAG)
+        saved.review_mode = bool(flags & REVIEW_FLAG)
+        saved.spaced_mode = bool(flags & SPACED_FLAG)
+        saved.typed_mode = bool(flags & TYPED_FLAG)
+        saved.reverse_mode = bool(flags & REVERSE_FLAG)
+        saved.answer = bool(flags & ANSWER_CORRECT_FLAG)
+        saved.current_index = current_index
+        saved.streak = streak
+        saved.best_streak = best_streak
+        return saved
+
+
+def item_order(items):
+    # For each position, the item's rank by case-folded acronym.
+    order = array.array('I', [0]) * len(items)
+    ranked_positions = sorted(range(len(items)), key=lambda position: items[position].folded_key)
+    for rank, position in enumerate(ranked_positions):
+        order[position] = rank
+    return order
+
+
+class SnapshotFile:
+    '''
+        Reads and writes the snapshots of one file. The item order only changes when decks are shuffled, loaded or unloaded, so it is ranked again only then; a save with nothing new to write does not touch the disk.
+        A save that can't be written, e.g. on a full disk, is reported once with a warning and kept in error; the next save tries again.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.error = None  # set while saves fail
+        self._order_version = None
+        self._order = None
+        self._saved_data = None
+
+    @classmethod
+    def for_user(cls):
+        # The snapshot kept in the user's data folder, see test_acronym_appdata.
+        return cls(appdata.data_path(SNAPSHOT_FILE))
+
+    def read(self):
+        '''
+            Return the saved snapshot, or None if there is none that can be read.
+        '''
+        try:
+            with open(self.path, 'rb') as snapshot_file:
+                data = snapshot_file.read()
+        except OSError:
+            return None
+        saved = Snapshot.from_bytes(data)
+        if saved is not None:
+            self._saved_data = data
+        return saved
+
+    def save(self, a_session):
+        if self._order_version != a_session.order_version:
+            self._order = item_order(a_session.all_items)
+            self._order_version = a_session.order_version
+        data = Snapshot.from_session(a_session, self._order).to_bytes()
+        if data == self._saved_data:
+            return
+        try:
+            appdata.write_atomic(self.path, data)
+        except OSError as error:
+            if self.error is None:
+                import warnings
+                warnings.warn(f"could not save the session to {self.path}: {error}", stacklevel=2)
+            self.error = error
+            return
+        self.error = None
+        self._saved_data = data
@@ -0,0 +1,167 @@
+import array
+import functools
+import math
+import os
+import threading
+import time
+
+import test_acronym_appdata as appdata
+
+'''
+    Timings of the hot paths, to find where the time goes on slow machines: the stages of loading a test (deck loads, merge, strict mode filter, shuffle, the length menu) and everything a keystroke runs in the window (win_evt keys and the manual entry validate callback).
+
+    Functions are marked with timed(name). While recording is off, the only cost is the wrapper call and one attribute check. While it is on, each call's start and duration go in a ring buffer per name: fixed size arrays of doubles, so recording allocates nothing and old samples are simply overwritten. Decks load on worker threads, so a lock guards the rings.
+
+        recorder.enabled = True
+        ...
+        recorder.stats()                 # name -> Stats: count, p50, p95, p99, max in seconds
+        recorder.save_json(path)         # the stats and every sample kept
+        recorder.save_chrome_trace(path) # for chrome://tracing or https://ui.perfetto.dev
+
+    Recording starts on with $ACRONYM_TESTER_TIMINGS=1, to catch the first load; the debug window turns it on and off.
+'''
+
+TIMINGS_VARIABLE = 'ACRONYM_TESTER_TIMINGS'
+TIMINGS_FILE = 'timings.json'
+TRACE_FILE = 'timings.trace.json'
+
+# Samples kept per name.
+RING_SIZE = 1024
+
+
+def percentile(sorted_values, fraction):
+    # Nearest rank: the smallest value with at least fraction of the values at or below it.
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Stats:
+    __slots__ = ('count', 'p50', 'p95', 'p99', 'max')
+
+    def __init__(self, durations, count):
+        durations = sorted(durations)
+        self.count = count  # every call recorded, including those no longer in the ring
+        self.p50 = percentile(durations, 0.50)
+        self.p95 = percentile(durations, 0.95)
+        self.p99 = percentile(durations, 0.99)
+        self.max = durations[-1] if durations else 0.0
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Ring:
+    __slots__ = ('starts', 'durations', 'threads', 'count')
+
+    def __init__(self, size=RING_SIZE):
+        self.starts = array.array('d', bytes(8 * size))
+        self.durations = array.array('d', bytes(8 * size))
+        self.threads = array.array('Q', bytes(8 * size))
+        self.count = 0
+
+    def add(self, started, duration, thread):
+        slot = self.count % len(self.durations)
+        self.starts[slot] = started
+        self.durations[slot] = duration
+        self.threads[slot] = thread
+        self.count += 1
+
+    def samples(self):
+        # (start, duration, thread) of the samples kept, oldest first
+        size = len(self.durations)
+        first = max(0, self.count - size)
+        return [(self.starts[index % size], self.durations[index % size], self.threads[index % size])
+                for index in range(first, self.count)]
+
+    def stats(self):
+        kept = min(self.count, len(self.durations))
+        return Stats(self.durations[:kept], self.count)
+
+
+class Recorder:
+    def __init__(self, size=RING_SIZE, enabled=False):
+        self.size = size
+        self.enabled = enabled
+        self._rings = {}
+        self._lock = threading.Lock()
+        # Trace times count from here.
+        self._origin = time.perf_counter()
+
+    def record(self, name, started, ended):
+        with self._lock:
+            ring = self._rings.get(name)
+            if ring is None:
+                ring = self._rings[name] = Ring(self.size)
+            ring.add(started - self._origin, ended - started, threading.get_native_id())
+
+    def clear(self):
+        with self._lock:
+            self._rings = {}
+
+    def stats(self):
+        with self._lock:
+            return {name: ring.stats() for name, ring in sorted(self._rings.items())}
+
+    def report(self):
+        lines = [f"{'':28} {'count':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"]
+        for name, stats in self.stats().items():
+            lines.append(f"{name[:28]:28} {stats.count:7} {stats.p50 * 1e3:8.2f} {stats.p95 * 1e3:8.2f} "
+                         f"{stats.p99 * 1e3:8.2f} {stats.max * 1e3:8.2f}")
+        if len(lines) == 1:
+            lines.append('No timings yet' if self.enabled else 'Not recording')
+        return '\n'.join(lines)
+
+    def to_json(self):
+        with self._lock:
+            return {name: {'stats': ring.stats().to_dict(),
+                           'samples': [{'start': start, 'duration': duration, 'thread': thread}
+                                       for start, duration, thread in ring.samples()]}
+                    for name, ring in sorted(self._rings.items())}
+
+    def chrome_trace(self):
+        # Trace Event Format: one complete ('X') event per sample, in microseconds.
+        pid = os.getpid()
+        with self._lock:
+            events = [{'name': name, 'ph': 'X', 'ts': start * 1e6, 'dur': duration * 1e6,
+                       'pid': pid, 'tid': thread}
+                      for name, ring in self._rings.items()
+                      for start, duration, thread in ring.samples()]
+        events.sort(key=lambda event: event['ts'])
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_json(self, path=None):
+        import json
+        path = path or appdata.data_path(TIMINGS_FILE)
+        appdata.write_atomic(path, json.dumps(self.to_json(), indent=1).encode())
+        return path
+
+    def save_chrome_trace(self, path=None):
+        import json
+        path = path or appdata.data_path(TRACE_FILE)
+        appdata.write_atomic(path, json.dumps(self.chrome_trace()).encode())
+        return path
+
+
+# The one the timed functions record to.
+recorder = Recorder(enabled=os.environ.get(TIMINGS_VARIABLE, '') not in ('', '0'))
+
+
+def timed(name):
+    '''
+        Decorator recording each call's duration under name while recording is on. name can also be a function of the call's arguments returning the name, e.g. to tell keys apart; it is only called while recording.
+    '''
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not recorder.enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                recorder.record(name if isinstance(name, str) else name(*args, **kwargs),
+                                started, time.perf_counter())
+        return wrapper
+    return decorate
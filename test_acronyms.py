@@ -1,10 +1,10 @@
-import csv
 import tkinter as tk
-import random
-import webbrowser
-import test_acronym_debug as debug
+import test_acronym_loader as loader
+import test_acronym_session as session
+import test_acronym_snapshot as snapshot
+import test_acronym_timing as timing
 import os
-import platform
+import sys
 
 '''
     Acronym memorization assistant. Reads values from cvs file(s) and presents each acronym one at a time, in random order. The expanded text for the acronym is hidden at first, but can be made visible to check the memorized answer. A Browse button opens Wikipedia to describe the acronym. Keeps a score of correct/incorrect answers. A review mode shows only acronyms that were remembered incorrectly. A count menu shows only acronyms that all have a certain length, e.g. 2 will show KB and IR, but not RADIUS.
@@ -45,52 +45,69 @@ import platform
     ] 
 
     The 'strict' propery, if 'true', filters out acronyms that are not in the official CompTIA Exam Objectives, but might be found, for example, in Professor Messer videos. Filtering happens after all cvs files are loaded, but before combining duplicate acronyms. So in the above example, strict filtering is disabled.
+
+    The loading, merging, filtering, navigation and scoring all live in test_acronym_session.Session. This window only draws the session's state and forwards user input to it.
+
+    Decks are loaded and merged on worker threads (test_acronym_loader), so the window appears right away whatever the deck size. While loading, the window shows 'Loading...' and polls for the result with after(). Checking or unchecking a deck mid-load starts the load over.
+
+    Answers are logged to a history database (test_acronym_progress) without blocking the window, and Review Mode also brings back acronyms missed in the last 7 days.
+
+    The Typed checkbox switches to typed answers: type the expanded text in the answer box and it is graded on every keystroke against all of the acronym's meanings (test_acronym_answers), ignoring case, punctuation, 'and' and small typos. Return records the grade as the answer and shows the expanded text; Return again moves on. Escape leaves the answer box.
+
+    The Reverse checkbox turns the test around: the expanded text is shown and the acronym is hidden until Toggle. An expansion shared by several acronyms (AP and WAP are both a Wireless Access Point) accepts any of them. Typing in the acronym box searches the expansions by word instead.
+
+    Ports decks ('Network ports') are decks like any other, with port queries on top (test_acronym_ports): typing 'port 443', 'udp', 'ports 20-25' or 'well-known' in the acronym box lists the acronyms naming those ports, and the same text in the Ports box, then Return, quizzes only those. An empty Ports box quizzes everything again.
+
+    The Filter box combines filters over the loaded acronyms with and, or, not and parentheses (test_acronym_filters), e.g. 'deck:network+ strict length>=4 missed'; Return applies it, and an empty box clears it.
+
+    The Spaced checkbox switches to spaced repetition: Next brings the card due first, and each answer reschedules it. The schedule is read from the user's data folder when Spaced is first checked, and saved a few seconds after answering and on exit.
+
+    The session is saved to a snapshot (test_acronym_snapshot) every SNAPSHOT_SAVE_MS and on exit, and the next run resumes from it: same decks, order, settings, score and current acronym. If a deck changed in between, the test starts over with the same decks and settings.
+
+    Next and Previous only move the session; the window is redrawn once the pending events are handled (request_render() and after_idle). Holding an arrow key on a large deck queues key repeats faster than the window can redraw; they all move the session first, and only the acronym they end on is drawn. Anything that reads what is on screen calls flush_render() first.
+
+    Hot paths (deck loads, merging, the strict filter, shuffling, the length menu, keys and manual entry) are timed by test_acronym_timing while recording is on: set ACRONYM_TESTER_TIMINGS=1 to record from startup, or check Record Timings in the debug window, which shows p50/p95/p99 live and saves them as JSON or a Chrome trace.
+
+    Startup only imports what the first window needs. webbrowser, the debug window, and the modules of one mode (port queries, filters, spaced repetition, typed answers) are imported the first time they are used, the answer history is opened once the window is up, and the loader threads start with the first deck load. Run test_acronym_bench.py --startup-report to see where import time goes.
 '''
 
 
 class AcronymTester(tk.Tk):
-    CORRECT = True
-    INCORRECT = False
-    UNTESTED = None
-
-    ITEM_KEY = 'itemkey'  # the acronym
-    # for raw loaded items before conversion
-    ITEM_VALUE = 'itemvalue'  # the text description
-    ITEM_LINK = 'itemlink'  # Wikipedia link
-    ITEM_STRICT = 'strict'  # filter out non-CompTIA acronyms
-    # for converted items ready to use
-    ITEM_VALUES = 'itemvalues'
-    ITEM_LINKS = 'itemlinks'
+    CORRECT = session.Session.CORRECT
+    INCORRECT = session.Session.INCORRECT
+    UNTESTED = session.Session.UNTESTED
+
+    ITEM_KEY = session.Session.ITEM_KEY  # the acronym
+    ITEM_VALUES = session.Session.ITEM_VALUES  # the text description(s)
+    ITEM_LINKS = session.Session.ITEM_LINKS  # Wikipedia link(s)
 
     # Constant containing all possible csv file names.
-    ALL_CSV_FILES = [
-        'A+ acronyms',
-        'Network+ N10-009 acronyms',
-        'A+ ports',
-    ]
-    # Runtime subset of all csv files. Selected in the debug window.
-    current_cvs_files = set([])
+    ALL_CSV_FILES = session.Session.ALL_CSV_FILES
+
+    # How often to check on a deck load in progress.
+    LOAD_POLL_MS = 50
+    # Save the spaced repetition schedule this long after an answer.
+    SCHEDULE_SAVE_MS = 5000
+    # How often to save the session snapshot; only written when something changed.
+    SNAPSHOT_SAVE_MS = 30000
 
-    def __init__(self):
+    def __init__(self, deck_names=None):
+        # deck_names starts a test with those decks instead of resuming the last one, e.g. test_ports.py.
         super().__init__()
 
         self.lift()
-        self.all_items = []
-        self.active_items = []
-        self.current_item_index = -1
-        self.current_item = None
-        self.manual_entry_mode_enabled = False
-        self.strict_mode = False
-
-        # Keep a list of None/0/1 to note untried/incorrect/correct for each item.
-        # The results list is the same length as the items list.
-        self.results = []
+        self.session = session.Session()
+        self.after_idle(self.open_progress)
+        self.loader = loader.DeckLoader()
+        self.load_poll_id = None
+        self.schedule_save_id = None
+        self.snapshots = snapshot.SnapshotFile.for_user()
 
         self.title('Acronym Tester')
 
        # set window size and center window on screen
         window_width = 500
-        window_height = 200
+        window_height = 300
         screen_width = self.winfo_screenwidth()
         screen_height = self.winfo_screenheight()
         window_ul_x = int(screen_width/2 - window_width/2)
@@ -129,6 +146,9 @@ class AcronymTester(tk.Tk):
             row=2, column=3, sticky='w')
 
         # Grid row 3
+        self.spaced_mode_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(text='Spaced', variable=self.spaced_mode_var,
+                       command=self.toggle_spaced_mode).grid(row=3, column=1, sticky='e')
         self.score_var = tk.StringVar()
         tk.Label(textvariable=self.score_var).grid(row=3, column=2)
         self.score_var.set('Score: ')
@@ -148,6 +168,45 @@ class AcronymTester(tk.Tk):
         tk.Button(text='Browse', command=self.open_description_in_browser).grid(
             row=4, column=3, sticky='w')
 
+        # Grid row 5
+        self.completions_var = tk.StringVar()
+        tk.Label(textvariable=self.completions_var).grid(
+            row=5, column=1, columnspan=4)
+
+        # Grid row 6
+        self.typed_mode_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(text='Typed', variable=self.typed_mode_var,
+                       command=self.toggle_typed_mode).grid(row=6, column=1, sticky='e')
+        self.typed_answer_var = tk.StringVar()
+        self.typed_answer_entry = tk.Entry(textvariable=self.typed_answer_var, state=tk.DISABLED,
+                                           validatecommand=(self.register(self.typed_answer_changed), '%P'), validate='key')
+        self.typed_answer_entry.bind('<Return>', self.submit_typed_answer)
+        self.typed_answer_entry.grid(row=6, column=2)
+        self.typed_grade_var = tk.StringVar()
+        tk.Label(textvariable=self.typed_grade_var).grid(
+            row=6, column=3, sticky='w')
+        # Grid row 7
+        self.reverse_mode_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(text='Reverse', variable=self.reverse_mode_var,
+                       command=self.toggle_reverse_mode).grid(row=7, column=1, sticky='e')
+        self.port_filter_var = tk.StringVar()
+        self.port_filter_entry = tk.Entry(textvariable=self.port_filter_var)
+        self.port_filter_entry.bind('<Return>', self.port_filter_entered)
+        self.port_filter_entry.grid(row=7, column=2)
+        tk.Label(text='Ports').grid(row=7, column=3, sticky='w')
+        self.item_filter_var = tk.StringVar()
+        self.item_filter_entry = tk.Entry(textvariable=self.item_filter_var)
+        self.item_filter_entry.bind('<Return>', self.item_filter_entered)
+        self.item_filter_entry.grid(row=8, column=2)
+        tk.Label(text='Filter').grid(row=8, column=3, sticky='w')
+
+        # The after_idle redraw pending, if any (see request_render)
+        self.render_id = None
+
+        # The item the answer box was last cleared for, and whether its answer was recorded.
+        self.typed_item = None
+        self.typed_answer_recorded = False
+
         self.debug_mode_enabled = False
         self.debugger = None
 
@@ -158,78 +217,35 @@ class AcronymTester(tk.Tk):
         # self.itemvalue_var.set(
         #     'Completely Automated Turing Test To Tell Computers and Humans Apart')
 
-        self.start_test()
-
-    def load_and_sort(self, csv_file_names=[]):
-        '''
-            Return list of dictionaries containing raw rows from all cvs files, sorted by itemkey and itemvalue. It might contain duplicate acronyms.
-        '''
-        csv_items = []
-        for file_name in csv_file_names:
-            with open(file_name + '.csv') as csv_file:
-                csv_items += [item for item in csv.DictReader(csv_file)]
-        value_sorted = sorted(
-            csv_items, key=lambda item: item[self.ITEM_VALUE].lower())
-        key_sorted = sorted(
-            value_sorted, key=lambda item: item[self.ITEM_KEY].lower())
-        return key_sorted
-
-    def strict_mode_filter(self, items):
-        if self.strict_mode:
-            filtered_items = list(
-                filter(lambda item: item[self.ITEM_STRICT] == 'true', items))
+        if deck_names:
+            self.current_cvs_files.update(deck_names)
+            self.start_test()
         else:
-            filtered_items = items
-
-        return filtered_items
-
-    def process_duplicate_acronyms(self, sorted_raw_items):
-        '''
-            Returns a list of converted dictionaries:
-                All acronyms are unique.
-                Value(s) and link(s) for each acronym are in lists with one or more elements.
-        '''
-        converted_items = []
-        for raw_item in sorted_raw_items:
-            raw_key = raw_item[self.ITEM_KEY]
-            raw_value = raw_item[self.ITEM_VALUE]
-            raw_link = raw_item[self.ITEM_LINK]
-
-            last_converted = converted_items[-1] if len(
-                converted_items) > 0 else None
-
-            if last_converted is None or raw_key.lower() != last_converted[self.ITEM_KEY].lower():
-                # It's a unique acronym, the most common case.
-                converted_items += [{self.ITEM_KEY: raw_key,
-                                     self.ITEM_VALUES: [raw_value],
-                                     self.ITEM_LINKS: [raw_link]}]
-                continue
-
-            # It's a duplicate acronym; discard duplicate value/link
-            if raw_value not in last_converted[self.ITEM_VALUES]:
-                # unique value, add to the existing item
-                last_converted[self.ITEM_VALUES] += [raw_value]
-                last_converted[self.ITEM_LINKS] += [raw_link]
-
-        return converted_items
-
-    def scan_items_for_acronym_lengths(self):
-        # Scan all_items and make a list of acronym lengths
-        length_options = [0]
-        for item in self.all_items:
-            length = len(item[self.ITEM_KEY])
-            if length not in length_options:
-                length_options.append(length)
-        return sorted(length_options)
+            self.resume()
+        self.after(self.SNAPSHOT_SAVE_MS, self.autosave_snapshot)
+
+    @property
+    def all_items(self):
+        return self.session.all_items
+
+    @property
+    def current_cvs_files(self):
+        return self.session.current_cvs_files
+
+    @property
+    def current_item(self):
+        return self.session.current_item
 
     def create_length_menu(self):
-        length_options = self.scan_items_for_acronym_lengths()
+        length_options = [length for length,
+                          _count in self.session.scan_items_for_acronym_lengths()]
         menu = tk.OptionMenu(self, self.acronym_length_var, *length_options,
                              command=self.acronym_length_changed)
         return menu
 
+    @timing.timed('update_length_menu')
     def update_length_menu(self):
-        length_options = self.scan_items_for_acronym_lengths()
+        length_counts = self.session.scan_items_for_acronym_lengths()
         menu = self.length_menu['menu']
         menu.delete(0, 'end')
 
@@ -237,135 +253,239 @@ class AcronymTester(tk.Tk):
             self.acronym_length_var.set(value)
             self.acronym_length_changed(value)
 
-        for option in length_options:
-            menu.add_command(label=option,
+        for option, count in length_counts:
+            menu.add_command(label=f"{option}  ({count})",
                              command=lambda value=option: notify_change(value))
 
-        # Try to keep the same choice
-        if self.acronym_length_var.get() not in length_options:
-            self.acronym_length_var.set(0)
+        # The session keeps the same choice if it still has items
+        self.acronym_length_var.set(self.session.acronym_length)
 
     def toggle_itemvalue(self):
-        if len(self.active_items) > 0 and not self.itemvalue_var.get():
-            self.itemvalue_var.set(
-                '\n'.join(self.current_item[self.ITEM_VALUES]))
+        # Whether the answer is showing depends on what is on screen now.
+        self.flush_render()
+        if self.session.reverse_mode:
+            # The expanded text is the question; the acronym is the answer.
+            if len(self.session.active_items) > 0 and not self.key_entry_var.get():
+                self.show_answer()
+            else:
+                self.key_entry_var.set('')
+        elif len(self.session.active_items) > 0 and not self.itemvalue_var.get():
+            self.show_answer()
         else:
             self.itemvalue_var.set('')
         self.focus_set()
 
+    def show_answer(self):
+        if self.session.reverse_mode:
+            self.key_entry_var.set(' / '.join(
+                item[self.ITEM_KEY] for item in self.session.reverse_answers()))
+        else:
+            self.itemvalue_var.set(
+                '\n'.join(self.current_item[self.ITEM_VALUES]))
+
+    @timing.timed('manual_entry')
     def manual_entry(self, key):
         # A hacky way to try out a specific key. It does not affect the current
         # index. Prev/Next will continue as if the manual entry did not occur.
         # Press esc to exit manual entry mode.
         if self.focus_get() == self.key_entry:
-            self.set_manual_entry_mode(True)
-            acs = list(
-                filter(lambda item: item[self.ITEM_KEY].upper() == key.upper(), self.active_items))
-            if len(acs) > 0:
-                item = acs[0]
+            item, completions = self.session.manual_entry(key)
+            self.show_manual_entry_mode()
+            if item is not None and self.session.reverse_mode:
+                self.itemvalue_var.set(
+                    f"{item[self.ITEM_KEY]}: {' / '.join(item[self.ITEM_VALUES])}")
+            elif item is not None:
                 self.itemvalue_var.set('\n'.join(item[self.ITEM_VALUES]))
-                self.current_item = item
             else:
                 self.itemvalue_var.set(' ')
+            self.completions_var.set('  '.join(
+                completion[self.ITEM_KEY] for completion in completions))
         return True
 
     def set_manual_entry_mode(self, enabled):
-        self.manual_entry_mode_enabled = enabled
+        self.session.set_manual_entry_mode(enabled)
+        self.show_manual_entry_mode()
+        if not enabled:
+            self.show_itemkey()
+
+    def show_manual_entry_mode(self):
         widgets = [self.correct_answer_btn, self.next_btn,
                    self.previous_btn, self.length_menu]
-        if enabled:
+        if self.session.manual_entry_mode_enabled or self.loader.loading:
             self.set_config_state(widgets, tk.DISABLED)
         else:
             self.set_config_state(widgets, tk.NORMAL)
-            self.set_current_item(
-                self.active_items[self.current_item_index] if len(
-                    self.active_items) > 0 else None
-            )
 
-    def acronym_length_changed(self, _new_length):
-        self.filter_items_and_show_first()
-
-    def filter_items_and_show_first(self):
-        # build the filtered list of items and display the first one
-        length = self.acronym_length_var.get()
-        if length == 0:
-            self.active_items = list(self.all_items)
-        else:
-            self.active_items = list(filter(lambda item: len(
-                item[self.ITEM_KEY]) == length, self.all_items))
-        self.set_current_item_index(0)
-        self.reset_score()
-        self.show_itemkey()
+    def acronym_length_changed(self, new_length):
+        self.session.set_acronym_length(new_length)
+        self.show_session()
 
     def show_itemkey(self):
-        self.focus_set()
+        if self.session.typed_mode:
+            self.typed_answer_entry.focus_set()
+        else:
+            self.focus_set()
+        if self.current_item is not self.typed_item:
+            # A new acronym starts with an empty answer box.
+            self.typed_item = self.current_item
+            self.typed_answer_recorded = False
+            self.typed_answer_var.set('')
+            self.typed_grade_var.set('')
         self.key_entry_var.set('')
-        if self.current_item:
-            self.key_entry_var.set(self.current_item[self.ITEM_KEY])
         self.itemvalue_var.set('')
-        self.cur_which_var.set(
-            f"{self.current_item_index + 1} / {len(self.active_items)}")
+        if self.current_item and self.session.reverse_mode:
+            self.itemvalue_var.set('\n'.join(self.current_item[self.ITEM_VALUES]))
+        elif self.current_item:
+            self.key_entry_var.set(self.current_item[self.ITEM_KEY])
+        self.completions_var.set('')
+        review_count = ''
+        if self.session.review_mode:
+            review_count = f"  ({self.session.results.incorrect_count} to review)"
+        elif self.session.spaced_mode:
+            review_count = f"  ({self.session.schedule_text()})"
+        if self.loader.loading:
+            self.cur_which_var.set('Loading...')
+        else:
+            self.cur_which_var.set(
+                f"{self.session.current_item_index + 1} / {len(self.session.active_items)}{review_count}")
         self.show_score()
 
-    def next_item(self):
-        self.set_manual_entry_mode(False)
-        self.update_current_item_result()
+    @timing.timed('show_session')
+    def show_session(self):
+        # Redraw everything that depends on session state. A redraw pending is no longer needed.
+        if self.render_id is not None:
+            self.after_cancel(self.render_id)
+            self.render_id = None
+        self.show_manual_entry_mode()
+        self.correct_answer_var.set(self.session.answer)
+        self.review_mode_var.set(self.session.review_mode)
+        # With an answer history, earlier misses can be reviewed too.
+        self.review_mode_btn.config(
+            state=tk.ACTIVE if self.session.results.has_incorrect() or self.session.progress else tk.DISABLED)
+        self.spaced_mode_var.set(self.session.spaced_mode)
+        self.typed_mode_var.set(self.session.typed_mode)
+        self.reverse_mode_var.set(self.session.reverse_mode)
+        if self.focus_get() is not self.port_filter_entry:
+            self.port_filter_var.set(
+                '' if self.session.port_filter is None else str(self.session.port_filter))
+        if self.focus_get() is not self.item_filter_entry:
+            self.item_filter_var.set(
+                '' if self.session.item_filter is None else str(self.session.item_filter))
+        self.typed_answer_entry.config(
+            state=tk.NORMAL if self.session.typed_mode else tk.DISABLED)
+        if self.session.spaced_mode and not self.session.review_mode:
+            # Answered cards are already rescheduled.
+            self.previous_btn.config(state=tk.DISABLED)
+        self.show_itemkey()
 
-        if self.review_mode_var.get():
-            index = self.get_next_incorrect_index(self.current_item_index)
-            if index is not None:
-                self.set_current_item_index(index)
-        else:
-            self.set_current_item_index(self.current_item_index + 1)\
+    def request_render(self):
+        # Redraw with show_session once the events already queued are handled, however many moves they make.
+        if self.render_id is None:
+            self.render_id = self.after_idle(self.render)
 
-        self.update_correct_answer_checkbox()
-        self.show_itemkey()
+    def render(self):
+        self.render_id = None
+        self.show_session()
+
+    def flush_render(self):
+        # Draw a pending redraw now.
+        if self.render_id is not None:
+            self.show_session()
+
+    def next_item(self):
+        if self.loader.loading:
+            return
+        self.session.next_item()
+        self.request_render()
+        if self.session.spaced_mode:
+            self.schedule_save()
 
     def prev_item(self):
-        self.set_manual_entry_mode(False)
-        if self.review_mode_var.get():
-            index = self.get_prev_incorrect_index(self.current_item_index)
-            if index is not None:
-                self.set_current_item_index(index)
+        if self.loader.loading:
+            return
+        self.session.prev_item()
+        self.request_render()
+
+    def start_test(self):
+        if self.current_cvs_files:
+            # The decks load on worker threads; decks_loaded swaps in the new session when it is ready.
+            self.loader.load_decks(self.current_cvs_files, self.session.strict_mode,
+                                   self.decks_loaded, self.session.typed_mode)
+            self.show_loading()
         else:
-            self.set_current_item_index(self.current_item_index - 1)
-            self.update_correct_answer_checkbox()
+            # No decks, nothing to wait for.
+            self.loader.cancel()
+            self.session.start_test()
+            self.update_length_menu()
+            self.show_session()
+
+    def open_progress(self):
+        # Every answer goes to the answer history in the user's data folder. Sessions loaded later carry it over.
+        import test_acronym_progress as progress
+        self.session.progress = progress.ProgressStore.for_user()
+
+    def resume(self):
+        # Pick up the last run from its snapshot, if it had any decks.
+        saved = self.snapshots.read()
+        if saved is None or not saved.deck_names:
+            self.start_test()
+            return
+        self.current_cvs_files.update(saved.deck_names)
+        self.session.strict_mode = saved.strict_mode
+        scheduler = None
+        if saved.spaced_mode:
+            import test_acronym_schedule as schedule
+            scheduler = schedule.Scheduler.for_user()
+        self.loader.load_snapshot(saved, self.snapshot_loaded, scheduler)
+        self.show_loading()
+
+    @timing.timed('snapshot_loaded')
+    def snapshot_loaded(self, new_session):
+        new_session.progress = self.session.progress
+        self.session = new_session
+        self.update_length_menu()
+        self.show_session()
 
-        self.show_itemkey()
+    def save_snapshot(self):
+        # The session being replaced by a load is not worth saving over the last snapshot.
+        if not self.loader.loading:
+            self.snapshots.save(self.session)
 
-    def get_next_incorrect_index(self, cur_index):
-        try:
-            found_index = self.results.index(self.INCORRECT, cur_index + 1)
-        except (ValueError, IndexError):
-            try:
-                found_index = self.results.index(self.INCORRECT, 0)
-            except ValueError:
-                found_index = None
-        return found_index
-
-    def get_prev_incorrect_index(self, cur_index):
-        try:
-            results_rev = self.results[-1::-1]
-            starting_index = len(results_rev) - cur_index
-            found_index = results_rev.index(self.INCORRECT,  starting_index)
-        except (ValueError, IndexError) as e:
-            try:
-                found_index = results_rev.index(self.INCORRECT, 0)
-            except ValueError:
-                found_index = None
-        if found_index is not None:
-            found_index = len(results_rev) - found_index - 1
-        return found_index
+    def autosave_snapshot(self):
+        self.save_snapshot()
+        self.after(self.SNAPSHOT_SAVE_MS, self.autosave_snapshot)
 
-    def start_test(self):
-        sorted_raw_items = self.load_and_sort(self.current_cvs_files)
-        filtered_raw_items = self.strict_mode_filter(sorted_raw_items)
-        self.all_items = self.process_duplicate_acronyms(filtered_raw_items)
-        random.shuffle(self.all_items)
+    @timing.timed('decks_loaded')
+    def decks_loaded(self, new_session):
+        new_session.keep_settings(self.session)
+        self.session = new_session
+        self.update_length_menu()
+        self.show_session()
+
+    def deck_loaded(self, file_name, raw_rows):
+        self.session.enable_csv_file(file_name, True, raw_rows)
         self.update_length_menu()
-        self.filter_items_and_show_first()
-        self.update_correct_answer_checkbox()
-        self.set_manual_entry_mode(False)
+        self.show_session()
+
+    def show_loading(self):
+        # Show the loading state, then poll until the loader hands back its result.
+        if self.load_poll_id is not None:
+            self.after_cancel(self.load_poll_id)
+        self.show_session()
+        self.poll_loading()
+
+    def poll_loading(self):
+        self.load_poll_id = None
+        try:
+            loaded = self.loader.poll()
+        except Exception as error:
+            # e.g. a deck file that is missing or can't be parsed
+            self.show_session()
+            self.itemvalue_var.set(f"Could not load decks: {error}")
+            return
+        if not loaded:
+            self.load_poll_id = self.after(
+                self.LOAD_POLL_MS, self.poll_loading)
 
     def open_description_in_browser(self):
         if self.current_item == None:
@@ -374,104 +494,156 @@ class AcronymTester(tk.Tk):
             return
         links = self.current_item[self.ITEM_LINKS]
         if links:
+            # Imported on first use; most sessions never open a browser.
+            import webbrowser
             for alink in links:
                 webbrowser.open(alink)
 
     def show_score(self):
-        correct_count = self.results.count(self.CORRECT)
-        incorrect_count = self.results.count(self.INCORRECT)
-        self.score_var.set(
-            f"Correct: {correct_count}   Incorrect: {incorrect_count}")
-
-    def set_current_item_index(self, value):
-        self.current_item_index = value
-        if self.current_item_index >= len(self.active_items):
-            self.current_item_index = 0
-        elif self.current_item_index < 0:
-            self.current_item_index = len(self.active_items) - 1
+        self.score_var.set(self.session.score_text())
 
-        try:
-            self.set_current_item(self.active_items[self.current_item_index])
-        except:
-            self.set_current_item(None)
+    def toggle_review_mode(self):
+        self.session.set_review_mode(self.review_mode_var.get())
+        self.show_session()
 
-    def set_current_item(self, item):
-        self.current_item = item
-        self.show_itemkey()
+    def review_keys(self, keys):
+        # Review these acronyms, e.g. the debug window's hardest ones.
+        self.session.review_keys(keys)
+        self.show_session()
 
-    def update_current_item_result(self):
-        if len(self.results) == 0:
-            return
-        self.results[self.current_item_index] = self.CORRECT if self.correct_answer_var.get(
-        ) else self.INCORRECT
-        if self.INCORRECT in self.results:
-            self.review_mode_btn.config(state=tk.ACTIVE)
+    def toggle_correct_answer(self, update_var=False):
+        if update_var:
+            # Only do this if the command is NOT called from the checkbutton.
+            self.session.toggle_answer()
         else:
-            self.reset_review_mode()
-        self.show_score()
+            # The checkbutton already sets the var.
+            self.session.set_answer(self.correct_answer_var.get())
+        self.show_session()
+
+    def toggle_spaced_mode(self):
+        if self.spaced_mode_var.get() and self.session.scheduler.path is None:
+            # The user's schedule is only read once spaced mode is used.
+            import test_acronym_schedule as schedule
+            self.session.scheduler = schedule.Scheduler.for_user()
+        self.session.set_spaced_mode(self.spaced_mode_var.get())
+        self.show_session()
+
+    def toggle_typed_mode(self):
+        self.session.set_typed_mode(self.typed_mode_var.get())
+        self.show_session()
+
+    def toggle_reverse_mode(self):
+        self.session.set_reverse_mode(self.reverse_mode_var.get())
+        self.show_session()
+
+    def port_filter_entered(self, event=None):
+        import test_acronym_ports as ports
+        text = self.port_filter_var.get().strip()
+        query = ports.parse_query(text) if text else None
+        if text and query is None:
+            self.completions_var.set(f"Not a port query: {text}")
+            return
+        self.session.set_port_filter(query)
+        self.focus_set()
+        self.show_session()
 
-    def update_correct_answer_checkbox(self):
-        # Item result defaults to CORRECT unless it is already INCORRECT
-        current_result = self.results[self.current_item_index] if len(
-            self.results) > 0 else self.UNTESTED
-        self.correct_answer_var.set(self.INCORRECT if current_result ==
-                                    self.INCORRECT else self.CORRECT)
+    def item_filter_entered(self, event=None):
+        import test_acronym_filters as filters
+        text = self.item_filter_var.get().strip()
+        try:
+            item_filter = filters.parse_filter(text) if text else None
+        except filters.FilterError as error:
+            self.completions_var.set(f"Filter: {error}")
+            return
+        match_count = self.session.set_item_filter(item_filter)
+        self.focus_set()
+        self.show_session()
+        if not match_count:
+            self.completions_var.set(f"No acronyms match {text}")
+
+    @timing.timed('typed_answer_changed')
+    def typed_answer_changed(self, typed):
+        # Live feedback on every keystroke; the answer is only recorded on Return.
+        if not self.typed_answer_recorded:
+            self.typed_grade_var.set(
+                self.session.grade_typed_answer(typed).text())
+        return True
 
-    def toggle_review_mode(self):
-        is_review_mode = self.review_mode_var.get()
-        first_incorrect_index = self.get_next_incorrect_index(-1)
-        if first_incorrect_index is not None:
-            self.set_current_item_index(first_incorrect_index)
-            self.correct_answer_var.set(self.INCORRECT)
-
-    def reset_review_mode(self):
-        self.review_mode_var.set(False)
-        self.review_mode_btn.config(state=tk.DISABLED)
-
-    def reset_score(self):
-        self.results = [self.UNTESTED] * len(self.active_items)
-        self.reset_review_mode()
-        self.update_correct_answer_checkbox()
+    def submit_typed_answer(self, event=None):
+        if self.loader.loading or self.current_item is None:
+            return
+        if self.typed_answer_recorded:
+            self.next_item()
+            return
+        self.flush_render()
+        grade = self.session.answer_typed(self.typed_answer_var.get())
+        self.typed_answer_recorded = True
+        self.correct_answer_var.set(self.session.answer)
+        self.typed_grade_var.set(grade.text() or 'No answer')
+        self.show_answer()
         self.show_score()
 
-    def toggle_correct_answer(self, update_var=False):
-        if update_var:
-            # Only do this if the command is NOT called from the checkbutton.
-            # The checkbutton already sets the var.
-            self.correct_answer_var.set(self.INCORRECT if self.correct_answer_var.get()
-                                        == self.CORRECT else self.CORRECT)
-        self.update_current_item_result()
+    def schedule_save(self):
+        # Save once answering pauses, rather than after every card.
+        if self.schedule_save_id is not None:
+            self.after_cancel(self.schedule_save_id)
+        self.schedule_save_id = self.after(
+            self.SCHEDULE_SAVE_MS, self.save_schedule)
+
+    def save_schedule(self):
+        self.schedule_save_id = None
+        self.session.scheduler.save()
 
     def set_config_state(self, tk_widgets=[], state=tk.ACTIVE):
         for widget in tk_widgets:
             widget.config(state=state)
 
     def enable_csv_file(self, file_name, enable):
-        if enable:
+        if self.loader.loading:
+            # Changed mid-load: start over with the new set of decks.
+            if enable:
+                self.current_cvs_files.add(file_name)
+            else:
+                self.current_cvs_files.discard(file_name)
+            self.start_test()
+        elif enable:
+            # Counted as enabled right away, in case another deck is toggled before it loads.
             self.current_cvs_files.add(file_name)
-        elif file_name in self.current_cvs_files:
-            self.current_cvs_files.remove(file_name)
-        self.start_test()
+            self.loader.load_deck(
+                file_name, lambda raw_rows: self.deck_loaded(file_name, raw_rows))
+            self.show_loading()
+        else:
+            self.session.enable_csv_file(file_name, enable)
+            self.update_length_menu()
+            self.show_session()
 
     def set_strict_mode(self, use_strict_mode):
-        self.strict_mode = use_strict_mode
-        self.start_test()
+        self.session.set_strict_mode(use_strict_mode)
+        self.update_length_menu()
+        self.show_session()
 
     def toggle_debug_mode(self):
         self.debug_mode_enabled = not self.debug_mode_enabled
         if self.debug_mode_enabled:
+            import test_acronym_debug as debug
             self.debugger = debug.DebugWindow(
                 self,
                 self.ALL_CSV_FILES,
                 self.current_cvs_files,
                 self.enable_csv_file,
-                self.strict_mode,
+                self.session.strict_mode,
                 self.set_strict_mode
             )
         else:
             self.debugger.destroy()
 
+    @timing.timed(lambda self, event: f"win_evt {event.keysym}")
     def win_evt(self, event):
+        if self.focus_get() in (self.typed_answer_entry, self.port_filter_entry, self.item_filter_entry):
+            # Keys typed in the answer, Ports or Filter box are text; Escape leaves it.
+            if event.keysym == 'Escape':
+                self.focus_set()
+            return
         match event.keysym:
             case 'Right' | 'Down':
                 self.next_item()
@@ -480,7 +652,7 @@ class AcronymTester(tk.Tk):
             case 'space' | 'Return':
                 self.toggle_itemvalue()
             case 'Escape':
-                if self.manual_entry_mode_enabled:
+                if self.session.manual_entry_mode_enabled:
                     self.set_manual_entry_mode(False)
                 else:
                     self.toggle_correct_answer(update_var=True)
@@ -491,15 +663,26 @@ class AcronymTester(tk.Tk):
     def bring_app_to_front(self):
         # Make sure the app window is in front when the app launches.
         # https://stackoverflow.com/questions/8691655/how-to-put-a-tkinter-window-on-top-of-the-others
-        if "Darwin" in platform.system():
+        if sys.platform == 'darwin':
+            import subprocess
             script = 'tell application "System Events" to set frontmost of the first process whose unix id is {pid} to true'.format(
                 pid=os.getpid())
-            os.system("/usr/bin/osascript -e '{script}'".format(script=script))
+            # Run osascript directly, without a shell, and don't wait for it.
+            subprocess.Popen(['/usr/bin/osascript', '-e', script])
         else:
             self.lift()
 
 
-if __name__ == "__main__":
-    root = AcronymTester()
+def main(deck_names=None):
+    root = AcronymTester(deck_names)
     root.bring_app_to_front()
     root.mainloop()
+    root.loader.shutdown()
+    root.save_schedule()
+    root.save_snapshot()
+    if root.session.progress is not None:
+        root.session.progress.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,19 @@
+import os
+
+'''
+    Tests for the modules in the repository root, run from the root with either of:
+
+        python3 -m unittest discover tests
+        python3 -m pytest tests
+
+    Decks are found relative to the working directory, as in the app; deck_dir() switches to the root for tests that load the shipped decks.
+'''
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def deck_dir(test_case):
+    # Load decks from the repository root for the rest of this test.
+    previous_dir = os.getcwd()
+    os.chdir(REPO_DIR)
+    test_case.addCleanup(os.chdir, previous_dir)
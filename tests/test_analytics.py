@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+
+import test_acronym_analytics as analytics
+import test_acronym_progress as progress
+
+DAY = progress.DAY_SECONDS
+START = 1_700_000_000
+# Session ids are start times in nanoseconds.
+FIRST, SECOND, THIRD = START * 10 ** 9, (START + 2 * DAY) * 10 ** 9, (START + 10 * DAY) * 10 ** 9
+
+# (session, deck, itemkey, seconds after START, outcome) per student
+HISTORY = {
+    'a.sqlite3': [(FIRST, 'A+', 'ap', 0, 0), (FIRST, 'A+', 'lan', 100, 1), (FIRST, 'A+', 'kb', 200, 0),
+                  (FIRST, 'A+', 'ap', 1800, 1), (SECOND, 'Net+', 'ap', 2 * DAY, 0),
+                  (SECOND, 'Net+', 'kb', 2 * DAY + 10, 0), (SECOND, 'Net+', 'kb', 2 * DAY + 20, 1)],
+    'b.sqlite3': [(THIRD, 'A+', 'ap', 10 * DAY, 1), (THIRD, 'A+', 'lan', 10 * DAY + 5, 0),
+                  (THIRD, '', 'dhcp', 10 * DAY + 9, 1)],
+}
+
+
+def columns(answers):
+    sessions, decks, keys, seconds, outcomes = zip(*answers)
+    return sessions, decks, keys, [START + second for second in seconds], outcomes
+
+
+@unittest.skipIf(analytics.np is None, 'needs NumPy')
+class AnalyzeTest(unittest.TestCase):
+    # A history small enough to count by hand.
+
+    def setUp(self):
+        self.log = analytics.AnswerLog(HISTORY, [columns(answers) for answers in HISTORY.values()])
+
+    def test_totals(self):
+        report = analytics.analyze(self.log)
+        self.assertEqual((report.answer_count, report.acronym_count, report.accuracy), (10, 4, 0.5))
+
+    def test_hardest(self):
+        # kb: 2 of 3 missed, (2 + 1) / (3 + 2) = 0.6; ap: 2 of 4, 0.5; lan and dhcp have too few answers.
+        report = analytics.analyze(self.log)
+        self.assertEqual(report.hardest, [('kb', 3, 2, 2 / 3), ('ap', 4, 2, 0.5)])
+        # With every acronym ranked, lan ties ap and comes after it, as first answered later.
+        report = analytics.analyze(self.log, min_answers=1)
+        self.assertEqual(report.hardest_keys, ['kb', 'ap', 'lan', 'dhcp'])
+        self.assertEqual(analytics.analyze(self.log, top=1, min_answers=1).hardest_keys, ['kb'])
+        self.assertEqual(analytics.analyze(self.log, min_answers=5).hardest, [])
+
+    def test_decks_and_lengths(self):
+        report = analytics.analyze(self.log)
+        self.assertEqual(report.decks, [('A+', 6, 0.5), ('Net+', 3, 1 / 3), ('(unknown)', 1, 1.0)])
+        self.assertEqual(report.lengths, [(2, 7, 3 / 7), (3, 2, 0.5), (4, 1, 1.0)])
+
+    def test_forgetting_curve(self):
+        # Only answers after one by the same student count: student a's ap after 30 minutes, then 2 days less 30 minutes; kb after 2 days less 190 seconds, then 10 seconds. Student b's answers are all firsts.
+        report = analytics.analyze(self.log)
+        self.assertEqual(report.forgetting, [('< 1 hour', 2, 1.0), ('1-3 days', 2, 0.0)])
+
+    def test_sessions(self):
+        report = analytics.analyze(self.log)
+        self.assertEqual(report.sessions, [(FIRST, START, 4, 0.5), (SECOND, START + 2 * DAY, 3, 1 / 3),
+                                           (THIRD, START + 10 * DAY, 3, 2 / 3)])
+        # A least-squares line through three evenly spaced points has the slope of its ends.
+        self.assertAlmostEqual(report.trend, (2 / 3 - 0.5) / 2)
+        one_session = analytics.AnswerLog(['b'], [columns(HISTORY['b.sqlite3'])])
+        self.assertIsNone(analytics.analyze(one_session).trend)
+
+    def test_empty(self):
+        report = analytics.analyze(analytics.AnswerLog([], []))
+        self.assertEqual(report.answer_count, 0)
+        self.assertEqual(report.text(), 'No answers yet')
+        self.assertEqual(report.to_dict()['hardest'], [])
+
+    def test_text_and_dict(self):
+        report = analytics.analyze(self.log)
+        self.assertTrue(report.text().startswith('10 answers, 4 acronyms, 50% correct\nTrend: +8.3 points'))
+        self.assertEqual(report.to_dict()['hardest'][0], {'itemkey': 'kb', 'answers': 3, 'misses': 2,
+                                                          'error_rate': 2 / 3})
+
+
+@unittest.skipIf(analytics.np is None, 'needs NumPy')
+class ReadTest(unittest.TestCase):
+    # Databases and exported logs read back as the same answers.
+
+    def setUp(self):
+        data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(data_dir.cleanup)
+        self.data_dir = data_dir.name
+
+    def test_exported_log(self):
+        log = analytics.AnswerLog(['a'], [columns(HISTORY['a.sqlite3'])])
+        export_path = os.path.join(self.data_dir, 'class.csv')
+        log.save_csv(export_path)
+        self.assertEqual(analytics.analyze(analytics.AnswerLog.load([export_path])).to_dict(),
+                         analytics.analyze(log).to_dict())
+
+    def test_progress_database(self):
+        store = progress.ProgressStore(os.path.join(self.data_dir, progress.PROGRESS_FILE))
+        self.addCleanup(store.close)
+        for _session, deck, key, second, outcome in HISTORY['a.sqlite3']:
+            store.record(deck, key, bool(outcome), ts=START + second)
+        report = analytics.analyze_history(store)
+        self.assertEqual((report.answer_count, report.accuracy), (7, 3 / 7))
+        # On their own, student a's ap and kb were both missed 2 times in 3; ap was answered first.
+        self.assertEqual(report.hardest, [('ap', 3, 2, 2 / 3), ('kb', 3, 2, 2 / 3)])
+        self.assertEqual(report.forgetting, [('< 1 hour', 2, 1.0), ('1-3 days', 2, 0.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
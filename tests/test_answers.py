@@ -0,0 +1,116 @@
+import random
+import unittest
+
+import test_acronym_answers as answers
+
+
+def levenshtein(first, second):
+    # The textbook dynamic program, one row at a time.
+    row = list(range(len(second) + 1))
+    for i, first_char in enumerate(first, 1):
+        previous_row, row = row, [i]
+        for j, second_char in enumerate(second, 1):
+            row.append(min(previous_row[j] + 1, row[j - 1] + 1,
+                           previous_row[j - 1] + (first_char != second_char)))
+    return row[-1]
+
+
+class EditDistanceTest(unittest.TestCase):
+    # The bit-parallel distance is the textbook one whenever it is within the limit, and None otherwise.
+
+    def check(self, answer, typed, max_distance):
+        distance = levenshtein(answer, typed)
+        self.assertEqual(answers.edit_distance(answer, answers.char_masks(answer), typed, max_distance),
+                         distance if distance <= max_distance else None, (answer, typed, max_distance))
+
+    def test_random_strings(self):
+        rng = random.Random(4)
+        for alphabet in ('ab', 'abcd ', 'abcdefghijklmnopqrstuvwxyz '):
+            for _ in range(2000):
+                answer = ''.join(rng.choices(alphabet, k=rng.randrange(12)))
+                typed = ''.join(rng.choices(alphabet, k=rng.randrange(12)))
+                self.check(answer, typed, rng.randrange(12))
+
+    def test_long_answers(self):
+        # Wider than a machine word, and typed with a few typos.
+        rng = random.Random(5)
+        for _ in range(200):
+            answer = ''.join(rng.choices('abcdefgh ', k=rng.randrange(60, 200)))
+            typed = list(answer)
+            for _ in range(rng.randrange(8)):
+                position = rng.randrange(len(typed) + 1)
+                match rng.randrange(3):
+                    case 0:
+                        typed.insert(position, rng.choice('abcdefgh '))
+                    case 1:
+                        del typed[min(position, len(typed) - 1)]
+                    case 2:
+                        typed[min(position, len(typed) - 1)] = rng.choice('abcdefgh ')
+            self.check(answer, ''.join(typed), rng.randrange(10))
+
+    def test_edge_cases(self):
+        for answer, typed in (('', ''), ('', 'abc'), ('abc', ''), ('abc', 'abc'), ('kitten', 'sitting'),
+                              ('flaw', 'lawn'), ('a' * 70, 'a' * 69 + 'b')):
+            for max_distance in range(5):
+                self.check(answer, typed, max_distance)
+
+
+class AnswerKeyTest(unittest.TestCase):
+    # Typed answers are graded after normalizing, with one typo per EDIT_EVERY characters.
+
+    def setUp(self):
+        self.answer_key = answers.AnswerKey(['Kilobyte', 'Knowledge Base'])
+
+    def grade(self, typed, values):
+        grade = self.answer_key.grade(typed, values)
+        return grade.value, grade.distance
+
+    def test_normalized_forms(self):
+        values = ['Command and Control']
+        for typed in ('Command & Control', 'command-and-control', 'COMMAND CONTROL', '  command,control!'):
+            with self.subTest(typed=typed):
+                self.assertEqual(self.grade(typed, values), ('Command and Control', 0))
+
+    def test_notes_are_optional(self):
+        values = ['Full Disk Encryption (BitLocker)']
+        self.assertEqual(answers.accepted_answers(values[0]), ('full disk encryption bitlocker', 'full disk encryption'))
+        self.assertEqual(self.grade('full disk encryption', values), (values[0], 0))
+        self.assertEqual(self.grade('Full Disk Encryption (BitLocker)', values), (values[0], 0))
+        self.assertEqual(self.grade('full disk encrypton', values), (values[0], 1))
+
+    def test_typo_allowance(self):
+        # 'knowledge base' has 14 characters: two typos are allowed, three are not.
+        values = ['Knowledge Base']
+        self.assertEqual(answers.allowed_edits('knowledge base'), 2)
+        self.assertEqual(self.grade('knowlege base', values), (values[0], 1))
+        self.assertEqual(self.grade('knowlege bas', values), (values[0], 2))
+        self.assertEqual(self.grade('nowlege bas', values), (None, None))
+        # Under EDIT_EVERY characters, only the exact answer counts.
+        self.assertEqual(self.grade('ap', ['AP']), ('AP', 0))
+        self.assertEqual(self.grade('at', ['AP']), (None, None))
+        self.assertEqual(self.grade('acess point', ['Access Point']), ('Access Point', 1))
+
+    def test_closest_value_wins(self):
+        values = ['Kilobyte', 'Knowledge Base']
+        self.assertEqual(self.grade('kilobite', values), ('Kilobyte', 1))
+        self.assertEqual(self.grade('knowledge bas', values), ('Knowledge Base', 1))
+        self.assertEqual(self.grade('Knowledge-Base', values), ('Knowledge Base', 0))
+        # The nearer of two values within their allowance.
+        self.assertEqual(self.grade('abcdefghijkl', ['abcdefghijxx', 'abcdefghijkx']), ('abcdefghijkx', 1))
+
+    def test_values_not_loaded_yet(self):
+        self.assertEqual(len(self.answer_key), 2)
+        self.assertEqual(self.grade('kilobit', ['Kilobit']), ('Kilobit', 0))
+        self.assertEqual(len(self.answer_key), 3)
+
+    def test_grade_text(self):
+        values = ['Knowledge Base']
+        self.assertEqual(self.answer_key.grade('  ', values).text(), '')
+        self.assertEqual(self.answer_key.grade('knowledge base', values).text(), 'Correct: Knowledge Base')
+        self.assertEqual(self.answer_key.grade('knowlege base', values).text(), 'Correct, 1 typo: Knowledge Base')
+        self.assertEqual(self.answer_key.grade('knowlege bas', values).text(), 'Correct, 2 typos: Knowledge Base')
+        self.assertEqual(self.answer_key.grade('kilobyte', values).text(), 'Not yet')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import hashlib
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import test_acronym_cache as deck_cache
+
+DECK = 'mine'
+CSV_TEXT = 'itemkey,itemvalue,itemlink,strict\nLAN,Local Area Network,https://example.com/lan,true\nAP,Access Point,https://example.com/ap,\n'
+
+
+class DeckCacheTest(unittest.TestCase):
+    # The compiled file is used while its source is unchanged, and compiled again when the source or the format changes.
+
+    def setUp(self):
+        data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(data_dir.cleanup)
+        previous_dir = os.getcwd()
+        os.chdir(data_dir.name)
+        self.addCleanup(os.chdir, previous_dir)
+        self.source_path = DECK + '.csv'
+        self.cache_path = deck_cache.cache_path(self.source_path)
+        self.mtime_ns = 1_700_000_000 * 10 ** 9
+        self.write_source(CSV_TEXT)
+
+    def write_source(self, text, mtime_ns=None):
+        with open(self.source_path, 'w', encoding='utf-8') as source_file:
+            source_file.write(text)
+        if mtime_ns is None:
+            # Every write gets its own mtime, however coarse the file system's clock.
+            self.mtime_ns += 10 ** 9
+            mtime_ns = self.mtime_ns
+        os.utime(self.source_path, ns=(mtime_ns, mtime_ns))
+
+    def load(self):
+        # (rows, whether the source was compiled)
+        with mock.patch.object(deck_cache, 'compile_rows', wraps=deck_cache.compile_rows) as compile_rows:
+            rows = deck_cache.load_deck(DECK)
+        return rows, compile_rows.called
+
+    def header(self):
+        return deck_cache.read_cache(self.cache_path)[0]
+
+    def test_compiled_once(self):
+        rows, compiled = self.load()
+        self.assertTrue(compiled)
+        self.assertEqual(rows, (('AP', 'Access Point', 'https://example.com/ap', ''),
+                                ('LAN', 'Local Area Network', 'https://example.com/lan', 'true')))
+        self.assertTrue(os.path.exists(self.cache_path))
+        self.assertEqual(self.load(), (rows, False))
+
+    def test_content_change(self):
+        self.load()
+        self.write_source(CSV_TEXT + 'WAN,Wide Area Network,https://example.com/wan,true\n')
+        rows, compiled = self.load()
+        self.assertTrue(compiled)
+        self.assertEqual([row[0] for row in rows], ['AP', 'LAN', 'WAN'])
+        self.assertEqual(self.load(), (rows, False))
+
+    def test_same_size_edit(self):
+        # Only the mtime tells; the hash then finds the content changed.
+        self.load()
+        edited = CSV_TEXT.replace('Access Point', 'Access Pount')
+        self.assertEqual(len(edited), len(CSV_TEXT))
+        self.write_source(edited)
+        rows, compiled = self.load()
+        self.assertTrue(compiled)
+        self.assertEqual(rows[0][1], 'Access Pount')
+
+    def test_size_change_with_same_mtime(self):
+        rows, _compiled = self.load()
+        mtime_ns = os.stat(self.source_path).st_mtime_ns
+        self.write_source(CSV_TEXT + 'WAN,Wide Area Network,https://example.com/wan,true\n', mtime_ns=mtime_ns)
+        new_rows, compiled = self.load()
+        self.assertTrue(compiled)
+        self.assertEqual(len(new_rows), len(rows) + 1)
+
+    def test_touched_source(self):
+        # Same content, new mtime: the rows are reused and the header catches up.
+        rows, _compiled = self.load()
+        self.write_source(CSV_TEXT)
+        self.assertEqual(self.load(), (rows, False))
+        self.assertEqual(self.header()[2], os.stat(self.source_path).st_mtime_ns)
+        with mock.patch('hashlib.sha1', side_effect=AssertionError('hashed again')):
+            self.assertEqual(self.load(), (rows, False))
+
+    def test_version_bump(self):
+        rows, _compiled = self.load()
+        with mock.patch.object(deck_cache, 'CACHE_VERSION', deck_cache.CACHE_VERSION + 1):
+            self.assertEqual(deck_cache.read_cache(self.cache_path), (None, None))
+            self.assertEqual(self.load(), (rows, True))
+            self.assertEqual(self.header()[1], deck_cache.CACHE_VERSION)
+        # Back on this version, the newer file is compiled again too.
+        self.assertEqual(self.load(), (rows, True))
+        self.assertEqual(self.load(), (rows, False))
+
+    def test_unreadable_cache(self):
+        rows, _compiled = self.load()
+        with open(self.cache_path, 'r+b') as cache_file:
+            cache_file.truncate(os.path.getsize(self.cache_path) - 3)
+        self.assertEqual(self.load(), (rows, True))
+        with open(self.cache_path, 'wb') as cache_file:
+            cache_file.write(b'not a cache')
+        self.assertEqual(self.load(), (rows, True))
+
+    def test_deck_digest(self):
+        with open(self.source_path, 'rb') as source_file:
+            digest = hashlib.sha1(source_file.read()).digest()
+        # Hashed without a compiled file, then read from its header.
+        self.assertEqual(deck_cache.deck_digest(DECK), digest)
+        self.load()
+        with mock.patch('hashlib.sha1', side_effect=AssertionError('hashed again')):
+            self.assertEqual(deck_cache.deck_digest(DECK), digest)
+        self.assertIsNone(deck_cache.deck_digest('missing'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import contextlib
+import io
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import test_acronym_cli as cli
+import test_acronym_session as session
+
+from tests import deck_dir
+
+DECK = 'A+ acronyms'
+
+
+class ScriptTest(unittest.TestCase):
+    # A script run by main() drives a Session the same way as calling it directly.
+
+    def setUp(self):
+        deck_dir(self)
+        data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(data_dir.cleanup)
+        self.data_dir = data_dir.name
+
+    def write_script(self, text):
+        path = os.path.join(self.data_dir, 'commands.txt')
+        with open(path, 'w') as script_file:
+            script_file.write(text)
+        return path
+
+    def run_main(self, *argv, stdin=''):
+        # (stdout lines, stderr text)
+        out, err = io.StringIO(), io.StringIO()
+        with mock.patch('sys.stdin', io.StringIO(stdin)), \
+                contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            self.assertEqual(cli.main(['--deck', DECK, '--seed', '3', *argv]), 0)
+        return out.getvalue().splitlines(), err.getvalue()
+
+    def direct_session(self):
+        # The session main() builds for the same seed.
+        a_session = session.Session([DECK], rng=random.Random(3))
+        a_session.start_test()
+        return a_session
+
+    def test_script_file(self):
+        lines, err = self.run_main('--script', self.write_script(
+            '# two right, one wrong\nnext 2\nwrong\nnext\nshow\nscore\nprev\nstatus\n'))
+        self.assertEqual(err, '')
+        expected = self.direct_session()
+        expected.next_item()
+        expected.next_item()
+        expected_lines = [cli.status_text(expected)]
+        expected.set_answer(expected.INCORRECT)
+        expected.next_item()
+        expected_lines += [cli.status_text(expected), ' / '.join(expected.current_item[expected.ITEM_VALUES]),
+                           expected.score_text()]
+        expected.prev_item()
+        expected_lines += [cli.status_text(expected)] * 2
+        self.assertEqual(lines, expected_lines)
+        self.assertTrue(lines[0].startswith('3/'))
+
+    def test_stdin(self):
+        lines, err = self.run_main(stdin='next\nbogus\nreview on\nquit\nnext\n')
+        self.assertEqual(err, 'unknown command: bogus\n')
+        # Nothing was missed, so review mode stays off; nothing runs after quit.
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[1], lines[0])
+        self.assertTrue(lines[0].startswith('2/'))
+
+    def test_bad_arguments_are_reported(self):
+        lines, err = self.run_main(stdin='ports nothing\nfilter length>>\nlength 4\n')
+        self.assertIn('not a port query: nothing', err)
+        self.assertIn('bad filter:', err)
+        self.assertEqual(len(lines), 1)
+        expected = self.direct_session()
+        expected.set_acronym_length(4)
+        self.assertEqual(lines, [cli.status_text(expected)])
+
+    def test_find(self):
+        lines, _err = self.run_main(stdin='find lan\nfind zzzz\nstatus\n')
+        expected = self.direct_session()
+        lan = expected.key_index.find('lan')
+        self.assertTrue(lines[0].startswith(' / '.join(lan[expected.ITEM_VALUES]) + '  ['))
+        self.assertEqual(lines[1], '-  []')
+        # A lookup doesn't move the session.
+        self.assertEqual(lines[2], cli.status_text(expected))
+
+    def test_snapshot_resumes(self):
+        snapshot_path = os.path.join(self.data_dir, 'session.snapshot')
+        first, _err = self.run_main('--snapshot', snapshot_path, stdin='wrong\nnext 4\n')
+        second, err = self.run_main('--snapshot', snapshot_path, stdin='status\nscore\n')
+        self.assertEqual(err, '')
+        expected = self.direct_session()
+        expected.set_answer(expected.INCORRECT)
+        for _ in range(4):
+            expected.next_item()
+        self.assertEqual(first, [cli.status_text(expected)])
+        self.assertEqual(second, [cli.status_text(expected), expected.score_text()])
+
+    def test_simulate(self):
+        lines, err = self.run_main('--simulate', '3', '--answers', '10')
+        self.assertEqual(err, '')
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].startswith('3 sessions, '))
+        answer_count = int(lines[0].split(', ')[1].split()[0])
+        self.assertGreaterEqual(answer_count, 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
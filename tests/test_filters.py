@@ -0,0 +1,83 @@
+import os
+import random
+import tempfile
+import unittest
+
+import test_acronym_filters as filters
+import test_acronym_session as session
+import test_acronym_snapshot as snapshot
+
+from tests import deck_dir
+
+
+class MissedFilterTest(unittest.TestCase):
+    # missed and correct keep the acronyms they matched when applied, whatever is re-filtered after.
+
+    def setUp(self):
+        deck_dir(self)
+        self.session = session.Session(['A+ acronyms'], rng=random.Random(1))
+        self.session.start_test()
+        # Miss the first five, get the next three right.
+        for answer in [self.session.INCORRECT] * 5 + [self.session.CORRECT] * 3:
+            self.session.set_answer(answer)
+            self.session.next_item()
+        self.missed = {item.folded_key for item in self.session.all_items[:5]}
+        self.correct = {item.folded_key for item in self.session.all_items[5:8]}
+
+    def active_keys(self):
+        return {item.folded_key for item in self.session.active_items}
+
+    def test_missed_after_length_change(self):
+        self.assertEqual(self.session.set_item_filter(filters.parse_filter('missed')), 5)
+        self.assertEqual(self.active_keys(), self.missed)
+        length = len(next(iter(self.missed)))
+        self.session.set_acronym_length(length)
+        self.assertEqual(self.active_keys(), {key for key in self.missed if len(key) == length})
+        self.session.set_acronym_length(0)
+        self.assertEqual(self.active_keys(), self.missed)
+
+    def test_correct_after_strict_mode_and_deck_changes(self):
+        self.session.set_item_filter(filters.parse_filter('correct'))
+        self.assertEqual(self.active_keys(), self.correct)
+        self.session.set_strict_mode(True)
+        self.session.set_strict_mode(False)
+        self.assertEqual(self.active_keys(), self.correct)
+        self.session.enable_csv_file('Network+ N10-009 acronyms', True)
+        self.assertEqual(self.active_keys(), self.correct)
+
+    def test_not_missed(self):
+        self.session.set_item_filter(filters.parse_filter('not missed'))
+        self.session.set_acronym_length(0)
+        self.assertEqual(len(self.session.active_items), len(self.session.all_items) - 5)
+        self.assertFalse(self.active_keys() & self.missed)
+
+    def test_keep_settings(self):
+        self.session.set_item_filter(filters.parse_filter('missed or correct'))
+        reloaded = session.Session(['A+ acronyms'], rng=random.Random(2))
+        reloaded.start_test()
+        reloaded.keep_settings(self.session)
+        self.assertEqual({item.folded_key for item in reloaded.active_items}, self.missed | self.correct)
+
+    def test_snapshot_keeps_pinned_keys(self):
+        self.session.set_item_filter(filters.parse_filter('missed or strict'))
+        expected = self.active_keys()
+        with tempfile.TemporaryDirectory() as data_dir:
+            snapshot_file = snapshot.SnapshotFile(os.path.join(data_dir, snapshot.SNAPSHOT_FILE))
+            snapshot_file.save(self.session)
+            saved = snapshot_file.read()
+        restored = session.Session()
+        self.assertTrue(restored.restore_snapshot(saved))
+        self.assertEqual(restored.item_filter, self.session.item_filter)
+        restored.set_acronym_length(0)
+        self.assertEqual({item.folded_key for item in restored.active_items}, expected)
+
+    def test_pin_needs_one_key_set_per_term(self):
+        item_filter = filters.parse_filter('missed and not correct')
+        self.assertFalse(item_filter.resolved)
+        self.assertTrue(item_filter.pin([{'a'}, {'b'}]).resolved)
+        with self.assertRaises(filters.FilterError):
+            item_filter.pin([{'a'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
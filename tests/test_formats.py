@@ -0,0 +1,61 @@
+import unittest
+
+import test_acronym_formats as formats
+
+
+def error_line(source_path, text):
+    try:
+        list(formats.read_rows(source_path, text))
+    except formats.DeckFormatError as error:
+        return error.line
+    return None
+
+
+class JsonLineNumberTest(unittest.TestCase):
+    # DeckFormatError points at the line of the bad record, whatever comes before the array.
+
+    def test_leading_newlines_and_bad_record(self):
+        text = ('\n\n\n'
+                '[\n'
+                '  {"itemkey": "AP", "itemvalue": "Access Point"},\n'
+                '  {"itemkey": "", "itemvalue": "Nothing"}\n'
+                ']\n')
+        self.assertEqual(error_line('deck.json', text), 6)
+
+    def test_leading_newlines_and_missing_comma(self):
+        text = ('\n\n'
+                '[\n'
+                '  {"itemkey": "AP", "itemvalue": "Access Point"}\n'
+                '\n'
+                '  {"itemkey": "WAP", "itemvalue": "Wireless Access Point"}\n'
+                ']\n')
+        self.assertEqual(error_line('deck.json', text), 6)
+
+    def test_trailing_comma(self):
+        text = ('[\n'
+                '  {"itemkey": "AP", "itemvalue": "Access Point"},\n'
+                ']\n')
+        self.assertEqual(error_line('deck.json', text), 3)
+        self.assertEqual(error_line('deck.json', '[{"itemkey": "AP", "itemvalue": "Access Point"},'), 1)
+
+    def test_text_after_the_array(self):
+        text = '\n[{"itemkey": "AP", "itemvalue": "Access Point"}\n]\n\nmore\n'
+        self.assertEqual(error_line('deck.json', text), 3)
+
+    def test_record_lines(self):
+        text = ('\n'
+                '[{"itemkey": "AP", "itemvalue": "Access Point"},\n'
+                '\n'
+                ' {"itemkey": "WAP",\n'
+                '  "itemvalue": "Wireless Access Point"}, {"itemkey": "LAN", "itemvalue": "Local Area Network"}]')
+        self.assertEqual([line for line, _fields in formats.read_json('deck.json', text)], [2, 4, 5])
+
+    def test_same_lines_as_jsonl_and_csv(self):
+        jsonl_text = '{"itemkey": "AP", "itemvalue": "Access Point"}\n\n{"itemkey": "WAP", "itemvalue": 5}\n'
+        self.assertEqual(error_line('deck.jsonl', jsonl_text), 3)
+        csv_text = 'itemkey,itemvalue\nAP,Access Point\n\n,Nothing\n'
+        self.assertEqual(error_line('deck.csv', csv_text), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+import test_acronym_lint as lint
+
+
+class DuplicateKeyTest(unittest.TestCase):
+    # The same acronym in two files is reported when its values differ, with both sets of values.
+
+    def setUp(self):
+        data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(data_dir.cleanup)
+        self.data_dir = data_dir.name
+
+    def deck(self, name, *rows):
+        path = os.path.join(self.data_dir, name)
+        with open(path, 'w', encoding='utf-8') as deck_file:
+            deck_file.write('itemkey,itemvalue,itemlink\n')
+            deck_file.writelines(f"{key},{value},https://example.com/{key}\n" for key, value in rows)
+        return path
+
+    def findings(self, *paths, code='duplicate-key'):
+        return [finding for finding in lint.lint_files(paths).findings if finding.code == code]
+
+    def test_different_values_across_files(self):
+        first = self.deck('first.csv', ('AP', 'Access Point'), ('LAN', 'Local Area Network'))
+        second = self.deck('second.csv', ('LAN', 'Local Area Network'), ('ap', 'Wireless Access Point'))
+        (finding,) = self.findings(first, second)
+        self.assertEqual((finding.severity, finding.path, finding.line, finding.related),
+                         (lint.INFO, second, 3, (first, 2)))
+        self.assertIn("'Wireless Access Point'", finding.message)
+        self.assertIn("'Access Point'", finding.message)
+
+    def test_extra_meaning_across_files(self):
+        first = self.deck('first.csv', ('MAC', 'Media Access Control'))
+        second = self.deck('second.csv', ('MAC', 'Media Access Control'), ('MAC', 'Message Authentication Code'))
+        (finding,) = self.findings(first, second)
+        self.assertEqual(finding.line, 2)
+        self.assertIn("'Media Access Control' / 'Message Authentication Code'", finding.message)
+
+    def test_same_values_across_files(self):
+        first = self.deck('first.csv', ('AP', 'Access Point'), ('AP', 'Wireless Access Point'))
+        second = self.deck('second.csv', ('AP', 'Wireless Access Point'), ('AP', 'Access Point'))
+        self.assertEqual(self.findings(first, second), [])
+        self.assertEqual(len(self.findings(first, second, code='duplicate-row')), 2)
+
+    def test_one_file(self):
+        only = self.deck('only.csv', ('AP', 'Access Point'), ('AP', 'Wireless Access Point'))
+        self.assertEqual(self.findings(only), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import random
+import threading
+import time
+import unittest
+from unittest import mock
+
+import test_acronym_cache as deck_cache
+import test_acronym_loader as loader
+import test_acronym_session as session
+import test_acronym_snapshot as snapshot
+
+from tests import deck_dir
+
+DECKS = ['A+ acronyms', 'Network+ N10-009 acronyms']
+
+
+class DeckLoaderTest(unittest.TestCase):
+    # Loads finish on pool threads and are handed back by poll(); only the latest load is ever handed back.
+
+    def setUp(self):
+        deck_dir(self)
+        self.loader = loader.DeckLoader(max_workers=4)
+        self.addCleanup(self.loader.shutdown)
+        self.done = []
+
+    def on_done(self, name):
+        return lambda result: self.done.append((name, result))
+
+    def wait(self):
+        deadline = time.monotonic() + 30
+        while not self.loader.poll():
+            self.assertLess(time.monotonic(), deadline, 'load never finished')
+            time.sleep(0.005)
+        self.assertFalse(self.loader.loading)
+
+    def gate_files(self):
+        # Deck files load only once the returned event is set.
+        release = threading.Event()
+        load_deck = deck_cache.load_deck
+
+        def gated_load_deck(file_name):
+            release.wait(30)
+            return load_deck(file_name)
+        patcher = mock.patch.object(deck_cache, 'load_deck', gated_load_deck)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(release.set)
+        return release
+
+    def items(self, a_session):
+        return sorted((item.key, item.values, item.links) for item in a_session.all_items)
+
+    def test_load_decks(self):
+        self.loader.load_decks(DECKS, True, self.on_done('decks'))
+        self.assertTrue(self.loader.loading)
+        self.wait()
+        [(_name, loaded)] = self.done
+        expected = session.Session(DECKS, True)
+        expected.start_test()
+        self.assertEqual(self.items(loaded), self.items(expected))
+        self.assertEqual(loaded.merger.sources(), DECKS)
+        self.assertEqual(len(loaded.results), len(loaded.active_items))
+        # Nothing is pending any more.
+        self.assertTrue(self.loader.poll())
+        self.assertEqual(len(self.done), 1)
+
+    def test_load_deck(self):
+        self.loader.load_deck(DECKS[0], self.on_done('rows'))
+        self.wait()
+        self.assertEqual(self.done, [('rows', deck_cache.load_deck(DECKS[0]))])
+
+    def test_new_load_drops_the_old_one(self):
+        release = self.gate_files()
+        self.loader.load_decks(DECKS, False, self.on_done('first'))
+        first_future = self.loader._pending[0]
+        self.loader.load_decks(DECKS[:1], False, self.on_done('second'))
+        self.assertFalse(self.loader.poll())
+        release.set()
+        self.wait()
+        self.assertEqual([name for name, _result in self.done], ['second'])
+        self.assertEqual(self.done[0][1].merger.sources(), DECKS[:1])
+        # The first build was cancelled before it started, or stopped at its next deck.
+        while not first_future.done():
+            time.sleep(0.005)
+        self.assertTrue(first_future.cancelled() or isinstance(first_future.exception(), loader.LoadCancelled))
+
+    def test_cancel(self):
+        release = self.gate_files()
+        self.loader.load_decks(DECKS, False, self.on_done('decks'))
+        self.loader.cancel()
+        self.assertFalse(self.loader.loading)
+        release.set()
+        self.assertTrue(self.loader.poll())
+        self.assertEqual(self.done, [])
+
+    def test_load_error_is_raised_by_poll(self):
+        with mock.patch.object(deck_cache, 'load_deck', side_effect=OSError('unreadable')):
+            self.loader.load_decks(DECKS, False, self.on_done('decks'))
+            with self.assertRaises(OSError):
+                while not self.loader.poll():
+                    time.sleep(0.005)
+        self.assertEqual(self.done, [])
+
+    def test_load_snapshot(self):
+        studied = session.Session(DECKS[:1], rng=random.Random(1))
+        studied.start_test()
+        studied.set_answer(studied.INCORRECT)
+        studied.next_item()
+        saved = snapshot.Snapshot.from_bytes(snapshot.Snapshot.from_session(studied).to_bytes())
+        self.loader.load_snapshot(saved, self.on_done('snapshot'))
+        self.wait()
+        [(_name, restored)] = self.done
+        self.assertEqual([item.key for item in restored.active_items], [item.key for item in studied.active_items])
+        self.assertEqual((restored.current_item_index, restored.results.incorrect_count), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,226 @@
+import csv
+import itertools
+import random
+import unittest
+
+import test_acronym_cache as deck_cache
+import test_acronym_deck as deck
+import test_acronym_session as session
+
+from tests import deck_dir
+
+
+def baseline_merge(deck_names, strict_mode):
+    '''
+        The merge DeckMerger replaced: read every row, sort by value then (stably) by key, drop non-strict rows in strict mode, and fold each run of equal case-folded keys into one acronym, keeping the first of equal values.
+    '''
+    rows = []
+    for deck_name in deck_names:
+        with open(deck_name + '.csv', newline='', encoding='utf-8') as csv_file:
+            rows += list(csv.DictReader(csv_file))
+    rows.sort(key=lambda row: row['itemvalue'].lower())
+    rows.sort(key=lambda row: row['itemkey'].lower())
+    if strict_mode:
+        rows = [row for row in rows if row.get('strict') == 'true']
+    merged = []
+    for row in rows:
+        if not merged or row['itemkey'].lower() != merged[-1][0].lower():
+            merged.append((row['itemkey'], [row['itemvalue']], [row['itemlink']]))
+        elif row['itemvalue'] not in merged[-1][1]:
+            merged[-1][1].append(row['itemvalue'])
+            merged[-1][2].append(row['itemlink'])
+    return merged
+
+
+def merged_items(merger):
+    return [(item[deck.ITEM_KEY], list(item[deck.ITEM_VALUES]), list(item[deck.ITEM_LINKS]))
+            for item in sorted(merger.items(), key=lambda item: item.folded_key)]
+
+
+class MergeEquivalenceTest(unittest.TestCase):
+    # The hash-indexed merge gives what sort-then-scan did, for the shipped decks alone and together, and test.csv.
+
+    def setUp(self):
+        deck_dir(self)
+
+    def check(self, deck_names, strict_mode):
+        merger = deck.DeckMerger(strict_mode)
+        for deck_name in deck_names:
+            merger.add_source(deck_name, deck_cache.load_deck(deck_name))
+        self.assertEqual(merged_items(merger), baseline_merge(deck_names, strict_mode))
+
+    def test_shipped_decks(self):
+        for count in range(1, len(session.Session.ALL_CSV_FILES) + 1):
+            for deck_names in itertools.combinations(session.Session.ALL_CSV_FILES, count):
+                for strict_mode in (False, True):
+                    with self.subTest(decks=deck_names, strict=strict_mode):
+                        self.check(deck_names, strict_mode)
+
+    def test_test_deck(self):
+        for strict_mode in (False, True):
+            with self.subTest(strict=strict_mode):
+                self.check(['test'], strict_mode)
+
+    def test_strict_mode_flip(self):
+        # Switching strict mode on a loaded merger ends up where a fresh merge does.
+        deck_names = session.Session.ALL_CSV_FILES
+        merger = deck.DeckMerger(False)
+        for deck_name in deck_names:
+            merger.add_source(deck_name, deck_cache.load_deck(deck_name))
+        for strict_mode in (True, False):
+            merger.set_strict_mode(strict_mode)
+            self.assertEqual(merged_items(merger), baseline_merge(deck_names, strict_mode))
+
+
+class IncrementalMergeTest(unittest.TestCase):
+    # Adding and removing decks and flipping strict mode one at a time ends up where a full merge of the same decks does.
+
+    def setUp(self):
+        deck_dir(self)
+
+    def test_random_changes(self):
+        deck_names = session.Session.ALL_CSV_FILES + ['test']
+        rows = {deck_name: deck_cache.load_deck(deck_name) for deck_name in deck_names}
+        rng = random.Random(4)
+        merger = deck.DeckMerger(False)
+        loaded = []
+        for step in range(40):
+            active = set(merger.items())
+            if rng.random() < 0.25:
+                added_items, removed_items = merger.set_strict_mode(not merger.strict_mode)
+            else:
+                deck_name = rng.choice(deck_names)
+                if deck_name in loaded:
+                    loaded.remove(deck_name)
+                    added_items, removed_items = merger.remove_source(deck_name)
+                else:
+                    loaded.append(deck_name)
+                    added_items, removed_items = merger.add_source(deck_name, rows[deck_name])
+            with self.subTest(step=step, decks=loaded, strict=merger.strict_mode):
+                self.assertEqual(merged_items(merger), baseline_merge(loaded, merger.strict_mode))
+                # The changes reported are exactly the items that came and went.
+                self.assertEqual(set(merger.items()), active - set(removed_items) | set(added_items))
+                self.assertFalse(active & set(added_items))
+                self.assertEqual(len(merger), len(merger.items()))
+
+    def test_meaning_lost_in_place(self):
+        # KB keeps its Item when a deck takes one of its meanings away, so lists holding it stay valid.
+        first = (('KB', 'Kilobyte', 'https://example.com/kilobyte', 'true'),)
+        second = (('KB', 'Knowledge Base', 'https://example.com/kb', ''),
+                  ('LAN', 'Local Area Network', 'https://example.com/lan', 'true'))
+        merger = deck.DeckMerger(False)
+        merger.add_source('first', first)
+        kb = merger.find('KB')
+        added_items, _removed_items = merger.add_source('second', second)
+        self.assertEqual([item.key for item in added_items], ['LAN'])
+        self.assertIs(merger.find('kb'), kb)
+        self.assertEqual(kb[deck.ITEM_VALUES], ('Kilobyte', 'Knowledge Base'))
+        self.assertEqual(kb[deck.ITEM_LINKS], ('https://example.com/kilobyte', 'https://example.com/kb'))
+
+        lan = merger.find('lan')
+        self.assertEqual(merger.remove_source('second'), ([], [lan]))
+        self.assertIs(merger.find('kb'), kb)
+        self.assertEqual(kb[deck.ITEM_VALUES], ('Kilobyte',))
+        self.assertIsNone(merger.find('lan'))
+
+        merger.add_source('second', second)
+        self.assertEqual(merger.set_strict_mode(True), ([], []))
+        self.assertEqual(kb[deck.ITEM_VALUES], ('Kilobyte',))
+        self.assertEqual(merger.remove_source('first'), ([], [kb]))
+        self.assertIsNone(kb.key)
+        self.assertEqual(merger.set_strict_mode(False), ([kb], []))
+        self.assertEqual((kb.key, kb[deck.ITEM_VALUES]), ('KB', ('Knowledge Base',)))
+
+
+class GroupedRowsTest(unittest.TestCase):
+    # add_source sorts and rebuilds each acronym once; that merges the same as one row at a time.
+
+    def rows(self, rng, count):
+        keys = ['KB', 'kb', 'Kb', 'LAN', 'ap']
+        values = ['Knowledge Base', 'knowledge base', 'Kilobyte', 'Kilobit', 'Local Area Network', 'Access Point']
+        return [(rng.choice(keys), rng.choice(values), f"https://example.com/{index}", rng.choice(['true', '']))
+                for index in range(count)]
+
+    def test_same_as_one_row_at_a_time(self):
+        rng = random.Random(3)
+        for _ in range(50):
+            first, second = self.rows(rng, rng.randrange(1, 40)), self.rows(rng, rng.randrange(1, 40))
+            for strict_mode in (False, True):
+                grouped = deck.DeckMerger(strict_mode)
+                grouped_added = grouped.add_source('first', first)[0] + grouped.add_source('second', second)[0]
+                one_by_one = deck.DeckMerger(strict_mode)
+                one_by_one_added = [item for item in map(one_by_one.add_row, first + second) if item is not None]
+                self.assertEqual(merged_items(grouped), merged_items(one_by_one))
+                # The same new items; in strict mode an acronym seen first in a non-strict row may come earlier.
+                self.assertEqual(sorted(item.folded_key for item in grouped_added),
+                                 sorted(item.folded_key for item in one_by_one_added))
+                for item in grouped.items():
+                    self.assertEqual([row[deck.ROW_VALUE] for row in item.rows],
+                                     [row[deck.ROW_VALUE] for row in one_by_one.find(item.folded_key).rows])
+
+    def test_active_rows_share_the_rows(self):
+        merger = deck.DeckMerger(True)
+        merger.add_source('only', [('AP', 'Access Point', 'https://example.com/ap', 'true'),
+                                   ('LAN', 'Local Area Network', 'https://example.com/lan', 'true'),
+                                   ('LAN', 'Large Area Network', 'https://example.com/large', '')])
+        ap, lan = merger.find('ap'), merger.find('lan')
+        self.assertIs(ap.active_rows(), ap.rows)
+        self.assertEqual(lan[deck.ITEM_VALUES], ('Local Area Network',))
+        merger.set_strict_mode(False)
+        self.assertIs(lan.active_rows(), lan.rows)
+        self.assertEqual(lan[deck.ITEM_VALUES], ('Large Area Network', 'Local Area Network'))
+
+
+class ItemTest(unittest.TestCase):
+    # An Item reads like the dictionary it replaced and holds the rows it was given, not copies.
+
+    ROWS = [('KB', 'Knowledge Base', 'https://example.com/kb', ''),
+            ('kb', 'Kilobyte', 'https://example.com/kilobyte', 'true'),
+            ('Kb', 'Knowledge Base', 'https://example.com/other', 'true'),
+            ('KB', 'Kilobit', 'https://example.com/kilobit', '')]
+
+    def test_reads_like_a_dictionary(self):
+        merger = deck.DeckMerger()
+        merger.add_source('only', self.ROWS)
+        kb = merger.find('kB')
+        as_dict = {deck.ITEM_KEY: 'KB',
+                   deck.ITEM_VALUES: ['Kilobit', 'Kilobyte', 'Knowledge Base'],
+                   deck.ITEM_LINKS: ['https://example.com/kilobit', 'https://example.com/kilobyte',
+                                     'https://example.com/kb']}
+        self.assertEqual(len(kb), len(as_dict))
+        for field, value in as_dict.items():
+            self.assertEqual(list(kb[field]) if field != deck.ITEM_KEY else kb[field], value)
+        self.assertEqual(repr(kb), repr(as_dict))
+        with self.assertRaises(KeyError):
+            kb['strict']
+        self.assertFalse(hasattr(kb, '__dict__'))
+
+    def test_rows_are_shared(self):
+        merger = deck.DeckMerger()
+        merger.add_source('only', self.ROWS)
+        kb = merger.find('kb')
+        self.assertEqual(len(kb.rows), len(self.ROWS))
+        for row in kb.rows:
+            self.assertTrue(any(row is source_row for source_row in self.ROWS))
+        # The duplicate Knowledge Base row isn't active; the first loaded keeps its link.
+        self.assertEqual(len(kb.active_rows()), 3)
+        self.assertIs(kb.active_rows()[2], self.ROWS[0])
+
+    def test_strict_flips(self):
+        merger = deck.DeckMerger()
+        merger.add_source('only', self.ROWS)
+        kb = merger.find('kb')
+        for strict_mode, key, values in ((True, 'kb', ('Kilobyte', 'Knowledge Base')),
+                                         (False, 'KB', ('Kilobit', 'Kilobyte', 'Knowledge Base')),
+                                         (True, 'kb', ('Kilobyte', 'Knowledge Base'))):
+            with self.subTest(strict_mode=strict_mode):
+                merger.set_strict_mode(strict_mode)
+                self.assertEqual((kb.key, kb[deck.ITEM_VALUES]), (key, values))
+                self.assertTrue(all(row in kb.rows for row in kb.active_rows()))
+                if strict_mode:
+                    self.assertEqual(kb[deck.ITEM_LINKS],
+                                     ('https://example.com/kilobyte', 'https://example.com/other'))
+
+
+if __name__ == '__main__':
+    unittest.main()
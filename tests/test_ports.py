@@ -0,0 +1,116 @@
+import random
+import unittest
+
+import test_acronym_deck as deck
+import test_acronym_ports as ports
+
+MAX_PORT = ports.MAX_PORT
+
+
+class ParseQueryTest(unittest.TestCase):
+
+    QUERIES = {
+        'port 443': (None, 443, 443),
+        '443': (None, 443, 443),
+        '0': (None, 0, 0),
+        '65535': (None, MAX_PORT, MAX_PORT),
+        'tcp/443': ('tcp', 443, 443),
+        'TCP 443': ('tcp', 443, 443),
+        'udp / 53': ('udp', 53, 53),
+        'ports 20-25': (None, 20, 25),
+        'ports 20–25': (None, 20, 25),
+        '20 to 25': (None, 20, 25),
+        '25-20': (None, 20, 25),
+        'all udp': ('udp', 0, MAX_PORT),
+        'udp': ('udp', 0, MAX_PORT),
+        'udp 100-200': ('udp', 100, 200),
+        'all ports': (None, 0, MAX_PORT),
+        'well-known range': (None, 0, 1023),
+        'well known': (None, 0, 1023),
+        'tcp well-known': ('tcp', 0, 1023),
+        'Registered': (None, 1024, 49151),
+        'dynamic ports': (None, 49152, MAX_PORT),
+        'ephemeral': (None, 49152, MAX_PORT),
+    }
+    NOT_QUERIES = ['', 'ssh', 'port', '70000', 'tcp/70000', 'ports 1-70000', 'tcp udp', '443 tcp']
+
+    def test_queries(self):
+        for text, (protocol, low, high) in self.QUERIES.items():
+            with self.subTest(text=text):
+                query = ports.parse_query(text)
+                self.assertEqual(query, ports.PortQuery(protocol, low, high))
+                # str() reads back as the same query.
+                self.assertEqual(ports.parse_query(str(query)), query)
+
+    def test_not_queries(self):
+        for text in self.NOT_QUERIES:
+            with self.subTest(text=text):
+                self.assertIsNone(ports.parse_query(text))
+
+    def test_parse_port(self):
+        self.assertEqual(ports.parse_port(' TCP/22 '), ('tcp', 22))
+        for text in ('22', 'tcp/', 'tcp/70000', 'sctp/22', 'tcp/22/udp'):
+            self.assertIsNone(ports.parse_port(text), text)
+
+
+class PortIndexTest(unittest.TestCase):
+    # Random decks checked and unchecked, and strict mode flipped: items() returns what a scan of the active items finds.
+
+    KEYS = ['SSH', 'DNS', 'HTTP', 'NTP', 'LDAP', 'SNMP', 'tcp/22', 'udp/53', 'tcp/443', 'RDP']
+
+    def rows(self, rng, source):
+        rows = []
+        for index in range(rng.randrange(1, 12)):
+            key = rng.choice(self.KEYS)
+            port = f"{rng.choice(ports.PROTOCOLS)}/{rng.choice([22, 53, 80, 123, 443, 1024, 3389, 50000])}"
+            value = port if '/' not in key and rng.random() < 0.7 else f"Service {rng.randrange(3)}"
+            rows.append((key, value, f"https://example.com/{source}/{index}", rng.choice(['true', ''])))
+        return rows
+
+    def scan(self, merger, query, length):
+        # Active items with an active row naming a matching port, in order of the lowest matching port of any row.
+        first_ports = {}
+        for item in merger.items():
+            if length and len(item.key) != length:
+                continue
+            if not any((port := ports.row_port(row)) and query.matches(port) for row in item.active_rows()):
+                continue
+            first_ports[item] = min(port[1] for row in item.rows
+                                    if (port := ports.row_port(row)) and query.matches(port))
+        return sorted(first_ports, key=lambda item: (first_ports[item], item.folded_key))
+
+    def test_random_changes(self):
+        rng = random.Random(7)
+        queries = [ports.parse_query(text) for text in ('all ports', 'tcp', 'udp', '22', '53', 'tcp 80-443',
+                                                        'registered', 'dynamic', 'udp 1-100', '9999')]
+        for sequence in range(30):
+            with self.subTest(sequence=sequence):
+                self.check_sequence(rng, queries)
+
+    def check_sequence(self, rng, queries):
+        merger = deck.DeckMerger(rng.random() < 0.5)
+        port_index = ports.PortIndex(merger)
+        for step in range(20):
+            source = rng.choice(['first', 'second', 'third'])
+            choice = rng.random()
+            if choice < 0.2:
+                merger.set_strict_mode(not merger.strict_mode)
+            elif choice < 0.45 and source in merger.sources():
+                port_index.remove_rows(merger.source_rows(source))
+                merger.remove_source(source)
+            else:
+                if source in merger.sources():
+                    port_index.remove_rows(merger.source_rows(source))
+                rows = self.rows(rng, source)
+                merger.add_source(source, rows)
+                port_index.add_rows(rows)
+            self.assertEqual(len(port_index), sum(1 for name in merger.sources()
+                                                  for row in merger.source_rows(name) if ports.row_port(row)))
+            for query in queries:
+                for length, limit in ((0, None), (3, None), (0, 2)):
+                    self.assertEqual(port_index.items(query, length, limit),
+                                     self.scan(merger, query, length)[:limit], (step, str(query), length))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import tempfile
+import threading
+import unittest
+
+import test_acronym_progress as progress
+
+
+class ProgressStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(data_dir.cleanup)
+        self.store = progress.ProgressStore(os.path.join(data_dir.name, progress.PROGRESS_FILE))
+        self.addCleanup(self.store.close)
+
+    def test_missed_keys(self):
+        now = 10 * progress.DAY_SECONDS
+        self.store.record('A+ acronyms', 'ap', False, ts=now - 3600)
+        self.store.record('A+ acronyms', 'lan', True, ts=now - 3600)
+        self.store.record('A+ acronyms', 'wan', False, ts=now - 8 * progress.DAY_SECONDS)
+        self.assertEqual(self.store.missed_keys(7, now=now), {'ap'})
+        self.assertEqual(self.store.missed_keys(9, now=now), {'ap', 'wan'})
+        self.assertEqual(self.store.answer_count(), 3)
+
+    def test_queries_from_several_threads(self):
+        # Each thread gets its own reader; the first thread to query doesn't own it for the others.
+        self.store.record('A+ acronyms', 'ap', False)
+        self.assertEqual(self.store.missed_keys(), {'ap'})
+        results = []
+        errors = []
+
+        def query():
+            try:
+                results.append(self.store.missed_keys())
+            except Exception as error:
+                errors.append(error)
+        threads = [threading.Thread(target=query) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [{'ap'}] * 4)
+        self.assertEqual(self.store.answer_count(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
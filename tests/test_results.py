@@ -0,0 +1,86 @@
+import random
+import unittest
+
+import test_acronym_results as scoring
+
+RESULTS = (scoring.ResultsTracker.UNTESTED, scoring.ResultsTracker.CORRECT, scoring.ResultsTracker.INCORRECT)
+
+
+class ResultsPropertyTest(unittest.TestCase):
+    '''
+        Random set, commit, reset (resize) and restore sequences: after every step the incremental counters, incorrect positions and review navigation equal a full recount of the results, and the streaks count only the committed answers.
+    '''
+    SEQUENCES = 200
+    STEPS = 150
+
+    def check_sequences(self, tracker_class):
+        rng = random.Random(tracker_class.__name__)
+        for sequence in range(self.SEQUENCES):
+            with self.subTest(tracker=tracker_class.__name__, sequence=sequence):
+                self.check_sequence(tracker_class, rng)
+
+    def check_sequence(self, tracker_class, rng):
+        tracker = tracker_class(rng.randrange(40))
+        streak = best_streak = 0
+        for _step in range(self.STEPS):
+            choice = rng.random()
+            if choice < 0.05:
+                tracker.reset(rng.randrange(70))
+                streak = best_streak = 0
+            elif choice < 0.08:
+                streak, best_streak = rng.randrange(5), rng.randrange(5, 10)
+                tracker.restore([rng.choice(RESULTS) for _ in range(rng.randrange(70))], streak, best_streak)
+            elif choice < 0.3:
+                result = rng.choice((tracker.CORRECT, tracker.INCORRECT))
+                streak = streak + 1 if result == tracker.CORRECT else 0
+                best_streak = max(best_streak, streak)
+                tracker.commit(result)
+            elif len(tracker):
+                tracker.set(rng.randrange(len(tracker)), rng.choice(RESULTS))
+            self.check_recount(tracker, rng)
+            self.assertEqual((tracker.streak, tracker.best_streak), (streak, best_streak))
+
+    def check_recount(self, tracker, rng):
+        results = [tracker[index] for index in range(len(tracker))]
+        incorrect_indices = [index for index, result in enumerate(results) if result == tracker.INCORRECT]
+        self.assertEqual(tracker.correct_count, results.count(tracker.CORRECT))
+        self.assertEqual(tracker.incorrect_count, len(incorrect_indices))
+        self.assertEqual(tracker.untested_count, results.count(tracker.UNTESTED))
+        self.assertEqual(tracker.has_incorrect(), bool(incorrect_indices))
+        if hasattr(tracker, 'incorrect_indices'):
+            self.assertEqual(tracker.incorrect_indices, incorrect_indices)
+        # Review navigation walks the same positions, wrapping around.
+        walked = []
+        index = tracker.next_incorrect(-1)
+        while index is not None and index not in walked:
+            walked.append(index)
+            index = tracker.next_incorrect(index)
+        self.assertEqual(walked, incorrect_indices)
+        if len(tracker):
+            index = rng.randrange(len(tracker))
+            after = [position for position in incorrect_indices if position > index]
+            before = [position for position in incorrect_indices if position < index]
+            self.assertEqual(tracker.next_incorrect(index),
+                             (after or incorrect_indices or [None])[0])
+            self.assertEqual(tracker.prev_incorrect(index),
+                             (before or incorrect_indices or [None])[-1])
+
+    def test_tracker(self):
+        self.check_sequences(scoring.ResultsTracker)
+
+    def test_bitmap(self):
+        self.check_sequences(scoring.ResultsBitmap)
+
+    def test_bitmap_matches_tracker(self):
+        rng = random.Random(2)
+        tracker, bitmap = scoring.ResultsTracker(100), scoring.ResultsBitmap(100)
+        for _ in range(2000):
+            index, result = rng.randrange(100), rng.choice(RESULTS)
+            tracker.set(index, result)
+            bitmap.set(index, result)
+        self.assertEqual([bitmap[index] for index in range(100)], tracker.results)
+        self.assertEqual(bitmap.score_text(), tracker.score_text())
+
+
+if __name__ == '__main__':
+    unittest.main()
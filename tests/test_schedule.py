@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+
+import test_acronym_schedule as schedule
+
+
+class ScheduleFileTest(unittest.TestCase):
+    # A schedule file round-trips; one that can't be read starts an empty schedule with a warning.
+
+    def setUp(self):
+        data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(data_dir.cleanup)
+        self.path = os.path.join(data_dir.name, schedule.SCHEDULE_FILE)
+
+    def write(self, text):
+        with open(self.path, 'w') as schedule_file:
+            schedule_file.write(text)
+
+    def test_round_trip(self):
+        clock = [1000.0]
+        scheduler = schedule.Scheduler(self.path, clock=lambda: clock[0])
+        scheduler.set_cards(['ap', 'lan', 'wan'])
+        first = scheduler.next_index()
+        scheduler.answer(first, True)
+        scheduler.save()
+        loaded = schedule.Scheduler(self.path)
+        self.assertEqual(list(loaded.cards), [['ap', 'lan', 'wan'][first]])
+        card = loaded.cards[['ap', 'lan', 'wan'][first]]
+        self.assertEqual((card.interval, card.repetitions, card.due), (1, 1, 1000.0 + schedule.DAY_SECONDS))
+
+    def test_missing_file(self):
+        self.assertEqual(schedule.Scheduler(self.path).cards, {})
+
+    def test_unreadable_files(self):
+        for text in ('{"ap": [1, 2.5, 1, 0, 10', '["ap"]', '{"ap": [1, 2, 3, 4, 5, 6, 7]}', '{"ap": 5}'):
+            with self.subTest(text=text):
+                self.write(text)
+                with self.assertWarns(UserWarning):
+                    scheduler = schedule.Scheduler(self.path)
+                self.assertEqual(scheduler.cards, {})
+                scheduler.set_cards(['ap'])
+                self.assertEqual(scheduler.next_index(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import asyncio
+import random
+import unittest
+
+import test_acronym_server as server
+
+from tests import deck_dir
+
+DECK = 'A+ acronyms'
+
+
+class ServerTest(unittest.IsolatedAsyncioTestCase):
+    # A server on a free port, driven over HTTP by Client.
+
+    def setUp(self):
+        deck_dir(self)
+
+    async def asyncSetUp(self):
+        self.server = server.AcronymServer(rng=random.Random(1))
+        listener = await self.server.start('127.0.0.1', 0)
+        self.port = listener.sockets[0].getsockname()[1]
+        self.client = server.Client('127.0.0.1', self.port)
+
+        async def stop():
+            await self.client.close()
+            listener.close()
+            await listener.wait_closed()
+        self.addAsyncCleanup(stop)
+
+    async def create(self, seed=1):
+        return await self.client.request('POST', '/sessions', {'decks': [DECK], 'seed': seed})
+
+    async def assertStatus(self, status, method, path, payload=None):
+        with self.assertRaises(server.HttpError) as raised:
+            await self.client.request(method, path, payload)
+        self.assertEqual(raised.exception.status, status)
+        return str(raised.exception)
+
+    async def raw_request(self, data):
+        # Status of the answer to bytes a Client would never send.
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+        try:
+            writer.write(data)
+            await writer.drain()
+            return int((await reader.readline()).split()[1])
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    async def test_study(self):
+        self.assertIn(DECK, (await self.client.request('GET', '/decks'))['decks'])
+        state = await self.create()
+        path = f"/sessions/{state['session']}"
+        self.assertEqual((state['index'], state['answer'], state['review']), (0, True, False))
+        self.assertEqual(state['count'], len(self.server.library._decks[((DECK,), False)].result()))
+        first_key = state['itemkey']
+
+        # Toggling twice leaves the answer where it was; Next commits it once.
+        state = await self.client.request('POST', f"{path}/toggle")
+        self.assertFalse(state['answer'])
+        state = await self.client.request('POST', f"{path}/toggle")
+        self.assertTrue(state['answer'])
+        state = await self.client.request('POST', f"{path}/next")
+        self.assertEqual((state['index'], state['score']['correct'], state['score']['streak']), (1, 1, 1))
+
+        state = await self.client.request('POST', f"{path}/answer", {'correct': False})
+        self.assertFalse(state['answer'])
+        state = await self.client.request('POST', f"{path}/next")
+        self.assertEqual((state['score']['incorrect'], state['score']['streak'], state['score']['best_streak']),
+                         (1, 0, 1))
+        state = await self.client.request('POST', f"{path}/prev")
+        self.assertEqual((state['index'], state['answer']), (1, False))
+        state = await self.client.request('POST', f"{path}/prev")
+        self.assertEqual((state['index'], state['itemkey']), (0, first_key))
+        # Prev from the first acronym wraps around to the last.
+        state = await self.client.request('POST', f"{path}/prev")
+        self.assertEqual(state['index'], state['count'] - 1)
+
+        # Review mode visits the miss until it is answered correctly.
+        state = await self.client.request('POST', f"{path}/review", {'enabled': True})
+        self.assertEqual((state['review'], state['index'], state['answer']), (True, 1, False))
+        state = await self.client.request('POST', f"{path}/next")
+        self.assertEqual((state['review'], state['index']), (True, 1))
+        await self.client.request('POST', f"{path}/answer", {'correct': True})
+        state = await self.client.request('POST', f"{path}/next")
+        self.assertFalse(state['review'])
+
+        score = await self.client.request('GET', f"{path}/score")
+        self.assertEqual((score['correct'], score['incorrect'], score['untested']), (2, 0, state['count'] - 2))
+        self.assertEqual(await self.client.request('GET', path), state)
+        state = await self.client.request('POST', f"{path}/shuffle")
+        self.assertEqual((state['index'], state['score']['correct']), (0, 0))
+        self.assertEqual(await self.client.request('DELETE', path), {'deleted': state['session']})
+        await self.assertStatus(404, 'GET', path)
+
+    async def test_seed_repeats_the_order(self):
+        first, second = await self.create(seed=5), await self.create(seed=5)
+        self.assertNotEqual(first['session'], second['session'])
+        self.assertEqual(first['itemkey'], second['itemkey'])
+        # Both share one loaded deck.
+        self.assertEqual(len(self.server.library), 1)
+
+    async def test_make_room(self):
+        self.server.MAX_SESSIONS = 3
+        session_ids = [(await self.create())['session'] for _ in range(3)]
+        self.assertIn('too many sessions', await self.assertStatus(503, 'POST', '/sessions', {'decks': [DECK]}))
+
+        # Using a session moves it to the back; idle ones are dropped from the front.
+        await self.client.request('GET', f"/sessions/{session_ids[0]}")
+        self.server.SESSION_IDLE_SECONDS = 60
+        for session_id in session_ids[:2]:
+            self.server.sessions[session_id].last_used -= 120
+        new_id = (await self.create())['session']
+        self.assertEqual(list(self.server.sessions), [session_ids[2], session_ids[0], new_id])
+
+    async def test_make_room_stops_at_a_recent_session(self):
+        # Sessions are in least recently used order, so an idle one behind a recent one waits its turn.
+        self.server.MAX_SESSIONS = 3
+        self.server.SESSION_IDLE_SECONDS = 60
+        old_id, recent_id, idle_id = [(await self.create())['session'] for _ in range(3)]
+        self.server.sessions[old_id].last_used -= 120
+        self.server.sessions[idle_id].last_used -= 120
+        new_id = (await self.create())['session']
+        self.assertEqual(list(self.server.sessions), [recent_id, idle_id, new_id])
+
+    async def test_not_found(self):
+        state = await self.create()
+        await self.assertStatus(404, 'GET', '/sessions/0123456789abcdef')
+        await self.assertStatus(404, 'POST', '/sessions/0123456789abcdef/next')
+        await self.assertStatus(404, 'POST', f"/sessions/{state['session']}/jump")
+        await self.assertStatus(404, 'GET', '/students')
+        await self.assertStatus(404, 'GET', '/')
+
+    async def test_method_not_allowed(self):
+        state = await self.create()
+        await self.assertStatus(405, 'PUT', '/decks')
+        await self.assertStatus(405, 'GET', '/sessions')
+        await self.assertStatus(405, 'PATCH', f"/sessions/{state['session']}")
+        await self.assertStatus(405, 'GET', f"/sessions/{state['session']}/next")
+
+    async def test_bad_requests(self):
+        state = await self.create()
+        self.assertIn('unknown decks', await self.assertStatus(400, 'POST', '/sessions', {'decks': ['nope']}))
+        await self.assertStatus(400, 'POST', '/sessions', {'decks': DECK})
+        await self.assertStatus(400, 'POST', '/sessions', {'decks': [DECK], 'seed': 'one'})
+        await self.assertStatus(400, 'POST', f"/sessions/{state['session']}/answer", {'correct': 'yes'})
+        await self.assertStatus(400, 'POST', f"/sessions/{state['session']}/answer", [True])
+        # The connection stays usable after a request it could read.
+        self.assertEqual((await self.client.request('GET', f"/sessions/{state['session']}"))['index'], 0)
+
+    async def test_unreadable_requests(self):
+        self.assertEqual(await self.raw_request(b'POST /sessions HTTP/1.1\r\nContent-Length: 4\r\n\r\nnope'),
+                         400)
+        self.assertEqual(await self.raw_request(b'GET /decks HTTP/1.1\r\nContent-Length: many\r\n\r\n'),
+                         400)
+        self.assertEqual(await self.raw_request(b'GET /decks HTTP/1.1\r\nContent-Length: -5\r\n\r\n'),
+                         400)
+        self.assertEqual(await self.raw_request(b'GET /decks\r\n\r\n'), 400)
+        too_large = self.server.MAX_BODY_BYTES + 1
+        self.assertEqual(await self.raw_request(f"POST /sessions HTTP/1.1\r\nContent-Length: {too_large}\r\n\r\n".encode()),
+                         413)
+
+
+if __name__ == '__main__':
+    unittest.main()
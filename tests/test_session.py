@@ -0,0 +1,353 @@
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import test_acronym_answers as answers
+import test_acronym_progress as progress
+import test_acronym_session as session
+
+from tests import REPO_DIR, deck_dir
+
+
+class AnswerLogTest(unittest.TestCase):
+    # One history event per answer, when Next commits it.
+
+    def setUp(self):
+        deck_dir(self)
+        data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(data_dir.cleanup)
+        self.progress = progress.ProgressStore(os.path.join(data_dir.name, progress.PROGRESS_FILE))
+        self.addCleanup(self.progress.close)
+        self.session = session.Session(['A+ acronyms'], rng=random.Random(1), progress=self.progress)
+        self.session.start_test()
+
+    def logged(self):
+        # [(itemkey, outcome), ...] in the order answered
+        self.progress.flush()
+        with sqlite3.connect(self.progress.path) as connection:
+            return connection.execute('SELECT itemkey, outcome FROM answers ORDER BY rowid').fetchall()
+
+    def test_flips_log_only_the_committed_answer(self):
+        key = self.session.current_item.folded_key
+        self.session.toggle_answer()
+        self.session.toggle_answer()
+        self.session.set_answer(self.session.INCORRECT)
+        self.assertEqual(self.logged(), [])
+        self.session.next_item()
+        self.assertEqual(self.logged(), [(key, progress.INCORRECT_OUTCOME)])
+
+    def test_same_answer_again_is_logged_again(self):
+        key = self.session.current_item.folded_key
+        self.session.next_item()
+        self.session.prev_item()
+        self.session.next_item()
+        self.assertEqual(self.logged(), [(key, progress.CORRECT_OUTCOME)] * 2)
+
+    def test_review_pass_logs_every_answer(self):
+        missed = []
+        for _ in range(3):
+            missed.append(self.session.current_item.folded_key)
+            self.session.set_answer(self.session.INCORRECT)
+            self.session.next_item()
+        self.session.set_review_mode(True)
+        # A second pass missing them all again: the results don't change, the log still grows.
+        for _ in range(3):
+            self.session.set_answer(self.session.INCORRECT)
+            self.session.next_item()
+        logged = self.logged()
+        self.assertEqual(len(logged), 6)
+        self.assertEqual(sorted(logged[3:]), sorted((key, progress.INCORRECT_OUTCOME) for key in missed))
+
+
+class StreakTest(unittest.TestCase):
+    # Streaks count the answers Next moves on from, not every flip of the pending answer.
+
+    def setUp(self):
+        deck_dir(self)
+        self.session = session.Session(['A+ acronyms'], rng=random.Random(1))
+        self.session.start_test()
+
+    def streaks(self):
+        return self.session.results.streak, self.session.results.best_streak
+
+    def test_flips_do_not_count(self):
+        for _ in range(5):
+            self.session.toggle_answer()
+            self.session.toggle_answer()
+        self.assertEqual(self.streaks(), (0, 0))
+        self.session.next_item()
+        self.assertEqual(self.streaks(), (1, 1))
+
+    def test_committed_answers(self):
+        for answer in (self.session.CORRECT, self.session.CORRECT, self.session.INCORRECT, self.session.CORRECT):
+            self.session.set_answer(self.session.INCORRECT if answer == self.session.CORRECT else self.session.CORRECT)
+            self.session.set_answer(answer)
+            self.session.next_item()
+        self.assertEqual(self.streaks(), (1, 2))
+        # Going back and answering again is another answer.
+        self.session.prev_item()
+        self.session.next_item()
+        self.assertEqual(self.streaks(), (2, 2))
+
+
+class ReviewModeTest(unittest.TestCase):
+    # Review mode visits the missed acronyms in order, wrapping around both ways, until none is left.
+
+    MISSED = [0, 2, 5]
+
+    def setUp(self):
+        deck_dir(self)
+        self.session = session.Session(['A+ acronyms'], rng=random.Random(1))
+        self.session.start_test()
+        for index in range(6):
+            self.session.set_answer(self.session.INCORRECT if index in self.MISSED else self.session.CORRECT)
+            self.session.next_item()
+        self.session.set_review_mode(True)
+
+    def visit(self, move, count):
+        visited = []
+        for _ in range(count):
+            move()
+            visited.append(self.session.current_item_index)
+            self.assertEqual(self.session.answer, self.session.INCORRECT)
+        return visited
+
+    def test_wraps_around(self):
+        self.assertTrue(self.session.review_mode)
+        self.assertEqual(self.session.current_item_index, 0)
+        self.assertEqual(self.visit(self.session.next_item, 4), [2, 5, 0, 2])
+        self.assertEqual(self.visit(self.session.prev_item, 4), [0, 5, 2, 0])
+        self.assertEqual(self.session.results.incorrect_count, len(self.MISSED))
+
+    def test_answered_misses_drop_out(self):
+        self.session.set_answer(self.session.CORRECT)
+        self.session.next_item()
+        self.assertEqual(self.session.current_item_index, 2)
+        self.assertEqual(self.visit(self.session.next_item, 2), [5, 2])
+        self.assertEqual(self.visit(self.session.prev_item, 2), [5, 2])
+        self.session.set_answer(self.session.CORRECT)
+        self.session.next_item()
+        self.assertEqual(self.session.current_item_index, 5)
+        # The last miss is its own next and previous.
+        self.assertEqual(self.visit(self.session.next_item, 1), [5])
+        self.assertEqual(self.visit(self.session.prev_item, 1), [5])
+        self.session.set_answer(self.session.CORRECT)
+        self.session.next_item()
+        self.assertFalse(self.session.review_mode)
+        self.assertEqual(self.session.current_item_index, 6)
+        self.assertEqual(self.session.results.incorrect_count, 0)
+
+    def test_nothing_to_review(self):
+        for index in self.MISSED:
+            self.session.results.set(index, self.session.CORRECT)
+        self.session.set_review_mode(False)
+        self.session.set_current_item_index(3)
+        self.session.set_review_mode(True)
+        self.assertFalse(self.session.review_mode)
+        self.assertEqual(self.session.current_item_index, 3)
+
+
+class DeckToggleTest(unittest.TestCase):
+    # Checking and unchecking decks and strict mode updates a session in place to what a fresh session with those decks has.
+
+    def setUp(self):
+        deck_dir(self)
+        self.session = session.Session(['A+ acronyms'], rng=random.Random(1))
+        self.session.start_test()
+        self.fresh_sessions = {}
+
+    def fresh(self):
+        # The decks in the same load order: of equal values in two decks, the first loaded keeps its link.
+        key = (tuple(self.session.merger.sources()), self.session.strict_mode)
+        if key not in self.fresh_sessions:
+            fresh = session.Session(key[0], key[1], rng=random.Random(2))
+            fresh.start_test(fresh.load_and_sort(key[0]))
+            self.fresh_sessions[key] = fresh
+        return self.fresh_sessions[key]
+
+    def items(self, a_session):
+        return sorted((item.key, item.values, item.links) for item in a_session.all_items)
+
+    def toggles(self, count=30):
+        # Each step checks or unchecks a deck, or flips strict mode.
+        rng = random.Random(5)
+        for step in range(count):
+            if rng.random() < 0.25:
+                self.session.set_strict_mode(not self.session.strict_mode)
+            else:
+                deck_name = rng.choice(self.session.ALL_CSV_FILES)
+                self.session.enable_csv_file(deck_name, deck_name not in self.session.current_cvs_files)
+            yield step
+
+    def test_items_match_a_fresh_session(self):
+        for step in self.toggles():
+            with self.subTest(step=step, decks=sorted(self.session.current_cvs_files), strict=self.session.strict_mode):
+                self.assertEqual(self.items(self.session), self.items(self.fresh()))
+                self.assertEqual([item.position for item in self.session.all_items],
+                                 list(range(len(self.session.all_items))))
+                self.assertEqual(self.session.active_items, self.session.all_items)
+                self.assertEqual(len(self.session.results), len(self.session.active_items))
+                self.assertEqual(set(self.session.merger.sources()), self.session.current_cvs_files)
+
+    def test_length_index(self):
+        # The length menu counts and each length's items are those of a recount. The length filter stays on until a change leaves no acronym of that length.
+        length_filter = 4
+        self.session.set_acronym_length(length_filter)
+        for step in self.toggles():
+            with self.subTest(step=step, decks=sorted(self.session.current_cvs_files), strict=self.session.strict_mode):
+                by_length = {}
+                for item in self.session.all_items:
+                    by_length.setdefault(len(item.key), set()).add(item)
+                self.assertEqual(self.session.scan_items_for_acronym_lengths(),
+                                 [(0, len(self.session.all_items))] + sorted(
+                                     (length, len(items)) for length, items in by_length.items()))
+                for length, items in by_length.items():
+                    bucket = self.session.length_index.items(length)
+                    self.assertEqual(set(bucket), items)
+                    self.assertEqual([item.length_slot for item in bucket], list(range(len(bucket))))
+                if length_filter not in by_length:
+                    length_filter = 0
+                self.assertEqual(self.session.acronym_length, length_filter)
+                if length_filter:
+                    self.assertEqual(set(self.session.active_items), by_length[length_filter])
+
+    def test_key_index(self):
+        # Every acronym is found in any case, acronyms of unchecked decks are not, and completions are those of a scan.
+        seen_keys = set()
+        for step in self.toggles():
+            with self.subTest(step=step, decks=sorted(self.session.current_cvs_files), strict=self.session.strict_mode):
+                key_index = self.session.key_index
+                self.assertEqual(len(key_index), len(self.session.all_items))
+                by_key = {item.folded_key: item for item in self.session.all_items}
+                for item in self.session.all_items:
+                    self.assertIs(key_index.find(item.key.swapcase()), item)
+                    self.assertIs(key_index.find(item.key, len(item.key)), item)
+                    self.assertIsNone(key_index.find(item.key, len(item.key) + 1))
+                for folded_key in seen_keys - by_key.keys():
+                    self.assertIsNone(key_index.find(folded_key))
+                seen_keys |= by_key.keys()
+                for prefix in ('', 'a', 'S', 'wl', 'ipv', 'zzz'):
+                    for length, limit in ((0, 8), (0, 1000), (4, 8)):
+                        scan = sorted((item for item in self.session.all_items
+                                       if item.folded_key.startswith(prefix.lower())
+                                       and (not length or len(item.key) == length)),
+                                      key=lambda item: (len(item.folded_key), item.folded_key))
+                        self.assertEqual(key_index.complete(prefix, length, limit), scan[:limit])
+
+    def scan_values(self, text, length):
+        # The items a search for text should find, sorted by acronym: one active value has every word, and a word starting with the last one when it is cut short.
+        words = answers.words(text)
+        prefix = words.pop() if words and not text[-1:].isspace() else None
+        found = []
+        for item in self.session.all_items:
+            if length and len(item.key) != length:
+                continue
+            for value in item.values:
+                value_words = answers.words(value)
+                if all(word in value_words for word in words) and (
+                        prefix is None or any(word.startswith(prefix) for word in value_words)):
+                    found.append(item)
+                    break
+        return sorted(found, key=lambda item: item.folded_key)
+
+    def test_value_index(self):
+        rng = random.Random(6)
+        for step in self.toggles():
+            with self.subTest(step=step, decks=sorted(self.session.current_cvs_files), strict=self.session.strict_mode):
+                value_index = self.session.value_index
+                queries = ['protocol', 'access point', 'net', 'wireless a', 'control ', 'zzz', 'secure sh']
+                for item in rng.sample(self.session.all_items, min(10, len(self.session.all_items))):
+                    value_words = answers.words(rng.choice(item.values))
+                    query = ' '.join(rng.sample(value_words, min(2, len(value_words))))
+                    queries += [query, query[:-2]]
+                for text in filter(answers.words, queries):
+                    prefix_only = len(answers.words(text)) == 1 and not text[-1:].isspace()
+                    for length, limit in ((0, 8), (0, 1000), (3, 8)):
+                        found = value_index.search(text, length, limit)
+                        scan = self.scan_values(text, length)
+                        if not prefix_only or len(scan) <= limit:
+                            self.assertEqual(found, scan[:limit], text)
+                        else:
+                            # A cut short word alone takes the first matches it comes to.
+                            self.assertEqual(len(found), limit)
+                            self.assertEqual(found, sorted(found, key=lambda item: item.folded_key))
+                            self.assertLessEqual(set(found), set(scan))
+                for item in rng.sample(self.session.all_items, min(3, len(self.session.all_items))):
+                    value = answers.normalize(item.values[0])
+                    self.assertEqual(set(value_index.items_with_value(value.upper())),
+                                     {other for other in self.session.all_items
+                                      if any(answers.normalize(other_value) == value for other_value in other.values)})
+
+
+class SpacedModeTest(unittest.TestCase):
+    # Switching spaced repetition on or off reorders the cards and keeps the run's score.
+
+    def setUp(self):
+        deck_dir(self)
+        self.session = session.Session(['A+ acronyms'], rng=random.Random(1))
+        self.session.start_test()
+        for answer in (self.session.CORRECT, self.session.INCORRECT, self.session.CORRECT):
+            self.session.set_answer(answer)
+            self.session.next_item()
+
+    def score(self):
+        return list(self.session.results.results), self.session.score_text()
+
+    def test_toggle_keeps_score(self):
+        score = self.score()
+        self.session.set_spaced_mode(True)
+        self.assertEqual(self.score(), score)
+        # Answering the card due first changes its result only.
+        results = score[0]
+        results[self.session.current_item_index] = self.session.answer
+        self.session.next_item()
+        self.session.set_spaced_mode(False)
+        self.assertEqual(self.session.results.results, results)
+
+    def test_review_mode_survives_toggle(self):
+        self.session.set_review_mode(True)
+        missed_index = self.session.current_item_index
+        self.session.set_spaced_mode(True)
+        self.assertTrue(self.session.review_mode)
+        self.assertEqual(self.session.current_item_index, missed_index)
+        self.assertEqual(self.session.answer, self.session.INCORRECT)
+        self.session.set_spaced_mode(False)
+        self.assertEqual(self.session.results.incorrect_count, 1)
+
+
+class LazyImportTest(unittest.TestCase):
+    # Studying a deck plainly imports none of the modules of one mode.
+    MODE_MODULES = {'test_acronym_answers', 'test_acronym_filters', 'test_acronym_ports',
+                    'test_acronym_progress', 'test_acronym_schedule'}
+
+    def imported_modules(self, code):
+        script = ('import random, sys\nimport test_acronym_session as session\n' + code +
+                  '\nprint(" ".join(name for name in sys.modules if name.startswith("test_acronym")))')
+        output = subprocess.run([sys.executable, '-c', script], cwd=REPO_DIR, check=True,
+                                capture_output=True, text=True).stdout
+        return set(output.split())
+
+    def test_plain_study(self):
+        imported = self.imported_modules(
+            "a_session = session.Session(['A+ acronyms'], rng=random.Random(1))\n"
+            "a_session.start_test()\n"
+            "a_session.set_acronym_length(3)\n"
+            "a_session.next_item()\n"
+            "a_session.manual_entry('lan')")
+        self.assertEqual(imported & self.MODE_MODULES, set())
+
+    def test_first_use(self):
+        imported = self.imported_modules(
+            "a_session = session.Session(['A+ acronyms'], rng=random.Random(1))\n"
+            "a_session.start_test()\n"
+            "a_session.set_spaced_mode(True)\n"
+            "a_session.manual_entry('port 443')")
+        self.assertEqual(imported & self.MODE_MODULES, {'test_acronym_schedule', 'test_acronym_ports'})
+
+
+if __name__ == '__main__':
+    unittest.main()
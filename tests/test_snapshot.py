@@ -0,0 +1,123 @@
+import os
+import random
+import tempfile
+import unittest
+import warnings
+
+import test_acronym_filters as filters
+import test_acronym_ports as ports
+import test_acronym_session as session
+import test_acronym_snapshot as snapshot
+
+DECK = 'mine'
+ROWS = [('AP', 'Access Point', 'true'), ('LAN', 'Local Area Network', 'true'), ('WAN', 'Wide Area Network', ''),
+        ('KB', 'Kilobyte', 'true'), ('KB', 'Knowledge Base', ''), ('DHCP', 'Dynamic Host Configuration Protocol', 'true'),
+        ('HTTPS', 'Hypertext Transfer Protocol Secure', 'true'), ('SSH', 'Secure Shell', 'true'),
+        ('WLAN', 'Wireless Local Area Network', 'true'), ('VPN', 'Virtual Private Network', '')]
+
+
+class SnapshotTest(unittest.TestCase):
+    # A session saved and read back is the same session; a snapshot that doesn't fit is never half used.
+
+    def setUp(self):
+        data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(data_dir.cleanup)
+        self.data_dir = data_dir.name
+        # Decks are found in the working directory.
+        previous_dir = os.getcwd()
+        os.chdir(self.data_dir)
+        self.addCleanup(os.chdir, previous_dir)
+        self.write_deck(ROWS)
+        self.snapshots = snapshot.SnapshotFile(os.path.join(self.data_dir, snapshot.SNAPSHOT_FILE))
+
+    def write_deck(self, rows):
+        with open(DECK + '.csv', 'w', encoding='utf-8') as deck_file:
+            deck_file.write('itemkey,itemvalue,itemlink,strict\n')
+            deck_file.writelines(f"{key},{value},https://example.com/{key},{strict}\n" for key, value, strict in rows)
+
+    def studied_session(self):
+        a_session = session.Session([DECK], rng=random.Random(1))
+        a_session.start_test()
+        for answer in (a_session.INCORRECT, a_session.CORRECT, a_session.CORRECT, a_session.INCORRECT):
+            a_session.set_answer(answer)
+            a_session.next_item()
+        a_session.set_item_filter(filters.parse_filter('missed or length>=4'))
+        a_session.set_answer(a_session.INCORRECT)
+        a_session.next_item()
+        a_session.toggle_answer()
+        return a_session
+
+    def state(self, a_session):
+        return ([item.key for item in a_session.all_items], [item.key for item in a_session.active_items],
+                list(a_session.results.results), a_session.current_item_index, a_session.answer,
+                a_session.results.streak, a_session.results.best_streak, a_session.review_mode,
+                a_session.item_filter, a_session.current_cvs_files)
+
+    def restored(self, snapshots):
+        restored = session.Session(rng=random.Random(2))
+        self.assertTrue(restored.restore_snapshot(snapshots.read()))
+        return restored
+
+    def test_session_round_trip(self):
+        studied = self.studied_session()
+        self.snapshots.save(studied)
+        restored = self.restored(self.snapshots)
+        self.assertEqual(self.state(restored), self.state(studied))
+        self.assertTrue(restored.item_filter.resolved)
+
+    def test_every_field_round_trips(self):
+        saved = snapshot.Snapshot.from_session(self.studied_session())
+        saved.port_filter = str(ports.parse_query('tcp 20-25'))
+        saved.strict_mode = saved.review_mode = saved.spaced_mode = saved.typed_mode = saved.reverse_mode = True
+        saved.item_filter_keys = [['ap', 'kb'], []]
+        read = snapshot.Snapshot.from_bytes(saved.to_bytes())
+        for field in snapshot.Snapshot.__slots__:
+            with self.subTest(field=field):
+                self.assertEqual(getattr(read, field), getattr(saved, field))
+
+    def test_changed_deck_starts_over(self):
+        studied = self.studied_session()
+        self.snapshots.save(studied)
+        self.write_deck(ROWS + [('NAT', 'Network Address Translation', 'true')])
+        restored = session.Session(rng=random.Random(2))
+        self.assertFalse(restored.restore_snapshot(self.snapshots.read()))
+        # The decks and settings are kept; the order and score are not.
+        self.assertEqual(restored.current_cvs_files, {DECK})
+        self.assertEqual(len(restored.all_items), len(studied.all_items) + 1)
+        self.assertEqual(restored.results.tested_count, 0)
+        self.assertEqual((restored.results.streak, restored.results.best_streak), (0, 0))
+
+    def test_truncated_snapshots(self):
+        self.snapshots.save(self.studied_session())
+        with open(self.snapshots.path, 'rb') as snapshot_file:
+            data = snapshot_file.read()
+        self.assertIsNotNone(snapshot.Snapshot.from_bytes(data))
+        for size in range(len(data)):
+            self.assertIsNone(snapshot.Snapshot.from_bytes(data[:size]), size)
+        self.assertIsNone(snapshot.Snapshot.from_bytes(data + b'\0'))
+        other_version = bytearray(data)
+        other_version[4] += 1
+        self.assertIsNone(snapshot.Snapshot.from_bytes(bytes(other_version)))
+        with open(self.snapshots.path, 'wb') as snapshot_file:
+            snapshot_file.write(data[:-1])
+        self.assertIsNone(snapshot.SnapshotFile(self.snapshots.path).read())
+
+    def test_write_error_reported_once(self):
+        missing_dir = os.path.join(self.data_dir, 'missing')
+        snapshots = snapshot.SnapshotFile(os.path.join(missing_dir, snapshot.SNAPSHOT_FILE))
+        a_session = self.studied_session()
+        with self.assertWarns(UserWarning):
+            snapshots.save(a_session)
+        self.assertIsInstance(snapshots.error, OSError)
+        a_session.next_item()
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            snapshots.save(a_session)
+            os.mkdir(missing_dir)
+            snapshots.save(a_session)
+        self.assertIsNone(snapshots.error)
+        self.assertEqual(self.state(self.restored(snapshots)), self.state(a_session))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import json
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+
+import test_acronym_timing as timing
+
+
+class PercentileTest(unittest.TestCase):
+
+    def test_nearest_rank(self):
+        rng = random.Random(8)
+        for _ in range(500):
+            values = sorted(rng.choices(range(20), k=rng.randrange(1, 30)))
+            fraction = rng.choice([0.01, 0.25, 0.5, 0.95, 0.99, 1.0, rng.random()])
+            # The smallest value with at least fraction of the values at or below it.
+            expected = min(value for value in values
+                           if sum(other <= value for other in values) >= fraction * len(values))
+            self.assertEqual(timing.percentile(values, fraction), expected, (values, fraction))
+        self.assertEqual(timing.percentile([], 0.5), 0.0)
+
+    def test_stats(self):
+        stats = timing.Stats([float(value) for value in range(100, 0, -1)], 250)
+        self.assertEqual(stats.to_dict(), {'count': 250, 'p50': 50.0, 'p95': 95.0, 'p99': 99.0, 'max': 100.0})
+        self.assertEqual(timing.Stats([], 0).to_dict(), {'count': 0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0})
+
+
+class RingTest(unittest.TestCase):
+    # A ring keeps the last samples, oldest first, and counts every one.
+
+    def test_wraps_around(self):
+        ring = timing.Ring(4)
+        self.assertEqual(ring.samples(), [])
+        for index in range(1, 11):
+            ring.add(float(index), index / 10, index)
+            kept = range(max(1, index - 3), index + 1)
+            self.assertEqual(ring.samples(), [(float(sample), sample / 10, sample) for sample in kept])
+            stats = ring.stats()
+            self.assertEqual(stats.count, index)
+            self.assertEqual(stats.max, index / 10)
+            self.assertEqual(stats.p50, timing.percentile([sample / 10 for sample in kept], 0.5))
+
+
+class RecorderTest(unittest.TestCase):
+    # timed() records to the module recorder only while it is on.
+
+    def setUp(self):
+        self.recorder = timing.Recorder(size=8)
+        patcher = mock.patch.object(timing, 'recorder', self.recorder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_timed(self):
+        @timing.timed('add')
+        def add(first, second):
+            return first + second
+
+        @timing.timed(lambda key: f"key {key}")
+        def press(key):
+            if key == 'bad':
+                raise KeyError(key)
+            return key
+
+        self.assertEqual(add(1, 2), 3)
+        self.assertEqual(self.recorder.stats(), {})
+        self.assertEqual(self.recorder.report().splitlines()[1], 'Not recording')
+        self.recorder.enabled = True
+        self.assertEqual(self.recorder.report().splitlines()[1], 'No timings yet')
+        for index in range(10):
+            self.assertEqual(add(index, 1), index + 1)
+        press('a')
+        with self.assertRaises(KeyError):
+            press('bad')
+        stats = self.recorder.stats()
+        self.assertEqual(list(stats), ['add', 'key a', 'key bad'])
+        self.assertEqual([stats[name].count for name in stats], [10, 1, 1])
+        self.assertEqual(add.__name__, 'add')
+        self.recorder.clear()
+        self.assertEqual(self.recorder.stats(), {})
+
+    def test_saved_files(self):
+        self.recorder.enabled = True
+        for index in range(3):
+            self.recorder.record('load', 10.0 + index, 10.5 + index)
+        self.recorder.record('key', 10.2, 10.25)
+        data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(data_dir.cleanup)
+        with open(self.recorder.save_json(os.path.join(data_dir.name, timing.TIMINGS_FILE))) as json_file:
+            saved = json.load(json_file)
+        self.assertEqual(saved['load']['stats']['count'], 3)
+        self.assertEqual(len(saved['load']['samples']), 3)
+        self.assertAlmostEqual(saved['key']['samples'][0]['duration'], 0.05)
+        with open(self.recorder.save_chrome_trace(os.path.join(data_dir.name, timing.TRACE_FILE))) as trace_file:
+            events = json.load(trace_file)['traceEvents']
+        self.assertEqual([event['name'] for event in events], ['load', 'key', 'load', 'load'])
+        self.assertEqual([event['ts'] for event in events], sorted(event['ts'] for event in events))
+        self.assertAlmostEqual(events[0]['dur'], 0.5e6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import test_acronym_appdata as appdata
+
+from tests import deck_dir
+
+try:
+    import tkinter as tk
+    import test_acronyms
+except ImportError:
+    tk = None
+
+DECK = 'A+ acronyms'
+
+
+class Key:
+    # The fields of a key event win_evt reads.
+    state = 0
+
+    def __init__(self, keysym):
+        self.keysym = keysym
+
+
+class RenderTest(unittest.TestCase):
+    # Moves only ask for a redraw. The window is drawn once the queued events are handled, or right away when something reads what is on screen.
+
+    def setUp(self):
+        if tk is None:
+            self.skipTest('no tkinter')
+        deck_dir(self)
+        data_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(data_dir.cleanup)
+        patcher = mock.patch.dict(os.environ, {appdata.HOME_VARIABLE: data_dir.name})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        try:
+            self.app = test_acronyms.AcronymTester([DECK])
+        except tk.TclError as error:
+            self.skipTest(f"no display: {error}")
+        self.addCleanup(self.close)
+        deadline = time.monotonic() + 30
+        while self.app.loader.loading or self.app.render_id is not None:
+            self.assertLess(time.monotonic(), deadline, 'decks never loaded')
+            self.app.update()
+            time.sleep(0.01)
+        self.show_session = mock.patch.object(self.app, 'show_session', wraps=self.app.show_session).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def close(self):
+        self.app.loader.shutdown()
+        if self.app.session.progress is not None:
+            self.app.session.progress.close()
+        self.app.destroy()
+
+    def on_screen(self):
+        return self.app.cur_which_var.get(), self.app.key_entry_var.get(), self.app.itemvalue_var.get()
+
+    def test_held_key_draws_once(self):
+        drawn = self.on_screen()
+        for _ in range(40):
+            self.app.win_evt(Key('Right'))
+        self.assertEqual(self.show_session.call_count, 0)
+        self.assertEqual(self.on_screen(), drawn)
+        self.app.update_idletasks()
+        self.assertEqual(self.show_session.call_count, 1)
+        self.assertEqual(self.app.session.current_item_index, 40)
+        self.assertEqual(self.on_screen(),
+                         (f"41 / {len(self.app.session.active_items)}", self.app.current_item[self.app.ITEM_KEY], ''))
+        self.assertIsNone(self.app.render_id)
+
+    def test_reading_the_screen_draws_first(self):
+        self.app.win_evt(Key('Right'))
+        self.app.win_evt(Key('Left'))
+        self.app.win_evt(Key('Right'))
+        # Space shows the answer of the acronym moved to, not the one still on screen.
+        self.app.win_evt(Key('space'))
+        self.assertEqual(self.show_session.call_count, 1)
+        values = '\n'.join(self.app.current_item[self.app.ITEM_VALUES])
+        self.assertEqual(self.on_screen()[1:], (self.app.current_item[self.app.ITEM_KEY], values))
+        # The redraw that was pending is not drawn again over it.
+        self.app.update_idletasks()
+        self.assertEqual(self.show_session.call_count, 1)
+        self.assertEqual(self.app.itemvalue_var.get(), values)
+        self.app.win_evt(Key('space'))
+        self.assertEqual(self.app.itemvalue_var.get(), '')
+
+
+if __name__ == '__main__':
+    unittest.main()